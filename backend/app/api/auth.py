@@ -1,23 +1,37 @@
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
-from app.schemas.auth import Token
+from app.schemas.auth import Token, RefreshRequest
 from app.schemas.user import UserCreate, UserResponse
 from app.core.security import (
     verify_password,
     get_password_hash,
     create_access_token,
     create_refresh_token,
-    get_current_user as get_current_user_dep
+    decode_refresh_token,
+    get_current_user as get_current_user_dep,
+    get_current_admin_user,
+    password_needs_rehash
 )
+from app.core.password_pool import PasswordPoolBusy, login_throttle
+from app.core.principal_cache import principal_cache
+from app.core.token_revocation import revocation_store
 from app.config import settings
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _password_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user with email, username, and password"""
@@ -34,7 +48,10 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password and create user
-    password_hash = get_password_hash(user_data.password)
+    try:
+        password_hash = get_password_hash(user_data.password)
+    except PasswordPoolBusy:
+        raise _password_pool_busy()
     user = User(
         username=user_data.username,
         email=user_data.email.lower(),
@@ -51,7 +68,13 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
 def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """Login with email/username and password"""
     identifier = form_data.username
-
+    
+    if not login_throttle.allow(identifier):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(settings.LOGIN_THROTTLE_WINDOW_SECONDS)},
+        )
     # Try username first, then email if contains @
     user = db.query(User).filter(User.username.ilike(identifier)).first()
     if not user and "@" in identifier:
@@ -64,7 +87,12 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not verify_password(form_data.password, user.password_hash):
+    try:
+        password_ok = verify_password(form_data.password, user.password_hash)
+    except PasswordPoolBusy:
+        raise _password_pool_busy()
+    
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username/email or password",
@@ -77,7 +105,50 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             detail="User account is inactive"
         )
     
-    # Create tokens
+    login_throttle.reset(identifier)
+    
+    # Transparently upgrade hashes made with an older (lower) cost
+    if settings.PASSWORD_REHASH_ON_LOGIN and password_needs_rehash(user.password_hash):
+        try:
+            user.password_hash = get_password_hash(form_data.password)
+            db.commit()
+        except PasswordPoolBusy:
+            pass  # Try again on a later login
+    
+    return _issue_tokens(user)
+
+
+@router.post("/refresh", response_model=Token)
+def refresh(request: RefreshRequest, db: Session = Depends(get_db)):
+    """Exchange a refresh token for a new access/refresh pair (the old refresh token is revoked)"""
+    payload = decode_refresh_token(request.refresh_token)
+    
+    expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+    if not revocation_store.revoke(db, payload["jti"], expires_at):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has already been used",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    user = db.query(User).filter(User.username == payload["sub"]).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+    
+    return _issue_tokens(user)
+
+
+def _issue_tokens(user: User) -> dict:
+    """Create a fresh access/refresh token pair for a user"""
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
@@ -95,3 +166,9 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 def get_current_user_info(current_user: User = Depends(get_current_user_dep)):
     """Get current authenticated user information"""
     return current_user
+
+
+@router.get("/principal-cache")
+def get_principal_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    """Principal cache size and hit-rate metrics (admin only)"""
+    return principal_cache.stats()
@@ -1,24 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func, and_, case
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import or_, func, and_, case, select
 from typing import Optional, List
 from math import ceil
 from enum import Enum
 from datetime import date
 
-from app.database import get_db
+from app.database import get_async_read_db, get_db
 from app.models.book import Book
 from app.models.user import User
 from app.models.read import Read
 from app.models.author import Author
 from app.schemas.book import BookCreate, BookUpdate, BookResponse, BookListResponse, BookSearchResult, ExistingBookResult
-from app.core.security import get_current_user
+from app.core.security import get_current_user, get_current_user_async
 from app.core.enums import Format, BookType, ReadStatus
 from app.core.semesters import calculate_semester_number
 from app.services.book_search import SearchService
 from app.services.synopsis_fetch import SynopsisFetchService
 from app.services.file_upload import FileUploadService
+from app.services.image_derivatives import derivative_pipeline
 from app.services.author_service import find_or_create_author
+from app.services.completionist_service import CompletionistService
+from app.services.domain_events import DomainEvent, BOOK_CHANGED, emit
 
 router = APIRouter(prefix="/books", tags=["books"])
 
@@ -127,6 +132,7 @@ def create_book(
             joinedload(Book.author_obj),
             joinedload(Book.reads)
         ).filter(Book.id == existing_book.id).first()
+        derivative_pipeline.add_srcsets(books=[book])
         return book
     
     # Find or create author
@@ -179,6 +185,7 @@ def create_book(
     )
     
     db.add(book)
+    emit(db, DomainEvent(BOOK_CHANGED, current_user.id, author.id))
     db.commit()
     db.refresh(book)
     
@@ -188,12 +195,13 @@ def create_book(
         joinedload(Book.author_obj),
         joinedload(Book.reads)
     ).filter(Book.id == book.id).first()
+    derivative_pipeline.add_srcsets(books=[book])
     
     return book
 
 
 @router.get("", response_model=BookListResponse)
-def list_books(
+async def list_books(
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=200),
     format: Optional[List[Format]] = Query(None),
@@ -208,70 +216,70 @@ def list_books(
     genre: Optional[str] = None,
     search: Optional[str] = None,
     sort: SortOption = Query(SortOption.DATE_READ_DESC),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """List books with pagination, filtering, and sorting"""
-    from sqlalchemy.orm import joinedload
-    
     # Base query - only user's books
-    query = db.query(Book).filter(Book.user_id == current_user.id)
+    query = select(Book).where(Book.user_id == current_user.id)
+    author_joined = False
     
     # Parse search query for field-specific syntax
     search_params = parse_search_query(search) if search else {}
     
     # Apply format filter (multi-select)
     if format:
-        query = query.filter(Book.format.in_(format))
+        query = query.where(Book.format.in_(format))
     elif search_params.get("format"):
         # Format from search syntax
         try:
             format_enum = Format[search_params["format"].upper()]
-            query = query.filter(Book.format == format_enum)
+            query = query.where(Book.format == format_enum)
         except (KeyError, AttributeError):
             pass
     
     # Apply book_type filter (multi-select)
     if book_type:
-        query = query.filter(Book.book_type.in_(book_type))
+        query = query.where(Book.book_type.in_(book_type))
     elif search_params.get("type"):
         # Type from search syntax
         try:
             type_enum = BookType[search_params["type"].upper()]
-            query = query.filter(Book.book_type == type_enum)
+            query = query.where(Book.book_type == type_enum)
         except (KeyError, AttributeError):
             pass
     
     # Apply language filter
     if language:
-        query = query.filter(Book.language.ilike(f"%{language}%"))
+        query = query.where(Book.language.ilike(f"%{language}%"))
     
     # Apply author filter - join with Author table
     if author or search_params.get("author"):
         author_term = author or search_params.get("author")
-        query = query.join(Author, Book.author_id == Author.id).filter(
+        query = query.join(Author, Book.author_id == Author.id).where(
             or_(
                 Author.name.ilike(f"%{author_term}%"),
                 Author.normalized_name.ilike(f"%{author_term.lower()}%")
             )
         )
+        author_joined = True
     
     # Apply publisher filter
     if publisher:
-        query = query.filter(Book.publisher.ilike(f"%{publisher}%"))
+        query = query.where(Book.publisher.ilike(f"%{publisher}%"))
     
     # Apply series filter
     if series:
-        query = query.filter(Book.series.ilike(f"%{series}%"))
+        query = query.where(Book.series.ilike(f"%{series}%"))
     
     # Apply genre filter (genres is JSON array)
     if genre:
-        query = query.filter(Book.genres.contains([genre]))
+        query = query.where(Book.genres.contains([genre]))
     
     # Apply ISBN search
     if search_params.get("isbn"):
         isbn = search_params["isbn"]
-        query = query.filter(
+        query = query.where(
             or_(
                 Book.isbn_10 == isbn,
                 Book.isbn_13 == isbn,
@@ -284,7 +292,10 @@ def list_books(
     if search_params.get("general") or (search and not any(search_params.values())):
         search_term = f"%{search_params.get('general', search)}%"
         # Use outerjoin to include books even if author_id is null (backward compatibility)
-        query = query.outerjoin(Author, Book.author_id == Author.id).filter(
+        if not author_joined:
+            query = query.outerjoin(Author, Book.author_id == Author.id)
+            author_joined = True
+        query = query.where(
             or_(
                 Book.title.ilike(search_term),
                 Book.author.ilike(search_term),  # Legacy field
@@ -293,76 +304,30 @@ def list_books(
             )
         )
     
-    # Build read-related filters using subqueries to avoid multiple joins
-    read_filters = []
+    # Read-related filters use subqueries to avoid multiple joins
+    def user_read_book_ids(*criteria):
+        return select(Read.book_id).where(Read.user_id == current_user.id, *criteria)
     
     # Apply read_status filter (check reads table)
     if read_status:
         if read_status == ReadStatus.READ:
             # Books that have at least one READ read
-            read_filters.append(
-                Book.id.in_(
-                    db.query(Read.book_id).filter(
-                        Read.read_status == "READ",
-                        Read.user_id == current_user.id
-                    ).distinct()
-                )
-            )
+            query = query.where(Book.id.in_(user_read_book_ids(Read.read_status == "READ")))
         elif read_status == ReadStatus.UNREAD:
             # Books with no READ reads
-            read_filters.append(
-                ~Book.id.in_(
-                    db.query(Read.book_id).filter(
-                        Read.read_status == "READ",
-                        Read.user_id == current_user.id
-                    ).distinct()
-                )
-            )
+            query = query.where(~Book.id.in_(user_read_book_ids(Read.read_status == "READ")))
         elif read_status == ReadStatus.READING:
             # Books with READING status
-            read_filters.append(
-                Book.id.in_(
-                    db.query(Read.book_id).filter(
-                        Read.read_status == "READING",
-                        Read.user_id == current_user.id
-                    ).distinct()
-                )
-            )
+            query = query.where(Book.id.in_(user_read_book_ids(Read.read_status == "READING")))
         elif read_status == ReadStatus.DNF:
             # Books with DNF status
-            read_filters.append(
-                Book.id.in_(
-                    db.query(Read.book_id).filter(
-                        Read.read_status == "DNF",
-                        Read.user_id == current_user.id
-                    ).distinct()
-                )
-            )
+            query = query.where(Book.id.in_(user_read_book_ids(Read.read_status == "DNF")))
     
     # Apply has_review filter
     if has_review is not None:
-        if has_review:
-            # Books with at least one read that has a review
-            read_filters.append(
-                Book.id.in_(
-                    db.query(Read.book_id).filter(
-                        Read.user_id == current_user.id,
-                        Read.review.isnot(None),
-                        Read.review != ""
-                    ).distinct()
-                )
-            )
-        else:
-            # Books with no reviews on any reads
-            read_filters.append(
-                ~Book.id.in_(
-                    db.query(Read.book_id).filter(
-                        Read.user_id == current_user.id,
-                        Read.review.isnot(None),
-                        Read.review != ""
-                    ).distinct()
-                )
-            )
+        reviewed = Book.id.in_(user_read_book_ids(Read.review.isnot(None), Read.review != ""))
+        # Books with at least one reviewed read, or with no reviews on any reads
+        query = query.where(reviewed if has_review else ~reviewed)
     
     # Apply semester filter
     if semester or search_params.get("semester"):
@@ -371,44 +336,34 @@ def list_books(
         from app.core.semesters import get_semester_date_range
         start_date, end_date = get_semester_date_range(sem_num)
         # Books with reads finished in this semester
-        read_filters.append(
-            Book.id.in_(
-                db.query(Read.book_id).filter(
-                    Read.user_id == current_user.id,
-                    Read.read_status == "READ",
-                    Read.date_finished >= start_date,
-                    Read.date_finished <= end_date
-                ).distinct()
-            )
-        )
-    
-    # Apply all read filters
-    if read_filters:
-        for read_filter in read_filters:
-            query = query.filter(read_filter)
+        query = query.where(Book.id.in_(user_read_book_ids(
+            Read.read_status == "READ",
+            Read.date_finished >= start_date,
+            Read.date_finished <= end_date
+        )))
     
-    # Get total count before applying sorting
-    # Get distinct book IDs first, then count them to avoid issues with complex queries
-    distinct_book_ids = query.with_entities(Book.id).distinct().all()
-    total = len(distinct_book_ids)
+    # Get total count before applying sorting (joins above are many-to-one, so no duplicates)
+    total = (await db.execute(
+        select(func.count()).select_from(query.with_only_columns(Book.id).subquery())
+    )).scalar()
     
     # Apply sorting
-    from sqlalchemy.orm import joinedload
-    query = query.options(joinedload(Book.reads).joinedload(Read.user))
+    finished_reads = and_(
+        Book.id == Read.book_id,
+        Read.read_status == "READ",
+        Read.user_id == current_user.id
+    )
+    if sort in (SortOption.AUTHOR_ASC, SortOption.AUTHOR_DESC) and not author_joined:
+        # Use outerjoin to handle null author_id
+        query = query.outerjoin(Author, Book.author_id == Author.id)
     
     if sort == SortOption.TITLE_ASC:
         query = query.order_by(Book.title.asc())
     elif sort == SortOption.TITLE_DESC:
         query = query.order_by(Book.title.desc())
     elif sort == SortOption.AUTHOR_ASC:
-        # Use outerjoin to handle null author_id
-        if Author not in [join.right for join in query.column_descriptions if hasattr(join, 'right')]:
-            query = query.outerjoin(Author, Book.author_id == Author.id)
         query = query.order_by(func.coalesce(Author.name, Book.author).asc())
     elif sort == SortOption.AUTHOR_DESC:
-        # Use outerjoin to handle null author_id
-        if Author not in [join.right for join in query.column_descriptions if hasattr(join, 'right')]:
-            query = query.outerjoin(Author, Book.author_id == Author.id)
         query = query.order_by(func.coalesce(Author.name, Book.author).desc())
     elif sort == SortOption.DATE_ADDED_ASC:
         query = query.order_by(Book.created_at.asc())
@@ -420,73 +375,27 @@ def list_books(
         query = query.order_by(Book.publication_date.desc().nullslast())
     elif sort == SortOption.FORMAT:
         query = query.order_by(Book.format.asc())
-    elif sort == SortOption.DATE_READ_DESC:
-        # Most recent read first - use outerjoin with group_by
-        query = query.outerjoin(
-            Read, and_(
-                Book.id == Read.book_id,
-                Read.read_status == "READ",
-                Read.user_id == current_user.id
-            )
-        ).group_by(Book.id).order_by(
-            func.max(Read.date_finished).desc().nullslast(),
-            Book.created_at.desc()
-        )
-    elif sort == SortOption.DATE_READ_ASC:
-        # Oldest read first
-        query = query.outerjoin(
-            Read, and_(
-                Book.id == Read.book_id,
-                Read.read_status == "READ",
-                Read.user_id == current_user.id
-            )
-        ).group_by(Book.id).order_by(
-            func.min(Read.date_finished).asc().nullslast(),
-            Book.created_at.asc()
-        )
-    elif sort == SortOption.SEMESTER_DESC:
-        # Most recent semester first (same as date_read_desc)
-        query = query.outerjoin(
-            Read, and_(
-                Book.id == Read.book_id,
-                Read.read_status == "READ",
-                Read.user_id == current_user.id
-            )
-        ).group_by(Book.id).order_by(
-            func.max(Read.date_finished).desc().nullslast(),
-            Book.created_at.desc()
-        )
-    elif sort == SortOption.SEMESTER_ASC:
-        # Oldest semester first (same as date_read_asc)
-        query = query.outerjoin(
-            Read, and_(
-                Book.id == Read.book_id,
-                Read.read_status == "READ",
-                Read.user_id == current_user.id
-            )
-        ).group_by(Book.id).order_by(
+    elif sort in (SortOption.DATE_READ_ASC, SortOption.SEMESTER_ASC):
+        # Oldest read first (semester order is the same as read date order)
+        query = query.outerjoin(Read, finished_reads).group_by(Book.id).order_by(
             func.min(Read.date_finished).asc().nullslast(),
             Book.created_at.asc()
         )
     else:
-        # Default: most recent read
-        query = query.outerjoin(
-            Read, and_(
-                Book.id == Read.book_id,
-                Read.read_status == "READ",
-                Read.user_id == current_user.id
-            )
-        ).group_by(Book.id).order_by(
+        # Default (date_read_desc, semester_desc): most recent read first
+        query = query.outerjoin(Read, finished_reads).group_by(Book.id).order_by(
             func.max(Read.date_finished).desc().nullslast(),
             Book.created_at.desc()
         )
     
-    # Apply pagination - eager load author relationship
-    from sqlalchemy.orm import joinedload
+    # Apply pagination; relationships are loaded up front (no lazy loads on an AsyncSession)
     offset = (page - 1) * page_size
-    # Remove duplicates if joins were added, and eager load author
-    query = query.options(joinedload(Book.author_obj)).distinct()
-    books = query.offset(offset).limit(page_size).all()
+    query = query.options(
+        selectinload(Book.author_obj),
+        selectinload(Book.reads).selectinload(Read.user)
+    )
+    books = (await db.execute(query.offset(offset).limit(page_size))).scalars().all()
+    await run_in_threadpool(derivative_pipeline.add_srcsets, books=books)
     
     # Calculate total pages
     total_pages = ceil(total / page_size) if total > 0 else 0
@@ -519,6 +428,7 @@ def get_book(
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
     
+    derivative_pipeline.add_srcsets(books=[book])
     return book
 
 
@@ -542,16 +452,22 @@ def update_book(
     # Update only provided fields (no reading fields - those are in Read model)
     update_data = book_data.model_dump(exclude_unset=True)
     
+    # Progress may change for both the previous and the new author
+    affected_author_ids = {book.author_id}
+    
     # Handle author update separately
     if "author" in update_data:
         author_name = update_data.pop("author")
         author = find_or_create_author(db, author_name)
         book.author_id = author.id
         book.author = author_name  # Keep legacy field
+        affected_author_ids.add(author.id)
     
     for field, value in update_data.items():
         setattr(book, field, value)
     
+    for author_id in affected_author_ids:
+        emit(db, DomainEvent(BOOK_CHANGED, current_user.id, author_id))
     db.commit()
     db.refresh(book)
     
@@ -560,6 +476,7 @@ def update_book(
         joinedload(Book.author_obj),
         joinedload(Book.reads)
     ).filter(Book.id == book.id).first()
+    derivative_pipeline.add_srcsets(books=[book])
     
     return book
 
@@ -579,7 +496,9 @@ def delete_book(
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
     
+    CompletionistService(db).release_book(book.id)
     db.delete(book)
+    emit(db, DomainEvent(BOOK_CHANGED, current_user.id, book.author_id))
     db.commit()
     
     return None
@@ -608,6 +527,7 @@ async def upload_cover(
     book.cover_image_url = cover_url
     db.commit()
     db.refresh(book)
+    await run_in_threadpool(derivative_pipeline.add_srcsets, books=[book])
     
     return book
 
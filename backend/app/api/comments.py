@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+import asyncio
 from typing import List, Optional
 from math import ceil
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_async_db, get_db
 from app.models.user import User
 from app.models.read import Read
 from app.models.semester import Semester
@@ -12,52 +16,48 @@ from app.schemas.comment import (
     CommentCreate,
     CommentResponse,
     CommentListResponse,
+    CommentSearchResponse,
     CommentReactionCreate,
     ReactionUsersResponse,
     CommentReactionResponse
 )
-from app.core.security import get_current_user
+from app.core.security import get_current_user, get_current_user_async, get_current_user_for_stream
+from app.services.event_broker import broker, read_channel, semester_channel
 from app.services.comment_service import (
-    get_comments_for_read,
+    get_comments_for_read_async,
     get_comments_for_semester,
     create_comment,
     delete_comment,
     toggle_reaction,
-    aggregate_reactions,
-    format_comment_response
+    format_comment_response,
+    format_comments,
+    format_comments_async,
+    search_comments,
+    InvalidCursorError
 )
 
 router = APIRouter(prefix="/comments", tags=["comments"])
 
 
 @router.get("/read/{read_id}", response_model=CommentListResponse)
-def get_comments(
+async def get_comments(
     read_id: int,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """Get paginated comments for a read"""
     # Verify read exists
-    read = db.query(Read).filter(Read.id == read_id).first()
+    read = await db.get(Read, read_id)
     if not read:
         raise HTTPException(status_code=404, detail="Read not found")
     
     # Get comments
-    comments, total = get_comments_for_read(
-        db,
-        read_id,
-        current_user.id,
-        page,
-        page_size
-    )
+    comments, total = await get_comments_for_read_async(db, read_id, page, page_size)
     
     # Format responses
-    formatted_comments = [
-        format_comment_response(db, comment, current_user.id)
-        for comment in comments
-    ]
+    formatted_comments = await format_comments_async(db, comments, current_user.id)
     
     total_pages = ceil(total / page_size) if total > 0 else 0
     
@@ -94,10 +94,7 @@ def get_semester_comments(
     )
     
     # Format responses
-    formatted_comments = [
-        format_comment_response(db, comment, current_user.id)
-        for comment in comments
-    ]
+    formatted_comments = format_comments(db, comments, current_user.id)
     
     total_pages = ceil(total / page_size) if total > 0 else 0
     
@@ -110,6 +107,93 @@ def get_semester_comments(
     )
 
 
+async def _event_stream(request: Request, channel: str):
+    """Relay broker events for a channel as SSE frames until the client disconnects"""
+    async with broker.subscribe(channel) as subscription:
+        yield "retry: 5000\n\n"
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(
+                    subscription.get(),
+                    timeout=settings.SSE_HEARTBEAT_SECONDS
+                )
+                yield event.to_sse()
+            except asyncio.TimeoutError:
+                # Keep proxies from closing an idle connection
+                yield ": keepalive\n\n"
+
+
+def _sse_response(request: Request, channel: str) -> StreamingResponse:
+    return StreamingResponse(
+        _event_stream(request, channel),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/read/{read_id}/stream")
+def stream_read_comments(
+    read_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_for_stream)
+):
+    """Live comment-created, comment-deleted and reaction-changed events for a read (SSE)"""
+    read = db.query(Read).filter(Read.id == read_id).first()
+    if not read:
+        raise HTTPException(status_code=404, detail="Read not found")
+    
+    return _sse_response(request, read_channel(read_id))
+
+
+@router.get("/semester/{semester_id}/stream")
+def stream_semester_comments(
+    semester_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_for_stream)
+):
+    """Live comment-created, comment-deleted and reaction-changed events for a semester (SSE)"""
+    semester = db.query(Semester).filter(Semester.id == semester_id).first()
+    if not semester:
+        raise HTTPException(status_code=404, detail="Semester not found")
+    
+    return _sse_response(request, semester_channel(semester_id))
+
+
+@router.get("/search", response_model=CommentSearchResponse)
+def search_comments_endpoint(
+    q: str = Query(..., min_length=1, description="Search query"),
+    read_id: Optional[int] = Query(None, description="Filter by read ID"),
+    semester_id: Optional[int] = Query(None, description="Filter by semester ID"),
+    user_id: Optional[int] = Query(None, description="Filter by user ID"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    page_size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Full-text search over comments, ranked by relevance"""
+    try:
+        items, next_cursor = search_comments(
+            db,
+            q,
+            current_user.id,
+            read_id=read_id,
+            semester_id=semester_id,
+            user_id=user_id,
+            cursor=cursor,
+            limit=page_size
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return CommentSearchResponse(
+        items=items,
+        next_cursor=next_cursor,
+        has_more=next_cursor is not None
+    )
+
+
 @router.post("", response_model=CommentResponse, status_code=status.HTTP_201_CREATED)
 def create_comment_endpoint(
     comment_data: CommentCreate,
@@ -129,9 +213,9 @@ def create_comment_endpoint(
         
         # Reload with relationships
         if comment.read_id:
-            db.refresh(comment, ['user', 'read', 'replies', 'reactions'])
+            db.refresh(comment, ['user', 'read', 'replies'])
         else:
-            db.refresh(comment, ['user', 'semester', 'replies', 'reactions'])
+            db.refresh(comment, ['user', 'semester', 'replies'])
         
         # Format response
         formatted = format_comment_response(db, comment, current_user.id)
@@ -255,49 +339,3 @@ def get_reaction_users(
         page_size=page_size,
         total_pages=total_pages
     )
-
-
-@router.get("/search", response_model=CommentListResponse)
-def search_comments(
-    q: str = Query(..., min_length=1, description="Search query"),
-    read_id: Optional[int] = Query(None, description="Filter by read ID"),
-    user_id: Optional[int] = Query(None, description="Filter by user ID"),
-    page: int = Query(1, ge=1),
-    page_size: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Search comments by content"""
-    query = db.query(Comment).filter(
-        Comment.is_deleted == False,
-        Comment.content.ilike(f"%{q}%")
-    )
-    
-    if read_id:
-        query = query.filter(Comment.read_id == read_id)
-    if user_id:
-        query = query.filter(Comment.user_id == user_id)
-    
-    total = query.count()
-    offset = (page - 1) * page_size
-    comments = query.options(
-        # Eager load relationships
-    ).order_by(Comment.created_at.desc()).offset(offset).limit(page_size).all()
-    
-    # Format responses (only top-level for search results)
-    formatted_comments = [
-        format_comment_response(db, comment, current_user.id)
-        for comment in comments
-        if comment.parent_comment_id is None  # Only show top-level in search
-    ]
-    
-    total_pages = ceil(total / page_size) if total > 0 else 0
-    
-    return CommentListResponse(
-        items=formatted_comments,
-        total=total,
-        page=page,
-        page_size=page_size,
-        total_pages=total_pages
-    )
-
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import and_, desc, or_
 from typing import Optional, List
+from collections import defaultdict
 from math import ceil
 from enum import Enum
 from datetime import datetime
@@ -10,8 +11,9 @@ from app.database import get_db
 from app.models.user import User
 from app.models.book import Book
 from app.models.read import Read
-from app.models.author_canon import AuthorCanon, UserAuthorProgress, CompletionAchievement
-from app.core.security import get_current_user
+from app.models.author_canon import AuthorCanon, AuthorWork, UserAuthorProgress, CompletionAchievement
+from app.core.matching import WorkBookMatcher
+from app.core.security import get_current_user, get_current_admin_user
 from app.services.completionist_service import CompletionistService
 from app.schemas.completionist import (
     AuthorProgressListResponse,
@@ -23,6 +25,7 @@ from app.schemas.completionist import (
     AchievementResponse,
     LeaderboardResponse,
     LeaderboardEntry,
+    ResyncResponse,
     CommunityAuthorStats,
     ReadBookInfo,
     TimelineItem,
@@ -54,8 +57,8 @@ def get_author_progress_list(
     """Get user's author progress list with sorting and filtering"""
     service = CompletionistService(db)
     
-    # Sync progress for all authors first (could be optimized)
-    # For now, we'll just query existing progress
+    # Progress rows are kept current by read/book domain events
+    # (see CompletionistProgressUpdater), so no sync is needed here
     
     offset = (page - 1) * page_size
     progress_list, total = service.get_user_author_progress_list(
@@ -66,52 +69,105 @@ def get_author_progress_list(
         offset=offset
     )
     
+    # Batch-load everything the page needs: the user's books by these authors
+    # (plus any first/recent book recorded on a progress row), their reads,
+    # canon works and achievements - a fixed number of queries per page
+    canon_ids = [p.author_canon_id for p in progress_list]
+    author_ids = [p.canon.author_id for p in progress_list]
+    history_book_ids = {
+        book_id
+        for p in progress_list
+        for book_id in (p.first_book_read_id, p.most_recent_book_read_id)
+        if book_id
+    }
+    
+    books = db.query(Book).filter(
+        or_(
+            and_(Book.user_id == current_user.id, Book.author_id.in_(author_ids)),
+            Book.id.in_(history_book_ids)
+        )
+    ).all() if progress_list else []
+    books_by_id = {b.id: b for b in books}
+    books_by_author = defaultdict(list)
+    for book in sorted(books, key=lambda b: b.id):
+        if book.user_id == current_user.id:
+            books_by_author[book.author_id].append(book)
+    
+    latest_read_by_book = {}
+    if books_by_id:
+        reads = db.query(Read).filter(
+            Read.user_id == current_user.id,
+            Read.book_id.in_(list(books_by_id)),
+            Read.read_status == "READ"
+        ).all()
+        for read in reads:
+            latest = latest_read_by_book.get(read.book_id)
+            if latest is None or (read.date_finished and (
+                    latest.date_finished is None or read.date_finished > latest.date_finished)):
+                latest_read_by_book[read.book_id] = read
+    
+    works_by_canon = defaultdict(list)
+    achievements_by_canon = defaultdict(list)
+    if canon_ids:
+        works = db.query(AuthorWork).filter(
+            AuthorWork.author_canon_id.in_(canon_ids),
+            AuthorWork.is_major_work == True
+        ).order_by(AuthorWork.publication_year.asc(), AuthorWork.id.asc()).all()
+        for work in works:
+            works_by_canon[work.author_canon_id].append(work)
+        
+        achievement_rows = db.query(
+            CompletionAchievement.author_canon_id,
+            CompletionAchievement.achievement_type
+        ).filter(
+            CompletionAchievement.user_id == current_user.id,
+            CompletionAchievement.author_canon_id.in_(canon_ids)
+        ).all()
+        for canon_id, achievement_type in achievement_rows:
+            achievements_by_canon[canon_id].append(achievement_type)
+    
     # Convert to response format
     author_items = []
     for progress in progress_list:
         canon = progress.canon
         author = canon.author
+        author_books = books_by_author.get(canon.author_id, [])
         
-        # Get book covers (simplified - would need actual book queries)
-        read_book_covers = []
-        unread_book_covers = []
-        missing_titles = []
+        read_book_covers = [
+            b.cover_image_url for b in author_books
+            if b.id in latest_read_by_book and b.cover_image_url
+        ]
+        unread_book_covers = [
+            b.cover_image_url for b in author_books
+            if b.id not in latest_read_by_book and b.cover_image_url
+        ]
+        matcher = WorkBookMatcher(author_books)
+        missing_titles = [
+            w.title for w in works_by_canon.get(canon.id, []) if matcher.match(w) is None
+        ]
         
         # Get first and most recent read info
         first_read = None
-        if progress.first_book_read_id:
-            first_book = db.query(Book).filter(Book.id == progress.first_book_read_id).first()
-            if first_book:
-                first_read = ReadBookInfo(
-                    book_id=first_book.id,
-                    title=first_book.title,
-                    read_date=progress.first_read_date,
-                    cover_url=first_book.cover_image_url
-                )
+        first_book = books_by_id.get(progress.first_book_read_id)
+        if first_book:
+            first_read = ReadBookInfo(
+                book_id=first_book.id,
+                title=first_book.title,
+                read_date=progress.first_read_date,
+                cover_url=first_book.cover_image_url
+            )
         
         most_recent_read = None
-        if progress.most_recent_book_read_id:
-            recent_book = db.query(Book).filter(Book.id == progress.most_recent_book_read_id).first()
-            if recent_book:
-                read = db.query(Read).filter(
-                    Read.book_id == recent_book.id,
-                    Read.user_id == current_user.id,
-                    Read.read_status == "READ"
-                ).order_by(Read.date_finished.desc()).first()
-                if read:
-                    most_recent_read = ReadBookInfo(
-                        book_id=recent_book.id,
-                        title=recent_book.title,
-                        read_date=read.date_finished,
-                        user_rating=read.rating,
-                        cover_url=recent_book.cover_image_url
-                    )
-        
-        # Get achievements
-        achievements = db.query(CompletionAchievement).filter(
-            CompletionAchievement.user_id == current_user.id,
-            CompletionAchievement.author_canon_id == canon.id
-        ).all()
+        recent_book = books_by_id.get(progress.most_recent_book_read_id)
+        read = latest_read_by_book.get(recent_book.id) if recent_book else None
+        if read:
+            most_recent_read = ReadBookInfo(
+                book_id=recent_book.id,
+                title=recent_book.title,
+                read_date=read.date_finished,
+                user_rating=read.rating,
+                cover_url=recent_book.cover_image_url
+            )
         
         author_items.append(AuthorProgressItem(
             author_canon_id=canon.id,
@@ -125,7 +181,7 @@ def get_author_progress_list(
             missing_titles=missing_titles,
             first_read=first_read,
             most_recent_read=most_recent_read,
-            achievements=[a.achievement_type for a in achievements],
+            achievements=achievements_by_canon.get(canon.id, []),
             is_goal=progress.is_goal
         ))
     
@@ -227,63 +283,56 @@ def get_achievements(
 
 @router.get("/leaderboard", response_model=LeaderboardResponse)
 def get_leaderboard(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(100, ge=1, le=200),
+    around_me: bool = Query(False, description="Return the entries around the current user's rank instead of a page"),
+    window: int = Query(5, ge=1, le=50, description="Entries above and below the current user when around_me is set"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get completionist leaderboard"""
-    # Get all users with at least one completed author
-    from sqlalchemy import func
-    
-    completed_authors = db.query(
-        UserAuthorProgress.user_id,
-        func.count().label('completed_count')
-    ).filter(
-        UserAuthorProgress.completion_percentage >= 100
-    ).group_by(UserAuthorProgress.user_id).subquery()
+    """Get completionist leaderboard (materialized, refreshed as progress changes)"""
+    service = CompletionistService(db)
+    user_rank = service.get_leaderboard_rank(current_user.id)
     
-    # Get total authors tracked per user
-    total_authors = db.query(
-        UserAuthorProgress.user_id,
-        func.count().label('total_count'),
-        func.avg(UserAuthorProgress.completion_percentage).label('avg_completion')
-    ).group_by(UserAuthorProgress.user_id).subquery()
+    if around_me and user_rank is not None:
+        first_rank = max(user_rank - window, 1)
+        last_rank = user_rank + window
+        # Report the page of the board the caller sits on, not the requested one
+        page = (user_rank - 1) // page_size + 1
+    else:
+        first_rank = (page - 1) * page_size + 1
+        last_rank = page * page_size
     
-    # Join with users
-    leaderboard_query = db.query(
-        User.id,
-        User.username,
-        User.display_name,
-        func.coalesce(completed_authors.c.completed_count, 0).label('completed'),
-        func.coalesce(total_authors.c.total_count, 0).label('total'),
-        func.coalesce(total_authors.c.avg_completion, 0).label('avg_completion')
-    ).outerjoin(
-        completed_authors, User.id == completed_authors.c.user_id
-    ).outerjoin(
-        total_authors, User.id == total_authors.c.user_id
-    ).filter(
-        func.coalesce(total_authors.c.total_count, 0) > 0
-    ).order_by(
-        desc('completed'),
-        desc('avg_completion')
-    ).limit(100).all()
+    rows, total = service.get_leaderboard_page(first_rank, last_rank)
     
     entries = []
-    user_rank = None
-    for idx, row in enumerate(leaderboard_query, 1):
-        if row.id == current_user.id:
-            user_rank = idx
+    for entry, username, display_name in rows:
         entries.append(LeaderboardEntry(
-            user_id=row.id,
-            username=row.username,
-            display_name=row.display_name,
-            authors_completed=int(row.completed),
-            total_authors_tracked=int(row.total),
-            completion_rate=float(row.avg_completion) / 100.0
+            rank=entry.rank,
+            user_id=entry.user_id,
+            username=username,
+            display_name=display_name,
+            authors_completed=entry.authors_completed,
+            total_authors_tracked=entry.total_authors_tracked,
+            completion_rate=entry.avg_completion / 100.0
         ))
     
     return LeaderboardResponse(
         entries=entries,
         user_rank=user_rank,
-        total_users=len(entries)
+        total_users=total,
+        page=page,
+        page_size=page_size
     )
 
+
+@router.post("/admin/resync", response_model=ResyncResponse)
+def resync_all_progress(
+    batch_size: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Rebuild completionist progress and achievements for all users (admin only)"""
+    result = CompletionistService(db).bulk_resync(batch_size=batch_size)
+    db.commit()
+    return ResyncResponse(**result)
@@ -1,19 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, contains_eager, selectinload
+from sqlalchemy import or_, select
 from typing import List
 
-from app.database import get_db
+from app.database import get_async_db, get_db, get_read_db
 from app.models.user import User
 from app.models.book import Book
 from app.models.read import Read
-from app.models.comment import Comment
 from app.schemas.read import ReadCreate, ReadUpdate, ReadResponse
-from app.core.security import get_current_user
+from app.core.security import get_current_user, get_current_user_async
 from app.services.point_calculator import PointCalculator
 from app.services.file_upload import FileUploadService
+from app.services.image_derivatives import derivative_pipeline
 from app.core.enums import ReadStatus
 from app.core.semesters import get_semester_date_range
+from app.services.domain_events import DomainEvent, READ_CHANGED, emit
 
 router = APIRouter(prefix="/reads", tags=["reads"])
 file_upload_service = FileUploadService()
@@ -103,157 +106,83 @@ def create_read(
     )
     
     db.add(read)
+    emit(db, DomainEvent(READ_CHANGED, current_user.id, book.author_id))
     db.commit()
     db.refresh(read)
     
     # Add points breakdown
     read = _add_points_breakdown(read, book)
+    derivative_pipeline.add_srcsets(reads=[read])
     
     return read
 
 
 @router.get("/book/{book_id}", response_model=List[ReadResponse])
-def get_reads_for_book(
+async def get_reads_for_book(
     book_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """Get all reads for a book (current user only)"""
     # Verify book exists and belongs to user
-    book = db.query(Book).filter(
-        Book.id == book_id,
-        Book.user_id == current_user.id
-    ).first()
+    book = (await db.execute(
+        select(Book).where(Book.id == book_id, Book.user_id == current_user.id)
+    )).scalars().first()
     
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
     
-    reads = db.query(Read).filter(
-        Read.book_id == book_id,
-        Read.user_id == current_user.id
-    ).order_by(Read.date_finished.desc(), Read.created_at.desc()).all()
+    # ReadResponse includes the user; load it up front (no lazy loads on an AsyncSession)
+    reads = (await db.execute(
+        select(Read).options(selectinload(Read.user)).where(
+            Read.book_id == book_id,
+            Read.user_id == current_user.id
+        ).order_by(Read.date_finished.desc(), Read.created_at.desc())
+    )).scalars().all()
     
     # Add points breakdown to each read
     for read in reads:
         _add_points_breakdown(read, book)
+    # Manifest lookups touch the disk; keep them off the event loop
+    await run_in_threadpool(derivative_pipeline.add_srcsets, reads=reads)
     
     return reads
 
 
-def _normalize_book_identifier(title: str, author) -> tuple:
-    """Normalize book title and author for matching across users
-    
-    Args:
-        title: Book title string
-        author: Author string or Author object (relationship)
-    """
-    import re
-    # Convert to lowercase, strip whitespace, and normalize multiple spaces to single space
-    # Also remove common punctuation that might differ
-    if title:
-        normalized_title = re.sub(r'\s+', ' ', title.lower().strip())
-        # Remove common punctuation that might differ between entries
-        normalized_title = re.sub(r'[.,;:!?\'"()]', '', normalized_title)
-    else:
-        normalized_title = ""
-    
-    # Handle author - could be string or Author object
-    author_str = None
-    if author:
-        if hasattr(author, 'name'):  # Author object
-            author_str = author.name
-        elif isinstance(author, str):  # String (legacy)
-            author_str = author
-        else:
-            author_str = str(author)
-    
-    if author_str:
-        normalized_author = re.sub(r'\s+', ' ', author_str.lower().strip())
-        # Remove common punctuation
-        normalized_author = re.sub(r'[.,;:!?\'"()]', '', normalized_author)
-    else:
-        normalized_author = ""
-    return (normalized_title, normalized_author)
-
-
 @router.get("/book/{book_id}/community", response_model=List[ReadResponse])
 def get_community_reads_for_book(
     book_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all reads for a book from all community users, matching by title and author"""
-    from sqlalchemy.orm import joinedload
-    # Get the book to extract title and author, eager load author relationship
-    book = db.query(Book).options(joinedload(Book.author_obj)).filter(Book.id == book_id).first()
+    book = db.query(Book).filter(Book.id == book_id).first()
     
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
     
-    # Get author name - use author_obj relationship or legacy author string
-    author_for_match = None
-    if book.author_obj:  # Author relationship object
-        author_for_match = book.author_obj.name
-    elif book.author:  # Legacy string field
-        author_for_match = book.author
-    
-    # Normalize title and author for matching
-    normalized_title, normalized_author = _normalize_book_identifier(book.title, author_for_match)
-    
-    # Find all books and match by normalized title and author
-    # We fetch all books and normalize in Python for more reliable matching
-    all_books = db.query(Book).options(joinedload(Book.author_obj)).all()
-    matching_book_ids = []
-    
-    # Also include the original book_id to ensure backwards compatibility
-    matching_book_ids.append(book_id)
-    
-    for b in all_books:
-        # Skip the original book (already added)
-        if b.id == book_id:
-            continue
-        
-        # Get author name for matching - use author_obj relationship or legacy author string
-        b_author_for_match = None
-        if b.author_obj:  # Author relationship object
-            b_author_for_match = b.author_obj.name
-        elif b.author:  # Legacy string field
-            b_author_for_match = b.author
-            
-        b_normalized_title, b_normalized_author = _normalize_book_identifier(b.title, b_author_for_match)
-        if b_normalized_title == normalized_title and b_normalized_author == normalized_author:
-            matching_book_ids.append(b.id)
-    
-    if not matching_book_ids:
-        # If no matching books found, return empty list
-        return []
-    
-    # Get all reads for all matching books from all users, with user info
-    reads = db.query(Read).options(
+    # Books match across users on the indexed, normalized title+author key
+    # (always include the original book_id for books without a key)
+    match_filter = Book.id == book_id
+    if book.match_key:
+        match_filter = or_(match_filter, Book.match_key == book.match_key)
+    
+    # One query: reads + their books + users (comment_count is a column on reads)
+    reads = db.query(Read).join(Read.book).options(
+        contains_eager(Read.book),
         joinedload(Read.user)
     ).filter(
-        Read.book_id.in_(matching_book_ids)
+        match_filter
     ).order_by(
         Read.date_finished.desc().nullslast(),
         Read.date_started.desc().nullslast(),
         Read.created_at.desc()
     ).all()
     
-    # Add comment count and points breakdown to each read
+    # Add points breakdown using each read's own book
     for read in reads:
-        # Count comments for this read
-        comment_count = db.query(func.count(Comment.id)).filter(
-            Comment.read_id == read.id
-        ).scalar() or 0
-        
-        # Add comment count as attribute
-        setattr(read, 'comment_count', comment_count)
-        
-        # Get the book for this read to calculate points
-        read_book = db.query(Book).filter(Book.id == read.book_id).first()
-        if read_book:
-            # Add points breakdown using the read's book
-            _add_points_breakdown(read, read_book)
+        _add_points_breakdown(read, read.book)
+    derivative_pipeline.add_srcsets(reads=reads)
     
     return reads
 
@@ -276,6 +205,7 @@ def get_read(
     book = db.query(Book).filter(Book.id == read.book_id).first()
     if book:
         _add_points_breakdown(read, book)
+    derivative_pipeline.add_srcsets(reads=[read])
     
     return read
 
@@ -330,11 +260,13 @@ def update_read(
         read.calculated_points_allegory = None
         read.calculated_points_reasonable = None
     
+    emit(db, DomainEvent(READ_CHANGED, current_user.id, book.author_id))
     db.commit()
     db.refresh(read)
     
     # Add points breakdown
     read = _add_points_breakdown(read, book)
+    derivative_pipeline.add_srcsets(reads=[read])
     
     return read
 
@@ -354,7 +286,9 @@ def delete_read(
     if not read:
         raise HTTPException(status_code=404, detail="Read not found")
     
+    author_id = db.query(Book.author_id).filter(Book.id == read.book_id).scalar()
     db.delete(read)
+    emit(db, DomainEvent(READ_CHANGED, current_user.id, author_id))
     db.commit()
     
     return None
@@ -388,6 +322,7 @@ async def upload_read_vibe_photo(
     book = db.query(Book).filter(Book.id == read.book_id).first()
     if book:
         read = _add_points_breakdown(read, book)
+    await run_in_threadpool(derivative_pipeline.add_srcsets, reads=[read])
     
     return read
 
@@ -8,7 +8,6 @@ from app.models.user import User
 from app.models.book import Book
 from app.models.semester import Semester
 from app.models.read import Read
-from app.models.comment import Comment
 from app.schemas.semester import (
     SemesterUpdate,
     SemesterResponse,
@@ -119,19 +118,11 @@ def _calculate_semester_stats(db: Session, user_id: int, semester_number: int) -
     if not reads:
         return SemesterStats()
     
-    # Get read IDs
-    read_ids = [r.id for r in reads]
-    
     # Count reads without reviews (unviewnered)
     total_unviewnered = sum(1 for r in reads if not r.review or not r.review.strip())
     
-    # Count reads with comments (commented)
-    commented_read_ids = db.query(Comment.read_id).filter(
-        Comment.read_id.in_(read_ids),
-        Comment.is_deleted == False
-    ).distinct().all()
-    # Extract read_id from tuples
-    commented_count = len(set(row[0] for row in commented_read_ids))
+    # Count reads with comments (commented), from the denormalized counter
+    commented_count = sum(1 for r in reads if r.comment_count)
     
     total_points_allegory = sum((r.calculated_points_allegory or 0) / 100.0 for r in reads)
     total_points_reasonable = sum((r.calculated_points_reasonable or 0) / 100.0 for r in reads)
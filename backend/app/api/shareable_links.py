@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session, joinedload
 from datetime import datetime, timedelta, timezone
 from typing import Optional, List
 
@@ -14,6 +14,8 @@ from app.schemas.shareable_link import (
     SharedBookResponse
 )
 from app.core.security import get_current_user
+from app.services.share_cache import share_cache
+from app.services.view_counter import view_counter
 from app.config import settings
 
 router = APIRouter(prefix="/shareable-links", tags=["shareable-links"])
@@ -57,7 +59,7 @@ def create_shareable_link(
             book_id=existing_link.book_id,
             token=existing_link.token,
             expires_at=existing_link.expires_at,
-            view_count=existing_link.view_count,
+            view_count=existing_link.view_count + view_counter.pending(existing_link.id),
             is_revoked=existing_link.is_revoked,
             revoked_at=existing_link.revoked_at,
             created_at=existing_link.created_at,
@@ -86,7 +88,7 @@ def create_shareable_link(
         book_id=shareable_link.book_id,
         token=shareable_link.token,
         expires_at=shareable_link.expires_at,
-        view_count=shareable_link.view_count,
+        view_count=shareable_link.view_count + view_counter.pending(shareable_link.id),
         is_revoked=shareable_link.is_revoked,
         revoked_at=shareable_link.revoked_at,
         created_at=shareable_link.created_at,
@@ -126,7 +128,7 @@ def get_shareable_link_for_book(
         book_id=link.book_id,
         token=link.token,
         expires_at=link.expires_at,
-        view_count=link.view_count,
+        view_count=link.view_count + view_counter.pending(link.id),
         is_revoked=link.is_revoked,
         revoked_at=link.revoked_at,
         created_at=link.created_at,
@@ -165,7 +167,7 @@ def get_all_shareable_links_for_book(
             book_id=link.book_id,
             token=link.token,
             expires_at=link.expires_at,
-            view_count=link.view_count,
+            view_count=link.view_count + view_counter.pending(link.id),
             is_revoked=link.is_revoked,
             revoked_at=link.revoked_at,
             created_at=link.created_at,
@@ -203,23 +205,43 @@ def revoke_shareable_link(
 @router.get("/token/{token}", response_model=SharedBookResponse)
 def get_shared_book_by_token(
     token: str,
+    request: Request,
     db: Session = Depends(get_db)
 ):
-    """Get book data via shareable link token (public, no auth required)"""
+    """
+    Get book data via shareable link token (public, no auth required).
+    The link itself is checked on every request (one unique-index lookup),
+    so a revocation in any worker applies immediately; the rendered payload
+    is served from the share cache when possible, with an ETag for 304
+    revalidation.
+    """
     link = db.query(ShareableLink).filter(ShareableLink.token == token).first()
     
     if not link:
+        share_cache.invalidate_token(token)
         raise HTTPException(status_code=404, detail="Shareable link not found")
     
     if not link.is_valid():
+        share_cache.invalidate_token(token)
         raise HTTPException(status_code=410, detail="Shareable link has expired or been revoked")
     
-    # Increment view count
-    link.view_count += 1
-    db.commit()
+    cached = share_cache.get(token)
+    if cached is None or cached.link_id != link.id:
+        cached = share_cache.put(token, link, _render_shared_book(db, link))
+    
+    # Count the view; buffered and written in batches
+    view_counter.record(db, cached.link_id)
     
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if cached.etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+def _render_shared_book(db: Session, link: ShareableLink) -> bytes:
+    """Serialized SharedBookResponse for a valid link"""
     # Load book with relationships
-    from sqlalchemy.orm import joinedload
     book = db.query(Book).options(
         joinedload(Book.user),
         joinedload(Book.author_obj)
@@ -275,5 +297,4 @@ def get_shared_book_by_token(
         sharing_user_review=sharing_user_review,
         sharing_user_rating=sharing_user_rating,
         sharing_user_date_read=sharing_user_date_read
-    )
-
+    ).model_dump_json().encode()
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from enum import Enum
 
-from app.database import get_db
+from app.database import get_async_read_db, get_read_db
 from app.models.user import User
-from app.core.security import get_current_user
-from app.services.statistics_service import StatisticsService
+from app.core.security import get_current_user, get_current_user_async
+from app.services.statistics_service import StatisticsService, count_community_books, load_summary_reads
 from app.schemas.statistics import (
     StatisticsSummary,
     TimeSeriesResponse,
@@ -54,15 +55,13 @@ class PointAlgorithm(str, Enum):
 
 
 @router.get("/summary", response_model=StatisticsSummary)
-def get_statistics_summary(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def get_statistics_summary(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """Get quick summary statistics for library pane"""
-    service = StatisticsService(db)
-    
-    # Get all reads for user
-    reads = service.get_reads_query(current_user.id).all()
+    # Get all reads for user (loaded once; the breakdown and rates below reuse them)
+    reads = await load_summary_reads(db, current_user.id)
     
     if not reads:
         return StatisticsSummary(
@@ -77,6 +76,9 @@ def get_statistics_summary(
             conjugation_highlights_count=0
         )
     
+    # Pure calculations over the loaded reads, no queries
+    service = StatisticsService(db.sync_session)
+    
     # Calculate totals
     total_reads = len(reads)
     unique_books = len(set(r.book_id for r in reads if r.book_id))
@@ -90,7 +92,7 @@ def get_statistics_summary(
     )
     
     # Get format breakdown (top 4)
-    format_data = service.calculate_format_breakdown(current_user.id, "alltime")
+    format_data = service.format_breakdown_from_reads(reads)
     format_breakdown = [
         FormatBreakdownItem(
             format=item["format"],
@@ -101,14 +103,14 @@ def get_statistics_summary(
     ]
     
     # Calculate viewner rate
-    _, viewner_rate = service.calculate_viewner_rate(current_user.id, "alltime")
+    _, viewner_rate = service.viewner_rate_from_reads(reads)
     
     # Calculate commentu rate
-    _, commentu_rate = service.calculate_commentu_rate(current_user.id, "alltime")
+    _, commentu_rate = service.commentu_rate_from_reads(reads)
     
-    # Get community stats counts
-    reads_in_common = service.calculate_community_reads_in_common(current_user.id, min_user_count=2)
-    conjugation_highlights = service.calculate_conjugation_highlights(limit=10)
+    # Get community stats counts. Conjugation highlights are the same
+    # shared books (finished by 2+ users), capped at the pane's limit of 10.
+    reads_in_common_count = await count_community_books(db, min_user_count=2)
     
     return StatisticsSummary(
         total_reads=total_reads,
@@ -118,15 +120,15 @@ def get_statistics_summary(
         format_breakdown=format_breakdown,
         viewner_rate=viewner_rate,
         commentu_rate=commentu_rate,
-        reads_in_common_count=len(reads_in_common),
-        conjugation_highlights_count=len(conjugation_highlights)
+        reads_in_common_count=reads_in_common_count,
+        conjugation_highlights_count=min(reads_in_common_count, 10)
     )
 
 
 @router.get("/reading", response_model=TimeSeriesResponse)
 def get_reading_statistics(
     time_dimension: TimeDimension = Query(default=TimeDimension.ALLTIME),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get reading statistics over time (reads count)"""
@@ -152,7 +154,7 @@ def get_reading_statistics(
 def get_points_statistics(
     time_dimension: TimeDimension = Query(default=TimeDimension.ALLTIME),
     algorithm: PointAlgorithm = Query(default=PointAlgorithm.ALLEGORY),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get points earned over time"""
@@ -181,7 +183,7 @@ def get_points_statistics(
 @router.get("/format-breakdown", response_model=FormatBreakdown)
 def get_format_breakdown(
     time_dimension: TimeDimension = Query(default=TimeDimension.ALLTIME),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get format distribution over time"""
@@ -209,7 +211,7 @@ def get_format_breakdown(
 @router.get("/book-type-breakdown", response_model=BookTypeBreakdown)
 def get_book_type_breakdown(
     time_dimension: TimeDimension = Query(default=TimeDimension.ALLTIME),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get book type distribution over time"""
@@ -238,7 +240,7 @@ def get_book_type_breakdown(
 def get_genre_breakdown(
     time_dimension: TimeDimension = Query(default=TimeDimension.ALLTIME),
     limit: int = Query(default=10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get genre distribution over time"""
@@ -266,7 +268,7 @@ def get_genre_breakdown(
 @router.get("/author-frequency", response_model=AuthorFrequency)
 def get_author_frequency(
     limit: int = Query(default=10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get most-read authors based on read count"""
@@ -291,7 +293,7 @@ def get_author_frequency(
 @router.get("/viewner-rate", response_model=ViewnerRateResponse)
 def get_viewner_rate(
     time_dimension: TimeDimension = Query(default=TimeDimension.ALLTIME),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get viewner rate (percentage of reads with reviews) over time"""
@@ -317,7 +319,7 @@ def get_viewner_rate(
 @router.get("/commentu-rate", response_model=CommentuRateResponse)
 def get_commentu_rate(
     time_dimension: TimeDimension = Query(default=TimeDimension.ALLTIME),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get commentu rate (percentage of reads with comments) over time"""
@@ -344,7 +346,7 @@ def get_commentu_rate(
 def get_community_statistics(
     min_user_count: int = Query(default=2, ge=2),
     conjugation_limit: int = Query(default=10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get community statistics (reads in common, sentiment, conjugation)"""
@@ -1,9 +1,30 @@
+from pathlib import Path
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     # Database (Phase 0: SQLite)
     DATABASE_URL: str = "sqlite:///./cookbompy.db"
+    # Read replica for heavy GET endpoints (statistics, community, library listing);
+    # unset or unreachable means those reads go to DATABASE_URL
+    DATABASE_REPLICA_URL: Optional[str] = None
+    
+    # Connection pool for server databases (PostgreSQL); per engine and per worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Reconnect before server/proxy idle timeouts
+    DB_POOL_TIMEOUT_SECONDS: int = 30  # Wait for a free connection before erroring
+    
+    # SQLite performance profile, applied to every connection (see database.sqlite_pragmas)
+    SQLITE_TUNING_ENABLED: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64000  # Negative = KiB, so ~64MB of page cache per connection
+    SQLITE_TEMP_STORE: str = "MEMORY"
     
     # Security (Phase 1: JWT Auth)
     SECRET_KEY: str = "your-secret-key-change-in-production-use-env-var"
@@ -15,6 +36,65 @@ class Settings(BaseSettings):
     APP_NAME: str = "CookBomPy"
     FRONTEND_URL: str = "http://localhost:5173"
     CORS_ORIGINS: list[str] = ["http://localhost:5173", "http://localhost:3000"]
+    ADMIN_USERNAMES: list[str] = []  # Users allowed to run maintenance endpoints
+    
+    # Principal cache for get_current_user (size 0 disables). The TTL bounds how long
+    # user changes made outside this process (other workers) can go unnoticed.
+    PRINCIPAL_CACHE_SIZE: int = 1024
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    
+    # Password hashing: bcrypt runs in a process pool (0 workers = inline in the request thread)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 8  # Queued + running hash/verify calls before 503
+    PASSWORD_REHASH_ON_LOGIN: bool = False  # Upgrade hashes made with a lower BCRYPT_ROUNDS
+    LOGIN_ATTEMPTS_PER_WINDOW: int = 10  # Per username/email (0 disables)
+    LOGIN_THROTTLE_WINDOW_SECONDS: int = 60
+    
+    # Responsive image derivatives for covers and vibe photos (0 workers = threadpool)
+    IMAGE_DERIVATIVE_WIDTHS: list[int] = [160, 320, 640]
+    IMAGE_DERIVATIVE_QUALITY: int = 80
+    IMAGE_DERIVATIVE_WORKERS: int = 2
+    IMAGE_MANIFEST_CACHE_SIZE: int = 4096  # Parsed manifests kept for srcset lookups (LRU)
+    
+    # Uploaded media (covers, vibe photos, profile photos) and their derivatives,
+    # served at /media. One root for uploads, derivative lookups and serving.
+    MEDIA_ROOT: str = str(Path(__file__).resolve().parent.parent / "media")
+    
+    # /media serving: "none" streams files from the app, "x-accel" hands them to nginx
+    # (internal location at MEDIA_ACCEL_PREFIX), "x-sendfile" to Apache/lighttpd
+    MEDIA_OFFLOAD: str = "none"
+    MEDIA_ACCEL_PREFIX: str = "/protected-media/"
+    
+    # Remote cover ingestion (manage.py ingest-covers). When enabled, a user's remote
+    # covers are also downloaded shortly after their books change.
+    COVER_INGEST_ENABLED: bool = False
+    COVER_INGEST_DELAY_SECONDS: float = 5.0
+    COVER_INGEST_MAX_CONNECTIONS: int = 16
+    COVER_INGEST_PER_HOST_LIMIT: int = 4
+    COVER_INGEST_MAX_ATTEMPTS: int = 3
+    # Hosts covers may be fetched from (and redirected to); subdomains included
+    COVER_INGEST_ALLOWED_HOSTS: list[str] = [
+        "books.google.com", "books.googleusercontent.com", "covers.openlibrary.org", "archive.org"
+    ]
+    
+    # Live events (SSE)
+    # "memory://" for a single worker, "sqlite:///./events.db" to fan out across workers
+    EVENT_BROKER_URL: str = "memory://"
+    SSE_HEARTBEAT_SECONDS: int = 15
+    
+    # Completionist: coalescing window for progress updates after read/book changes
+    COMPLETIONIST_SYNC_DELAY_SECONDS: float = 2.0
+    
+    # Shareable link views are buffered and written in one UPDATE per interval (0 = every view)
+    SHARE_VIEW_FLUSH_SECONDS: float = 10.0
+    # Public share-page payload cache (size 0 disables); entries never outlive their link
+    SHARE_CACHE_SIZE: int = 2048
+    SHARE_CACHE_TTL_SECONDS: int = 300
+    # Background revocation of expired links (0 disables); revoked links are deleted
+    # after SHARE_LINK_PURGE_AFTER_DAYS (0 keeps them)
+    SHARE_LINK_SWEEP_INTERVAL_SECONDS: int = 3600
+    SHARE_LINK_PURGE_AFTER_DAYS: int = 0
     
     # Environment
     ENVIRONMENT: str = "local"
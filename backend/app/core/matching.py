@@ -0,0 +1,87 @@
+import re
+from typing import Dict, Iterable, Optional
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """Lowercase, collapse whitespace and drop punctuation that commonly differs"""
+    if not title:
+        return ""
+    normalized = re.sub(r'\s+', ' ', title.lower().strip())
+    return re.sub(r'[.,;:!?\'"()]', '', normalized)
+
+
+def normalize_isbn(isbn: Optional[str]) -> str:
+    """Strip hyphens and spaces so formatted and bare ISBNs compare equal"""
+    if not isbn:
+        return ""
+    return re.sub(r'[^0-9X]', '', isbn.upper())
+
+
+def normalize_book_identifier(title: Optional[str], author) -> tuple:
+    """Normalize book title and author for matching across users
+    
+    Args:
+        title: Book title string
+        author: Author string or Author object (relationship)
+    """
+    normalized_title = normalize_title(title)
+    
+    # Handle author - could be string or Author object
+    author_str = None
+    if author:
+        if hasattr(author, 'name'):  # Author object
+            author_str = author.name
+        elif isinstance(author, str):  # String (legacy)
+            author_str = author
+        else:
+            author_str = str(author)
+    
+    if author_str:
+        normalized_author = re.sub(r'\s+', ' ', author_str.lower().strip())
+        # Remove common punctuation
+        normalized_author = re.sub(r'[.,;:!?\'"()]', '', normalized_author)
+    else:
+        normalized_author = ""
+    return (normalized_title, normalized_author)
+
+
+def book_match_key(title: Optional[str], author) -> str:
+    """Cross-user match key for a book: "normalized title|normalized author" (stored in books.match_key)"""
+    normalized_title, normalized_author = normalize_book_identifier(title, author)
+    return f"{normalized_title}|{normalized_author}"
+
+
+class WorkBookMatcher:
+    """
+    Matches author works to a user's books by normalized title, ISBN-13 or
+    ISBN-10 using hash lookups. Build once per request over the user's books.
+    When several books match a work, the earliest book in the input wins.
+    """
+    
+    def __init__(self, books: Iterable):
+        self.books = list(books)
+        self._by_title: Dict[str, int] = {}
+        self._by_isbn_13: Dict[str, int] = {}
+        self._by_isbn_10: Dict[str, int] = {}
+        for position, book in enumerate(self.books):
+            for index, key in (
+                (self._by_title, normalize_title(book.title)),
+                (self._by_isbn_13, normalize_isbn(book.isbn_13)),
+                (self._by_isbn_10, normalize_isbn(book.isbn_10)),
+            ):
+                if key:
+                    index.setdefault(key, position)
+    
+    def match(self, work):
+        """Return the user's book for a work, or None"""
+        positions = [
+            index.get(key)
+            for index, key in (
+                (self._by_title, normalize_title(work.title)),
+                (self._by_isbn_13, normalize_isbn(work.isbn_13)),
+                (self._by_isbn_10, normalize_isbn(work.isbn_10)),
+            )
+            if key
+        ]
+        positions = [p for p in positions if p is not None]
+        return self.books[min(positions)] if positions else None
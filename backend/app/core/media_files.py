@@ -0,0 +1,245 @@
+"""
+Cache-aware static file serving for /media.
+
+StaticFiles sends a weak mtime-based validator, no Cache-Control and ignores
+Range. MediaFiles adds:
+
+- Strong ETags. Content-addressed objects use their file name (it embeds the
+  SHA-256 of the original); other files use mtime and size.
+- `Cache-Control: public, max-age=31536000, immutable` under media/objects/,
+  whose URLs never change meaning, and `no-cache` (cheap 304 revalidation)
+  for everything else.
+- If-None-Match (taking precedence over If-Modified-Since), single byte
+  ranges with If-Range, and 416 for unsatisfiable ranges.
+- Precompressed `.br` / `.gz` siblings when the client accepts them.
+- Optional hand-off of the body to a reverse proxy with X-Accel-Redirect
+  (nginx) or X-Sendfile (Apache, lighttpd). Conditional requests are still
+  answered here; the proxy serves bytes and ranges.
+
+Without offloading, the body is sent by FileResponse, which uses the server's
+zero-copy send extension where available.
+"""
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+from typing import Dict, Optional, Tuple
+from urllib.parse import quote
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from app.services.media_store import INCOMING_DIR, OBJECTS_DIR
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Preferred first
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+OFFLOAD_MODES = ("none", "x-accel", "x-sendfile")
+
+
+class _Unsatisfiable(Exception):
+    pass
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header into an inclusive (start, end) byte range.
+    Returns None when the header should be ignored (malformed, another unit,
+    or several ranges, which we answer with the full body). Raises
+    _Unsatisfiable when no requested byte exists.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0 or size == 0:
+                raise _Unsatisfiable()
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start < 0 or (last and end < start):
+        return None
+    if start >= size:
+        raise _Unsatisfiable()
+    return start, min(end, size - 1)
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    """Weak comparison, as If-None-Match requires"""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in [tag[2:] if tag.startswith("W/") else tag for tag in candidates]
+
+
+def _not_modified_since(request_headers: Headers, stat_result: os.stat_result) -> bool:
+    try:
+        since = parsedate_to_datetime(request_headers["if-modified-since"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return since is not None and int(stat_result.st_mtime) <= since.timestamp()
+
+
+class _FileRangeResponse(Response):
+    """206 response streaming one byte range of a file"""
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, path: str, start: int, end: int, size: int, headers: Dict[str, str]):
+        super().__init__(status_code=206, headers={
+            **headers,
+            "content-range": f"bytes {start}-{end}/{size}",
+            "content-length": str(end - start + 1),
+        })
+        self.path = path
+        self.start = start
+        self.end = end
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            # File shrank underneath us; end the response anyway
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class MediaFiles(StaticFiles):
+    """StaticFiles with strong validators, cache policy, ranges and proxy offload"""
+
+    def __init__(self, *, directory: str, offload: str = "none", accel_prefix: str = "/protected-media/", **kwargs):
+        if offload not in OFFLOAD_MODES:
+            raise ValueError(f"offload must be one of {OFFLOAD_MODES}, not {offload!r}")
+        super().__init__(directory=directory, **kwargs)
+        self.offload = offload
+        self.accel_prefix = accel_prefix.rstrip("/") + "/"
+
+    def lookup_path(self, path: str) -> Tuple[str, Optional[os.stat_result]]:
+        # Never serve dotfiles or in-flight uploads (objects/.incoming)
+        if any(part.startswith(".") for part in path.replace("\\", "/").split("/")):
+            return "", None
+        return super().lookup_path(path)
+
+    def file_response(
+        self,
+        full_path: str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        relative = self.get_path(scope).replace(os.sep, "/")
+        immutable = relative.startswith(f"{OBJECTS_DIR}/") and f"/{INCOMING_DIR}/" not in relative
+        media_type = guess_type(full_path)[0] or "application/octet-stream"
+
+        # A precompressed sibling replaces the body (not for range or offloaded requests)
+        encoding = None
+        if self.offload == "none" and "range" not in request_headers:
+            encoding, full_path, stat_result = self._negotiate_encoding(full_path, stat_result, request_headers)
+
+        etag = self._etag(relative, stat_result, immutable, encoding)
+        headers = {
+            "etag": etag,
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "cache-control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+            "accept-ranges": "bytes",
+        }
+        if encoding is not None:
+            headers["content-encoding"] = encoding
+        if encoding is not None or self._has_precompressed(full_path):
+            headers["vary"] = "Accept-Encoding"
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            if _etag_matches(etag, if_none_match):
+                return NotModifiedResponse(Headers(headers))
+        elif _not_modified_since(request_headers, stat_result):
+            return NotModifiedResponse(Headers(headers))
+
+        if self.offload == "x-accel":
+            headers["x-accel-redirect"] = self.accel_prefix + quote(relative)
+            return Response(status_code=status_code, headers=headers, media_type=media_type)
+        if self.offload == "x-sendfile":
+            headers["x-sendfile"] = os.path.abspath(full_path)
+            return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+        range_header = request_headers.get("range")
+        if range_header and self._if_range_matches(request_headers, headers):
+            size = stat_result.st_size
+            try:
+                byte_range = parse_range(range_header, size)
+            except _Unsatisfiable:
+                return Response(status_code=416, headers={**headers, "content-range": f"bytes */{size}"})
+            if byte_range is not None:
+                headers["content-type"] = media_type
+                return _FileRangeResponse(full_path, byte_range[0], byte_range[1], size, headers)
+
+        return FileResponse(
+            full_path, status_code=status_code, headers=headers, media_type=media_type, stat_result=stat_result
+        )
+
+    @staticmethod
+    def _etag(relative: str, stat_result: os.stat_result, immutable: bool, encoding: Optional[str]) -> str:
+        if immutable:
+            tag = relative.rsplit("/", 1)[-1]
+        else:
+            tag = f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+        if encoding is not None:
+            tag = f"{tag}-{encoding}"
+        return f'"{tag}"'
+
+    @staticmethod
+    def _if_range_matches(request_headers: Headers, headers: Dict[str, str]) -> bool:
+        """A Range is only honored if If-Range (when sent) still names this representation"""
+        if_range = request_headers.get("if-range")
+        if if_range is None:
+            return True
+        return if_range.strip() in (headers["etag"], headers["last-modified"])
+
+    @staticmethod
+    def _negotiate_encoding(
+        full_path: str, stat_result: os.stat_result, request_headers: Headers
+    ) -> Tuple[Optional[str], str, os.stat_result]:
+        accepted = {
+            token.split(";")[0].strip().lower()
+            for token in request_headers.get("accept-encoding", "").split(",")
+            if not token.replace(" ", "").endswith(";q=0")
+        }
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                compressed = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if stat.S_ISREG(compressed.st_mode):
+                return encoding, full_path + suffix, compressed
+        return None, full_path, stat_result
+
+    @staticmethod
+    def _has_precompressed(full_path: str) -> bool:
+        return any(os.path.isfile(full_path + suffix) for _, suffix in PRECOMPRESSED_ENCODINGS)
@@ -0,0 +1,165 @@
+"""
+Bounded worker pool for bcrypt hashing and verification.
+
+bcrypt at cost 12 costs ~250ms of CPU per call. Running it inline in request
+threads lets a burst of logins occupy every threadpool slot. Password work is
+instead sent to a small process pool; at most PASSWORD_HASH_MAX_PENDING calls
+may be queued or running at once and further calls fail fast with
+PasswordPoolBusy (surfaced as 503). A call that times out or hits a crashed
+worker raises PasswordPoolBusy too; a broken pool is replaced on the next
+call. Login attempts are additionally throttled
+per identifier by LoginThrottle (surfaced as 429).
+"""
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Deque, Dict, Optional
+
+from passlib.context import CryptContext
+
+from app.config import settings
+
+
+def _crypt_context(rounds: int) -> CryptContext:
+    # Hashes below the configured cost are reported by needs_update
+    return CryptContext(
+        schemes=["bcrypt"], bcrypt__rounds=rounds, bcrypt__min_rounds=rounds, deprecated="auto"
+    )
+
+
+_contexts: Dict[int, CryptContext] = {}
+
+
+def _context(rounds: int) -> CryptContext:
+    if rounds not in _contexts:
+        _contexts[rounds] = _crypt_context(rounds)
+    return _contexts[rounds]
+
+
+# Worker entry points (module-level so they can be pickled into the pool)
+
+def _hash_password(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify_password(password: str, password_hash: str, rounds: int) -> bool:
+    return _context(rounds).verify(password, password_hash)
+
+
+class PasswordPoolBusy(Exception):
+    """Too many password operations are already queued"""
+
+
+class PasswordPool:
+    """Runs bcrypt in worker processes with a bound on queued work"""
+
+    def __init__(self, workers: int, max_pending: int, rounds: int, timeout: float = 30.0):
+        self.workers = workers
+        self.rounds = rounds
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: workers must not inherit the server's threads and sockets
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Drop a broken executor so the next call starts fresh workers"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn: Callable, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordPoolBusy()
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except RuntimeError as e:  # BrokenProcessPool, or shut down by another thread
+            self._slots.release()
+            self._discard_executor(executor)
+            raise PasswordPoolBusy() from e
+        # The slot is held until the work finishes, even if the caller stops waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError as e:
+            future.cancel()  # Frees the slot now if the work has not started
+            raise PasswordPoolBusy() from e
+        except BrokenProcessPool as e:
+            self._discard_executor(executor)
+            raise PasswordPoolBusy() from e
+
+    def hash(self, password: str) -> str:
+        return self._submit(_hash_password, password, self.rounds)
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        return self._submit(_verify_password, password, password_hash, self.rounds)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """True if a hash was made with a lower cost than configured (cheap, runs inline)"""
+        return _context(self.rounds).needs_update(password_hash)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+class LoginThrottle:
+    """Sliding-window limit on login attempts per identifier (username/email)"""
+
+    def __init__(self, max_attempts: int, window_seconds: float):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self._attempts: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, identifier: str) -> bool:
+        """Record an attempt; False if the identifier is over its limit"""
+        if self.max_attempts <= 0:
+            return True
+        key = identifier.strip().lower()
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._attempts.setdefault(key, deque())
+            while attempts and attempts[0] <= now - self.window_seconds:
+                attempts.popleft()
+            if len(attempts) >= self.max_attempts:
+                return False
+            attempts.append(now)
+            # Keep the table from growing without bound
+            if len(self._attempts) > 10000:
+                for stale in [k for k, v in self._attempts.items() if not v or v[-1] <= now - self.window_seconds]:
+                    del self._attempts[stale]
+            return True
+
+    def reset(self, identifier: str) -> None:
+        with self._lock:
+            self._attempts.pop(identifier.strip().lower(), None)
+
+
+password_pool = PasswordPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    rounds=settings.BCRYPT_ROUNDS
+)
+login_throttle = LoginThrottle(settings.LOGIN_ATTEMPTS_PER_WINDOW, settings.LOGIN_THROTTLE_WINDOW_SECONDS)
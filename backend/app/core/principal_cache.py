@@ -0,0 +1,134 @@
+"""
+TTL + LRU cache of authenticated principals.
+
+get_current_user resolves every request's JWT to a User row. The cache keeps
+a column snapshot of recently seen users keyed by (username, token iat) and
+re-attaches it to the request's session without a SELECT. Entries are dropped
+when a users row is inserted, updated or deleted through the ORM (in this
+process); the TTL bounds staleness for changes made elsewhere (other workers,
+bulk UPDATEs).
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import settings
+from app.models.user import User
+
+CacheKey = Tuple[str, Optional[int]]
+
+
+class PrincipalCache:
+    """Thread-safe LRU of user snapshots with a per-entry TTL"""
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl_seconds > 0
+
+    def get(self, db: Session, username: str, issued_at: Optional[int]) -> Optional[User]:
+        """Return the cached user attached to `db`, or None on a miss"""
+        if not self.enabled:
+            return None
+        key = (username, issued_at)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            values = entry[1]
+
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def put(self, username: str, issued_at: Optional[int], user: User) -> None:
+        """Cache a snapshot of a freshly loaded user"""
+        if not self.enabled:
+            return
+        values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+        with self._lock:
+            self._entries[(username, issued_at)] = (time.monotonic() + self.ttl_seconds, values)
+            self._entries.move_to_end((username, issued_at))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, username: str) -> None:
+        """Drop every cached token for a user"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == username]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+_PENDING_KEY = "principal_cache_invalidations"
+
+
+def _usernames(target: User) -> set:
+    """Current and (if renamed) previous username of a user row"""
+    usernames = {target.username}
+    history = inspect(target).attrs.username.history
+    usernames.update(name for name in history.deleted or () if name)
+    return usernames
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User) -> None:
+    usernames = _usernames(target)
+    for username in usernames:
+        principal_cache.invalidate(username)
+    # Again after commit, in case a concurrent request re-cached the old row
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).update(usernames)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for username in session.info.pop(_PENDING_KEY, ()):
+        principal_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -1,28 +1,36 @@
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security.oauth2 import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models.user import User
+from app.core.principal_cache import principal_cache
+from app.core.password_pool import password_pool
 
-# Password hashing with bcrypt (cost factor 12)
-pwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=12, deprecated="auto")
+# Password hashing with bcrypt (cost factor BCRYPT_ROUNDS, default 12), run in a bounded worker pool
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify a password against a hash (raises PasswordPoolBusy when saturated)"""
+    return password_pool.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt"""
-    return pwd_context.hash(password)
+    """Hash a password using bcrypt (raises PasswordPoolBusy when saturated)"""
+    return password_pool.hash(password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if a hash was made with a lower bcrypt cost than configured"""
+    return password_pool.needs_rehash(hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -32,46 +40,120 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire, "type": "access"})
+    # iat keys the principal cache (see app.core.principal_cache)
+    to_encode.update({"exp": expire, "iat": datetime.utcnow(), "type": "access"})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
 def create_refresh_token(data: dict) -> str:
-    """Create a JWT refresh token (30 days)"""
+    """Create a JWT refresh token (30 days) with a unique jti for rotation/revocation"""
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex, "type": "refresh"})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from JWT token"""
-    credentials_exception = HTTPException(
+def decode_refresh_token(token: str) -> dict:
+    """Validate a refresh token's signature, expiry and type; raise 401 otherwise"""
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        raise invalid_token
+    if payload.get("type") != "refresh" or not payload.get("sub") or not payload.get("jti"):
+        raise invalid_token
+    return payload
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _decode_access_token(token: Optional[str]) -> Tuple[str, Optional[int]]:
+    """(username, iat) of a valid access token, raising 401 otherwise"""
+    if not token:
+        raise _credentials_exception()
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
         token_type: str = payload.get("type")
+        issued_at: Optional[int] = payload.get("iat")
         
         if username is None:
-            raise credentials_exception
+            raise _credentials_exception()
         if token_type != "access":
-            raise credentials_exception
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    return username, issued_at
+
+
+def _check_active(user: User) -> User:
     if not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return user
 
+
+def get_user_from_token(token: Optional[str], db: Session) -> User:
+    """Resolve an access token to an active user, raising 401/400 otherwise"""
+    username, issued_at = _decode_access_token(token)
+    user = principal_cache.get(db, username, issued_at)
+    if user is None:
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            raise _credentials_exception()
+        principal_cache.put(username, issued_at, user)
+    return _check_active(user)
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get the current authenticated user from JWT token"""
+    return get_user_from_token(token, db)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """get_current_user for async endpoints, on the request's AsyncSession"""
+    username, issued_at = _decode_access_token(token)
+    # A cache hit only merges a snapshot (load=False), so no I/O runs on the sync side
+    user = principal_cache.get(db.sync_session, username, issued_at)
+    if user is None:
+        user = (await db.execute(select(User).where(User.username == username))).scalars().first()
+        if user is None:
+            raise _credentials_exception()
+        principal_cache.put(username, issued_at, user)
+    return _check_active(user)
+
+
+def get_current_user_for_stream(
+    request: Request,
+    token: Optional[str] = Query(None, description="Access token (EventSource cannot send headers)"),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get the current user from the Authorization header or a ?token= query param (for SSE)"""
+    authorization = request.headers.get("Authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    return get_user_from_token(token, db)
+
+
+def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
+    """Require the current user to be listed in ADMIN_USERNAMES"""
+    if current_user.username not in settings.ADMIN_USERNAMES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
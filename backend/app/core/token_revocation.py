@@ -0,0 +1,85 @@
+"""
+Refresh-token rotation and revocation.
+
+Every refresh token carries a unique jti. Using a refresh token records its
+jti in revoked_tokens (the primary key makes that an atomic "use once"), so a
+replayed token is rejected even across workers. Rows are kept only until the
+token's own expiry and are pruned periodically. Recently revoked jtis are also
+held in memory so replays are rejected without a database round trip.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationStore:
+    """Revoked refresh-token ids: database table plus an in-memory set"""
+
+    def __init__(self, prune_interval_seconds: float = 3600):
+        self.prune_interval_seconds = prune_interval_seconds
+        self._revoked: Dict[str, float] = {}  # jti -> expiry (unix time)
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def is_revoked(self, jti: str) -> bool:
+        """Fast check against jtis revoked by this process"""
+        with self._lock:
+            expires = self._revoked.get(jti)
+        return expires is not None and expires > time.time()
+
+    def revoke(self, db: Session, jti: str, expires_at: datetime) -> bool:
+        """
+        Record a jti as used/revoked and commit. Returns False if it was
+        already revoked (i.e. the refresh token is being replayed).
+        """
+        if self.is_revoked(jti):
+            return False
+        db.add(RevokedToken(jti=jti, expires_at=expires_at))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            self._remember(jti, expires_at)
+            return False
+        self._remember(jti, expires_at)
+        self._maybe_prune(db)
+        return True
+
+    def _remember(self, jti: str, expires_at: datetime) -> None:
+        with self._lock:
+            self._revoked[jti] = expires_at.timestamp()
+
+    def _maybe_prune(self, db: Session) -> None:
+        if time.monotonic() - self._last_prune < self.prune_interval_seconds:
+            return
+        self._last_prune = time.monotonic()
+        try:
+            self.prune(db)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to prune revoked tokens: {e}")
+
+    def prune(self, db: Session) -> int:
+        """Delete revocations whose tokens have expired anyway. Returns rows deleted."""
+        now = datetime.now(timezone.utc)
+        deleted = db.query(RevokedToken).filter(RevokedToken.expires_at < now).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        with self._lock:
+            cutoff = now.timestamp()
+            for jti in [j for j, expires in self._revoked.items() if expires < cutoff]:
+                del self._revoked[jti]
+        return deleted
+
+
+revocation_store = RevocationStore()
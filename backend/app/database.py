@@ -1,26 +1,164 @@
+import logging
+import time
+from typing import Dict, Optional
+
+from fastapi import Depends
 from sqlalchemy import create_engine, event
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 from app.config import settings
 
-# SQLite-specific configuration
-connect_args = {}
-if settings.DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
+logger = logging.getLogger(__name__)
+
+
+def sqlite_pragmas(tuned: Optional[bool] = None) -> Dict[str, object]:
+    """
+    Per-connection PRAGMAs for the SQLite performance profile.
+    WAL lets readers run alongside a writer and synchronous=NORMAL is safe
+    with WAL (a power loss can only drop the last commits, never corrupt);
+    busy_timeout makes a writer wait for the lock instead of failing with
+    "database is locked" when several workers write at once.
+    tuned defaults to SQLITE_TUNING_ENABLED.
+    """
+    if tuned is None:
+        tuned = settings.SQLITE_TUNING_ENABLED
+    pragmas: Dict[str, object] = {"foreign_keys": "ON"}
+    if tuned:
+        pragmas.update({
+            "journal_mode": settings.SQLITE_JOURNAL_MODE,
+            "synchronous": settings.SQLITE_SYNCHRONOUS,
+            "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+            "mmap_size": settings.SQLITE_MMAP_SIZE,
+            "cache_size": settings.SQLITE_CACHE_SIZE,
+            "temp_store": settings.SQLITE_TEMP_STORE,
+        })
+    return pragmas
+
+
+def apply_sqlite_pragmas(dbapi_conn, pragmas: Dict[str, object]) -> None:
+    cursor = dbapi_conn.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+# Expected PRAGMA readback for symbolic values
+_PRAGMA_VALUES = {
+    "synchronous": {"OFF": 0, "NORMAL": 1, "FULL": 2, "EXTRA": 3},
+    "temp_store": {"DEFAULT": 0, "FILE": 1, "MEMORY": 2},
+    "foreign_keys": {"OFF": 0, "ON": 1},
+}
+
+
+def check_sqlite_pragmas(engine: Engine, pragmas: Dict[str, object]) -> Dict[str, Dict]:
+    """
+    Read back the PRAGMAs on a pooled connection. Returns
+    {name: {"expected": ..., "actual": ..., "ok": bool}} and logs the result.
+    """
+    report = {}
+    with engine.connect() as connection:
+        for name, expected in pragmas.items():
+            actual = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            wanted = _PRAGMA_VALUES.get(name, {}).get(str(expected).upper(), expected)
+            if isinstance(actual, str):
+                ok = actual.lower() == str(wanted).lower()
+            else:
+                ok = str(actual) == str(wanted)
+            report[name] = {"expected": expected, "actual": actual, "ok": ok}
+
+    summary = ", ".join(f"{name}={entry['actual']}" for name, entry in report.items())
+    mismatched = [name for name, entry in report.items() if not entry["ok"]]
+    if mismatched:
+        # e.g. journal_mode stays "memory" for :memory: databases
+        logger.warning(f"SQLite PRAGMAs not applied as configured ({', '.join(mismatched)}): {summary}")
+    else:
+        logger.info(f"SQLite PRAGMAs: {summary}")
+    return report
+
+
+def create_sqlite_engine(url: str, pragmas: Dict[str, object]) -> Engine:
+    """SQLite engine applying `pragmas` to every new connection"""
     # SQLite doesn't support pool_pre_ping
-    engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
-    
-    # Enable foreign key constraints for SQLite
-    @event.listens_for(engine, "connect")
+    sqlite_engine = create_engine(url, connect_args={"check_same_thread": False})
+
+    @event.listens_for(sqlite_engine, "connect")
     def set_sqlite_pragma(dbapi_conn, connection_record):
-        cursor = dbapi_conn.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
-        cursor.close()
-else:
+        apply_sqlite_pragmas(dbapi_conn, pragmas)
+
+    return sqlite_engine
+
+
+def create_database_engine(url: str) -> Engine:
+    """Engine for a database URL: tuned SQLite, or a pooled server database"""
+    if url.startswith("sqlite"):
+        return create_sqlite_engine(url, sqlite_pragmas())
     # PostgreSQL or other databases
-    engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    )
+
+
+# Async drivers for the async session path (get_async_db)
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_database_url(url: str) -> str:
+    """The same database with its async driver, e.g. sqlite:// -> sqlite+aiosqlite://"""
+    sync_url = make_url(url)
+    backend = sync_url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases; async endpoints are unavailable")
+    return sync_url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+def create_async_database_engine(url: str) -> AsyncEngine:
+    """
+    Async engine for a (sync or async) database URL, configured like
+    create_database_engine: the SQLite PRAGMAs, or the server pool settings.
+    """
+    url = async_database_url(url)
+    if url.startswith("sqlite"):
+        async_engine = create_async_engine(url)
+        pragmas = sqlite_pragmas()
+
+        @event.listens_for(async_engine.sync_engine, "connect")
+        def set_sqlite_pragma(dbapi_conn, connection_record):
+            apply_sqlite_pragmas(dbapi_conn, pragmas)
+
+        return async_engine
+    return create_async_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    )
+
+
+engine = create_database_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Created on first use by get_async_db / get_async_read_db, so databases without
+# an async driver only lose the async endpoints instead of failing at import
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+AsyncReplicaSessionLocal: Optional[async_sessionmaker] = None
+
+# Optional read replica for heavy read-only endpoints (see get_read_db / get_async_read_db)
+ReplicaSessionLocal = None
+if settings.DATABASE_REPLICA_URL:
+    ReplicaSessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, bind=create_database_engine(settings.DATABASE_REPLICA_URL)
+    )
+
 Base = declarative_base()
 
 
@@ -31,3 +169,102 @@ def get_db():
     finally:
         db.close()
 
+
+def _async_sessionmaker(url: str) -> async_sessionmaker:
+    # Attributes stay loaded after commit: an async session cannot lazy-load them on access
+    return async_sessionmaker(create_async_database_engine(url), autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    """
+    AsyncSession for endpoints ported to `async def`. Relationships must be
+    eager-loaded (selectinload); lazy loads raise MissingGreenlet.
+    """
+    global AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        AsyncSessionLocal = _async_sessionmaker(settings.DATABASE_URL)
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    """Close pooled async connections, if an async engine was ever created"""
+    for factory in (AsyncSessionLocal, AsyncReplicaSessionLocal):
+        if factory is not None:
+            await factory.kw["bind"].dispose()
+
+
+# After a failed replica connection, use the primary for this long before retrying
+REPLICA_RETRY_SECONDS = 30.0
+_replica_down_until = 0.0
+
+
+def _reject_writes(session, flush_context, instances) -> None:
+    raise RuntimeError("Replica sessions are read-only")
+
+
+def _mark_replica_down(e: DBAPIError) -> None:
+    global _replica_down_until
+    _replica_down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+    logger.warning(f"Read replica unavailable, using the primary for {REPLICA_RETRY_SECONDS:.0f}s: {e}")
+
+
+def _replica_session() -> Optional[Session]:
+    """A connected replica session, or None if there is no usable replica"""
+    if ReplicaSessionLocal is None or time.monotonic() < _replica_down_until:
+        return None
+    db = ReplicaSessionLocal()
+    try:
+        db.connection()
+    except DBAPIError as e:
+        db.close()
+        _mark_replica_down(e)
+        return None
+    event.listen(db, "before_flush", _reject_writes)
+    return db
+
+
+def get_read_db(primary: Session = Depends(get_db)):
+    """
+    Session for heavy read-only endpoints. Uses the read replica when one is
+    configured and reachable, otherwise the request's primary session.
+    Replica reads can lag the primary by the replication delay.
+    """
+    db = _replica_session()
+    if db is None:
+        yield primary
+        return
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def _async_replica_session() -> Optional[AsyncSession]:
+    """Async counterpart of _replica_session"""
+    global AsyncReplicaSessionLocal
+    if AsyncReplicaSessionLocal is None and settings.DATABASE_REPLICA_URL:
+        AsyncReplicaSessionLocal = _async_sessionmaker(settings.DATABASE_REPLICA_URL)
+    if AsyncReplicaSessionLocal is None or time.monotonic() < _replica_down_until:
+        return None
+    db = AsyncReplicaSessionLocal()
+    try:
+        await db.connection()
+    except DBAPIError as e:
+        await db.close()
+        _mark_replica_down(e)
+        return None
+    event.listen(db.sync_session, "before_flush", _reject_writes)
+    return db
+
+
+async def get_async_read_db(primary: AsyncSession = Depends(get_async_db)):
+    """get_read_db for async endpoints: the replica if usable, else the primary"""
+    db = await _async_replica_session()
+    if db is None:
+        yield primary
+        return
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -1,9 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from app.config import settings
-from app.database import engine, Base
+from app.database import engine, dispose_async_engine, Base, SessionLocal, check_sqlite_pragmas, sqlite_pragmas
 from app.api import auth, books, semesters, users, reads, comments, statistics, shareable_links, completionist
+from app.services.event_broker import broker
+from app.services.completionist_service import progress_updater
+from app.core.media_files import MediaFiles
+from app.core.password_pool import password_pool
+from app.services.image_derivatives import derivative_pipeline
+from app.services.cover_ingest import cover_ingest_scheduler
+from app.services.view_counter import view_counter
+from app.services.link_sweeper import link_sweeper
 import logging
 import os
 
@@ -43,10 +50,74 @@ app.include_router(comments.router, prefix="/api")
 app.include_router(shareable_links.router, prefix="/api")
 app.include_router(completionist.router, prefix="/api")
 
-# Serve static files for media (covers, etc.)
-media_path = os.path.join(os.path.dirname(__file__), "..", "media")
+# Serve static files for media (covers, etc.) with ETags, cache headers and ranges
+media_path = settings.MEDIA_ROOT
 os.makedirs(media_path, exist_ok=True)
-app.mount("/media", StaticFiles(directory=media_path), name="media")
+app.mount(
+    "/media",
+    MediaFiles(directory=media_path, offload=settings.MEDIA_OFFLOAD, accel_prefix=settings.MEDIA_ACCEL_PREFIX),
+    name="media"
+)
+
+
+@app.on_event("startup")
+def check_database_settings():
+    """Report the active SQLite PRAGMAs; warns if the tuning profile did not apply"""
+    if engine.dialect.name == "sqlite":
+        check_sqlite_pragmas(engine, sqlite_pragmas())
+
+
+@app.on_event("startup")
+def start_link_sweeper():
+    """Periodically revoke expired shareable links"""
+    link_sweeper.start(SessionLocal)
+
+
+@app.on_event("shutdown")
+def stop_link_sweeper():
+    link_sweeper.stop()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    """Close pooled async connections while the event loop is still running"""
+    await dispose_async_engine()
+
+
+@app.on_event("shutdown")
+def shutdown_event_broker():
+    """Stop the live event broker's background transport"""
+    broker.stop()
+
+
+@app.on_event("shutdown")
+def flush_completionist_progress():
+    """Apply any coalesced completionist progress updates before exiting"""
+    progress_updater.flush()
+
+
+@app.on_event("shutdown")
+def flush_share_view_counts():
+    """Write buffered shareable link views before exiting"""
+    view_counter.flush()
+
+
+@app.on_event("shutdown")
+def shutdown_password_pool():
+    """Stop bcrypt worker processes"""
+    password_pool.shutdown()
+
+
+@app.on_event("shutdown")
+def shutdown_derivative_pipeline():
+    """Stop image derivative worker processes"""
+    derivative_pipeline.shutdown()
+
+
+@app.on_event("shutdown")
+def cancel_cover_ingestion():
+    """Drop queued cover downloads; the next ingest-covers run picks them up"""
+    cover_ingest_scheduler.cancel()
 
 
 @app.get("/")
@@ -5,7 +5,14 @@ from .read import Read
 from .comment import Comment, CommentReaction
 from .shareable_link import ShareableLink
 from .author import Author
-from .author_canon import AuthorCanon, AuthorWork, UserAuthorProgress, CompletionAchievement
+from .author_canon import (
+    AuthorCanon,
+    AuthorWork,
+    UserAuthorProgress,
+    CompletionAchievement,
+    CompletionistLeaderboardEntry,
+)
+from .revoked_token import RevokedToken
 
 __all__ = [
     "User",
@@ -20,5 +27,7 @@ __all__ = [
     "AuthorWork",
     "UserAuthorProgress",
     "CompletionAchievement",
+    "CompletionistLeaderboardEntry",
+    "RevokedToken",
 ]
 
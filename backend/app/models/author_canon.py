@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, UniqueConstraint, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, ForeignKey, UniqueConstraint, Index, Text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -42,6 +42,7 @@ class AuthorWork(Base):
     isbn_10 = Column(String(13), nullable=True)
     isbn_13 = Column(String(17), nullable=True)
     goodreads_id = Column(String(50), nullable=True)
+    source_key = Column(String(100), nullable=True, index=True)  # e.g. Open Library work key, for incremental reloads
     is_major_work = Column(Boolean, default=True)  # Exclude minor essays, articles
     
     # Timestamps
@@ -111,3 +112,31 @@ class CompletionAchievement(Base):
     user = relationship("User", back_populates="completion_achievements")
     canon = relationship("AuthorCanon")
 
+
+
+class CompletionistLeaderboardEntry(Base):
+    """Materialized per-user leaderboard row, refreshed as progress changes"""
+    __tablename__ = "completionist_leaderboard"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    authors_completed = Column(Integer, nullable=False, default=0)  # Authors at 100%
+    total_authors_tracked = Column(Integer, nullable=False, default=0)
+    avg_completion = Column(Float, nullable=False, default=0.0)  # 0-100
+    rank = Column(Integer, nullable=True)  # 1-based position, renumbered on refresh
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    user = relationship("User")
+    
+    # Leaderboard order: most completed, then highest average, then user id
+    __table_args__ = (
+        Index(
+            'ix_completionist_leaderboard_rank',
+            authors_completed.desc(),
+            avg_completion.desc(),
+            user_id
+        ),
+        # Pages are read by stored position
+        Index('ix_completionist_leaderboard_position', rank),
+    )
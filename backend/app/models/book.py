@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, Text, Boolean, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, Boolean, ForeignKey, JSON, Enum as SQLEnum, event, inspect, select
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
 from app.core.enums import Format, BookType, ReadStatus, DescriptionSource
+from app.core.matching import book_match_key
+from app.models.author import Author
 
 
 class Book(Base):
@@ -38,6 +40,9 @@ class Book(Base):
     illustrator = Column(String(255), nullable=True)
     awards = Column(Text, nullable=True)  # Can be multiple, store as text
     
+    # Normalized "title|author" for cross-user matching (maintained on insert/update)
+    match_key = Column(String(1010), nullable=True, index=True)
+    
     # User-managed fields
     acquisition_date = Column(Date, nullable=True)
     acquisition_source = Column(String(255), nullable=True)
@@ -58,3 +63,22 @@ class Book(Base):
     reads = relationship("Read", back_populates="book", cascade="all, delete-orphan")
     shareable_links = relationship("ShareableLink", back_populates="book", cascade="all, delete-orphan")
 
+
+
+@event.listens_for(Book, "before_insert")
+@event.listens_for(Book, "before_update")
+def _set_match_key(mapper, connection, target):
+    """Recompute match_key when the title or author changes"""
+    state = inspect(target)
+    if target.match_key and not any(
+        state.attrs[attr].history.has_changes() for attr in ("title", "author", "author_id")
+    ):
+        return
+    
+    # Prefer the Author entity's name, fall back to the legacy author string
+    author_name = None
+    if target.author_id is not None:
+        author_name = connection.scalar(
+            select(Author.name).where(Author.id == target.author_id)
+        )
+    target.match_key = book_match_key(target.title, author_name or target.author)
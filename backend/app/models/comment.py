@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON, DDL, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -18,6 +18,10 @@ class Comment(Base):
     is_deleted = Column(Boolean, default=False, nullable=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
     
+    # Denormalized reaction counters: {reaction_type: count}
+    # Maintained by comment_service.toggle_reaction, repaired by reconcile_reaction_counts
+    reaction_counts = Column(JSON, nullable=False, default=dict, server_default="{}")
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
     
@@ -45,3 +49,52 @@ class CommentReaction(Base):
     comment = relationship("Comment", back_populates="reactions")
     user = relationship("User", back_populates="comment_reactions")
 
+
+
+# Full-text index over comment content (used by comment_service.search_comments)
+# SQLite: FTS5 external-content table kept in sync with comments by triggers
+COMMENT_FTS_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+        content, content='comments', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comments_fts_ai AFTER INSERT ON comments BEGIN
+        INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comments_fts_ad AFTER DELETE ON comments BEGIN
+        INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS comments_fts_au AFTER UPDATE OF content ON comments BEGIN
+        INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+]
+# Triggers go first: they reference comments_fts and would break DROP TABLE comments
+COMMENT_FTS_SQLITE_DROP_DDL = [
+    "DROP TRIGGER IF EXISTS comments_fts_au",
+    "DROP TRIGGER IF EXISTS comments_fts_ad",
+    "DROP TRIGGER IF EXISTS comments_fts_ai",
+    "DROP TABLE IF EXISTS comments_fts",
+]
+# PostgreSQL: GIN expression index (expression must match the one used in queries)
+COMMENT_FTS_POSTGRESQL_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_comments_content_fts ON comments "
+    "USING gin (to_tsvector('english'::regconfig, content))"
+)
+
+for _statement in COMMENT_FTS_SQLITE_DDL:
+    event.listen(Comment.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in COMMENT_FTS_SQLITE_DROP_DDL:
+    event.listen(Comment.__table__, "before_drop", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    Comment.__table__,
+    "after_create",
+    DDL(COMMENT_FTS_POSTGRESQL_DDL).execute_if(dialect="postgresql")
+)
@@ -39,6 +39,9 @@ class Read(Base):
     # Memorable flag (for semester features)
     is_memorable = Column(Boolean, default=False, index=True)
     
+    # Number of non-deleted comments (incl. replies), maintained by comment_service
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class RevokedToken(Base):
+    """Refresh token id (jti) that has been used or revoked; pruned once expired"""
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String(32), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)  # Token's own expiry
+    revoked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -31,6 +31,23 @@ class ShareableLink(Base):
     book = relationship("Book", back_populates="shareable_links")
     user = relationship("User", back_populates="shareable_links")
     
+    # Partial indexes over active links only, so the owner's current-link lookup
+    # and the expiry sweep stay small as revoked links accumulate
+    __table_args__ = (
+        Index(
+            'ix_shareable_links_active_owner',
+            user_id, book_id, expires_at,
+            sqlite_where=is_revoked == False,
+            postgresql_where=is_revoked == False
+        ),
+        Index(
+            'ix_shareable_links_active_expires_at',
+            expires_at,
+            sqlite_where=is_revoked == False,
+            postgresql_where=is_revoked == False
+        ),
+    )
+    
     @staticmethod
     def generate_token():
         """Generate a secure random token for the shareable link"""
@@ -8,6 +8,11 @@ class Token(BaseModel):
     token_type: str = "bearer"
 
 
+class RefreshRequest(BaseModel):
+    """Refresh token to exchange for a new token pair"""
+    refresh_token: str
+
+
 class TokenData(BaseModel):
     """Token payload data"""
     username: str
@@ -102,6 +102,7 @@ class BookResponse(BookBase):
     reads: List["ReadResponse"] = []  # List of reads for this book
     created_at: datetime
     updated_at: Optional[datetime] = None
+    cover_image_srcset: Optional[str] = None  # Set by the API (image_derivatives.add_srcsets)
     
     @computed_field
     @property
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Optional, List, Dict
 from datetime import datetime
 
@@ -12,16 +12,14 @@ class CommentCreate(CommentBase):
     read_id: Optional[int] = None
     semester_id: Optional[int] = None
     
-    @field_validator('read_id', 'semester_id')
-    @classmethod
-    def validate_target(cls, v, info):
-        # At least one of read_id or semester_id must be provided
-        values = info.data
-        if not values.get('read_id') and not values.get('semester_id'):
+    @model_validator(mode='after')
+    def validate_target(self):
+        # Exactly one of read_id or semester_id must be provided
+        if not self.read_id and not self.semester_id:
             raise ValueError('Either read_id or semester_id must be provided')
-        if values.get('read_id') and values.get('semester_id'):
+        if self.read_id and self.semester_id:
             raise ValueError('Cannot specify both read_id and semester_id')
-        return v
+        return self
 
 
 class CommentReactionCreate(BaseModel):
@@ -68,7 +66,7 @@ class CommentResponse(BaseModel):
     deleted_at: Optional[datetime] = None
     user: UserBasic
     replies: List['CommentResponse'] = []
-    reactions: Dict[str, Dict] = Field(default_factory=dict)  # {reaction_type: {count: int, users: List[int]}}
+    reactions: Dict[str, Dict] = Field(default_factory=dict)  # {reaction_type: {count: int}}; users via GET /comments/{id}/reactions
     current_user_reactions: List[str] = Field(default_factory=list)  # Reaction types current user has
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -90,6 +88,19 @@ class CommentListResponse(BaseModel):
     total_pages: int
 
 
+class CommentSearchResult(CommentResponse):
+    """Comment search hit with a highlighted snippet"""
+    snippet: str  # HTML-escaped, matches wrapped in <mark>
+    rank: float  # Higher is more relevant
+
+
+class CommentSearchResponse(BaseModel):
+    """Cursor-paginated comment search results"""
+    items: List[CommentSearchResult]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+
 class ReactionUsersResponse(BaseModel):
     """Paginated list of users who reacted"""
     items: List[CommentReactionResponse]
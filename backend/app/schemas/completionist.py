@@ -145,6 +145,7 @@ class AchievementListResponse(BaseModel):
 
 class LeaderboardEntry(BaseModel):
     """Leaderboard entry"""
+    rank: int
     user_id: int
     username: str
     display_name: Optional[str] = None
@@ -158,6 +159,19 @@ class LeaderboardResponse(BaseModel):
     entries: List[LeaderboardEntry]
     user_rank: Optional[int] = None
     total_users: int
+    page: int = 1
+    page_size: int = 100
+
+
+class ResyncResponse(BaseModel):
+    """Result of a bulk completionist resync"""
+    pairs_scanned: int
+    canons_created: int
+    progress_inserted: int
+    progress_updated: int
+    achievements_awarded: int
+    leaderboard_updated: int
+    elapsed_seconds: float
 
 
 class CommunityAuthorStats(BaseModel):
@@ -83,6 +83,7 @@ class ReadResponse(ReadBase):
     comment_count: Optional[int] = 0  # Number of comments on this read
     created_at: datetime
     updated_at: Optional[datetime] = None
+    read_vibe_photo_srcset: Optional[str] = None  # Set by the API (image_derivatives.add_srcsets)
     
     class Config:
         from_attributes = True
@@ -0,0 +1,247 @@
+"""
+Offline bibliography ingestion from Open Library dump files.
+
+Open Library publishes tab-separated dumps (https://openlibrary.org/developers/dumps)
+with one record per line:
+
+    type \t key \t revision \t last_modified \t json
+
+The authors dump is streamed first to map Open Library author keys onto the
+authors we already know (by normalized name or alternate name). A local
+author whose name matches several Open Library authors is left unmapped, as
+namesakes cannot be told apart by name alone. The works
+dump is then streamed and every work by a mapped author is loaded into
+author_works for that author's canon, deduplicated by Open Library key and
+normalized title. Re-running against a newer dump only inserts new works and
+updates changed ones, so reloads are incremental.
+"""
+import gzip
+import json
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+
+from app.core.matching import normalize_title
+from app.models.author import Author
+from app.models.author_canon import AuthorCanon, AuthorWork
+from app.services.author_service import normalize_author_name
+
+logger = logging.getLogger(__name__)
+
+BIBLIOGRAPHY_SOURCE = "openlibrary"
+
+_AUTHOR_KEY_RE = re.compile(r'"(/authors/OL\d+A)"')
+_YEAR_RE = re.compile(r'\b(\d{4})\b')
+
+
+def iter_dump_records(path: str, record_type: str) -> Iterator[Tuple[str, str]]:
+    """Stream (key, raw json) for one record type from a (optionally gzipped) dump"""
+    opener = gzip.open if path.endswith(".gz") else open
+    type_prefix = f"{record_type}\t"
+    with opener(path, "rt", encoding="utf-8") as dump:
+        for line in dump:
+            if not line.startswith(type_prefix):
+                continue
+            parts = line.rstrip("\n").split("\t", 4)
+            if len(parts) != 5:
+                continue
+            yield parts[1], parts[4]
+
+
+def _parse_year(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    match = _YEAR_RE.search(str(value))
+    return int(match.group(1)) if match else None
+
+
+class BibliographyIngestor:
+    """Loads Open Library author/work dumps into author_canons and author_works"""
+
+    def __init__(self, db: Session, batch_size: int = 1000):
+        self.db = db
+        self.batch_size = batch_size
+
+    def ingest(self, authors_path: str, works_path: Optional[str] = None) -> Dict:
+        """
+        Ingest bibliographies for known authors. works_path defaults to
+        authors_path (the combined "all types" dump). Does not commit.
+        """
+        started = time.perf_counter()
+        author_map, ambiguous = self._map_authors(authors_path)
+        canons = self._ensure_canons(set(author_map.values()))
+        inserted, updated, duplicates = self._load_works(works_path or authors_path, author_map, canons)
+        self._update_canon_totals(canons)
+
+        result = {
+            'authors_matched': len(set(author_map.values())),
+            'authors_ambiguous': ambiguous,
+            'works_inserted': inserted,
+            'works_updated': updated,
+            'duplicates_skipped': duplicates,
+            'elapsed_seconds': round(time.perf_counter() - started, 3),
+        }
+        logger.info(f"Bibliography ingestion: {result}")
+        return result
+
+    def _map_authors(self, path: str) -> Tuple[Dict[str, int], int]:
+        """
+        Open Library author key -> local author id, for authors we already have,
+        and the number of local authors skipped because several keys match them
+        """
+        local = {normalized: author_id for author_id, normalized in self.db.query(Author.id, Author.normalized_name)}
+        if not local:
+            return {}, 0
+
+        candidates: Dict[int, Dict[str, dict]] = {}
+        for key, raw in iter_dump_records(path, "/type/author"):
+            record = json.loads(raw)
+            names = [record.get("name")] + list(record.get("alternate_names") or [])
+            for name in names:
+                author_id = local.get(normalize_author_name(name or ""))
+                if author_id is not None:
+                    candidates.setdefault(author_id, {})[key] = record
+                    break
+
+        author_map = {}
+        ambiguous = 0
+        for author_id, records in candidates.items():
+            if len(records) > 1:
+                # Merging namesakes would pool their works into one canon
+                logger.info(f"Skipping author {author_id}: {len(records)} Open Library authors share the name")
+                ambiguous += 1
+                continue
+            key, record = next(iter(records.items()))
+            author_map[key] = author_id
+            self._fill_author_years(author_id, record)
+
+        return author_map, ambiguous
+
+    def _fill_author_years(self, author_id: int, record: dict) -> None:
+        """Fill in birth/death years we don't have yet; known years are never overwritten"""
+        author = self.db.get(Author, author_id)
+        if author.birth_year is None:
+            author.birth_year = _parse_year(record.get("birth_date"))
+        if author.death_year is None:
+            author.death_year = _parse_year(record.get("death_date"))
+
+    def _ensure_canons(self, author_ids: Set[int]) -> Dict[int, int]:
+        """Local author id -> canon id, creating canons as needed"""
+        if not author_ids:
+            return {}
+        canons = {}
+        for canon_id, author_id in self.db.query(AuthorCanon.id, AuthorCanon.author_id).filter(
+            AuthorCanon.author_id.in_(author_ids)
+        ).order_by(AuthorCanon.id.desc()):
+            canons[author_id] = canon_id  # Lowest id wins, as in ensure_author_canon
+
+        for author_id in author_ids - set(canons):
+            canon = AuthorCanon(author_id=author_id, total_works_count=0, bibliography_source=BIBLIOGRAPHY_SOURCE)
+            self.db.add(canon)
+            self.db.flush()
+            canons[author_id] = canon.id
+        return canons
+
+    def _load_works(self, path: str, author_map: Dict[str, int], canons: Dict[int, int]) -> Tuple[int, int, int]:
+        if not author_map:
+            return 0, 0, 0
+
+        # Existing works, so reloads only touch what changed
+        by_key: Dict[str, Tuple[int, str, Optional[int]]] = {}
+        titles: Dict[int, Set[str]] = {canon_id: set() for canon_id in canons.values()}
+        for work_id, canon_id, source_key, title, year in self.db.query(
+            AuthorWork.id, AuthorWork.author_canon_id, AuthorWork.source_key,
+            AuthorWork.title, AuthorWork.publication_year
+        ).filter(AuthorWork.author_canon_id.in_(list(titles))):
+            titles[canon_id].add(normalize_title(title))
+            if source_key:
+                by_key[source_key] = (work_id, title, year)
+
+        inserts, updates = [], []
+        inserted = updated = duplicates = 0
+        for key, raw in iter_dump_records(path, "/type/work"):
+            # Cheap pre-filter: only parse works that name a mapped author
+            canon_ids = {
+                canons[author_map[author_key]]
+                for author_key in _AUTHOR_KEY_RE.findall(raw)
+                if author_key in author_map
+            }
+            if not canon_ids:
+                continue
+
+            record = json.loads(raw)
+            title = (record.get("title") or "").strip()
+            if not title:
+                continue
+            title = title[:500]
+            year = _parse_year(record.get("first_publish_date"))
+
+            for canon_id in canon_ids:
+                source_key = key if len(canon_ids) == 1 else f"{key}#{canon_id}"
+                existing = by_key.get(source_key)
+                if existing:
+                    work_id, old_title, old_year = existing
+                    if work_id is not None and (old_title, old_year) != (title, year):
+                        updates.append({'id': work_id, 'title': title, 'publication_year': year})
+                        by_key[source_key] = (work_id, title, year)
+                    continue
+
+                normalized = normalize_title(title)
+                if normalized in titles[canon_id]:
+                    duplicates += 1
+                    continue
+                titles[canon_id].add(normalized)
+                by_key[source_key] = (None, title, year)
+                inserts.append({
+                    'author_canon_id': canon_id,
+                    'title': title,
+                    'publication_year': year,
+                    'source_key': source_key,
+                    'is_major_work': True,
+                })
+
+            if len(inserts) >= self.batch_size:
+                inserted += self._flush_inserts(inserts)
+            if len(updates) >= self.batch_size:
+                updated += self._flush_updates(updates)
+
+        inserted += self._flush_inserts(inserts)
+        updated += self._flush_updates(updates)
+        return inserted, updated, duplicates
+
+    def _flush_inserts(self, rows: list) -> int:
+        count = len(rows)
+        if rows:
+            self.db.execute(insert(AuthorWork), rows)
+            rows.clear()
+        return count
+
+    def _flush_updates(self, rows: list) -> int:
+        count = len(rows)
+        if rows:
+            self.db.execute(update(AuthorWork), rows)
+            rows.clear()
+        return count
+
+    def _update_canon_totals(self, canons: Dict[int, int]) -> None:
+        """Canon totals come from the loaded works instead of the title estimate"""
+        if not canons:
+            return
+        totals = dict(
+            self.db.query(AuthorWork.author_canon_id, func.count(AuthorWork.id))
+            .filter(AuthorWork.author_canon_id.in_(list(canons.values())), AuthorWork.is_major_work == True)
+            .group_by(AuthorWork.author_canon_id)
+        )
+        now = datetime.now(timezone.utc)
+        for author_id, canon_id in canons.items():
+            canon = self.db.get(AuthorCanon, canon_id)
+            canon.total_works_count = totals.get(canon_id, 0)
+            canon.bibliography_source = BIBLIOGRAPHY_SOURCE
+            canon.bibliography_last_updated = now
+            canon.is_living = self.db.get(Author, author_id).death_year is None
+        self.db.flush()
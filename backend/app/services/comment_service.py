@@ -1,54 +1,104 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, aliased, selectinload
+from sqlalchemy import func, or_, and_, case, cast, literal_column, select, table, column, Float, JSON
+from sqlalchemy.dialects.postgresql import JSONB, array
 from typing import List, Dict, Optional
 from datetime import datetime, timezone
+import base64
+import html
+import json
+import re
 
 from app.models.comment import Comment, CommentReaction
 from app.models.read import Read
 from app.models.semester import Semester
 from app.models.user import User
+from app.services.event_broker import (
+    broker,
+    read_channel,
+    semester_channel,
+    COMMENT_CREATED,
+    COMMENT_DELETED,
+    REACTION_CHANGED
+)
 
 
-def get_comments_for_read(
-    db: Session,
+def _adjust_read_comment_count(db: Session, read_id: int, delta: int) -> None:
+    """Atomically adjust reads.comment_count (applied with the caller's commit)"""
+    db.query(Read).filter(Read.id == read_id).update(
+        {Read.comment_count: Read.comment_count + delta},
+        synchronize_session=False
+    )
+
+
+def _adjust_reaction_count(db: Session, comment_id: int, reaction_type: str, delta: int) -> Dict[str, int]:
+    """
+    Atomically adjust one key of comments.reaction_counts in SQL (applied with
+    the caller's commit) and return the updated counter. Keys that drop to
+    zero are removed.
+    """
+    count = func.coalesce(Comment.reaction_counts[reaction_type].as_integer(), 0) + delta
+    if db.get_bind().dialect.name == 'postgresql':
+        counts = cast(Comment.reaction_counts, JSONB)
+        adjusted = cast(case(
+            (count > 0, func.jsonb_set(counts, array([reaction_type]), func.to_jsonb(count))),
+            else_=counts.op('-')(reaction_type)
+        ), JSON)
+    else:
+        path = f'$."{reaction_type}"'
+        adjusted = case(
+            (count > 0, func.json_set(Comment.reaction_counts, path, count)),
+            else_=func.json_remove(Comment.reaction_counts, path)
+        )
+    db.query(Comment).filter(Comment.id == comment_id).update(
+        {Comment.reaction_counts: adjusted},
+        synchronize_session=False
+    )
+    return db.query(Comment.reaction_counts).filter(Comment.id == comment_id).scalar() or {}
+
+
+def _publish_comment_event(comment: Comment, event_type: str, data: Dict) -> None:
+    """Publish a live event on the comment's read or semester channel"""
+    if comment.read_id:
+        broker.publish(read_channel(comment.read_id), event_type, data)
+    elif comment.semester_id:
+        broker.publish(semester_channel(comment.semester_id), event_type, data)
+
+
+def _read_comments_filter(read_id: int):
+    return and_(
+        Comment.read_id == read_id,
+        Comment.parent_comment_id.is_(None),
+        Comment.is_deleted == False
+    )
+
+
+async def get_comments_for_read_async(
+    db: AsyncSession,
     read_id: int,
-    current_user_id: Optional[int] = None,
     page: int = 1,
     page_size: int = 20
 ) -> tuple[List[Comment], int]:
     """
     Get paginated top-level comments for a read with their replies.
-    Returns (comments, total_count)
+    Replies are loaded as-is; format_comment_response skips deleted ones
+    and sorts them. Returns (comments, total_count)
     """
-    # Get total count of top-level comments
-    total = db.query(Comment).filter(
-        Comment.read_id == read_id,
-        Comment.parent_comment_id.is_(None),
-        Comment.is_deleted == False
-    ).count()
+    total = (await db.execute(
+        select(func.count()).select_from(Comment).where(_read_comments_filter(read_id))
+    )).scalar()
     
-    # Get top-level comments with eager loading
     offset = (page - 1) * page_size
-    top_level_comments = db.query(Comment).options(
-        joinedload(Comment.user),
-        joinedload(Comment.replies).joinedload(Comment.user),
-        joinedload(Comment.reactions).joinedload(CommentReaction.user)
-    ).filter(
-        Comment.read_id == read_id,
-        Comment.parent_comment_id.is_(None),
-        Comment.is_deleted == False
-    ).order_by(Comment.created_at.asc()).offset(offset).limit(page_size).all()
-    
-    # Load replies for each top-level comment (max 1 level deep)
-    for comment in top_level_comments:
-        comment.replies = [
-            reply for reply in comment.replies 
-            if not reply.is_deleted
-        ]
-        # Sort replies chronologically
-        comment.replies.sort(key=lambda r: r.created_at)
+    top_level_comments = (await db.execute(
+        select(Comment).options(
+            selectinload(Comment.user),
+            selectinload(Comment.replies).selectinload(Comment.user)
+        ).where(
+            _read_comments_filter(read_id)
+        ).order_by(Comment.created_at.asc()).offset(offset).limit(page_size)
+    )).scalars().all()
     
-    return top_level_comments, total
+    return list(top_level_comments), total
 
 
 def get_comments_for_semester(
@@ -73,8 +123,7 @@ def get_comments_for_semester(
     offset = (page - 1) * page_size
     top_level_comments = db.query(Comment).options(
         joinedload(Comment.user),
-        joinedload(Comment.replies).joinedload(Comment.user),
-        joinedload(Comment.reactions).joinedload(CommentReaction.user)
+        joinedload(Comment.replies).joinedload(Comment.user)
     ).filter(
         Comment.semester_id == semester_id,
         Comment.parent_comment_id.is_(None),
@@ -153,6 +202,9 @@ def create_comment(
         content=content
     )
     db.add(comment)
+    if read_id:
+        # Keep the read's comment counter in the same transaction
+        _adjust_read_comment_count(db, read_id, 1)
     db.commit()
     db.refresh(comment)
     
@@ -162,6 +214,12 @@ def create_comment(
     else:
         db.refresh(comment, ['user', 'semester'])
     
+    _publish_comment_event(
+        comment,
+        COMMENT_CREATED,
+        format_comment_response(db, comment, user_reactions={})
+    )
+    
     return comment
 
 
@@ -183,11 +241,21 @@ def delete_comment(
     if comment.user_id != user_id and target_author_id != user_id:
         raise PermissionError("Not authorized to delete this comment")
     
+    if comment.is_deleted:
+        return True
+    
     # Soft delete
     comment.is_deleted = True
     comment.deleted_at = datetime.now(timezone.utc)
+    if comment.read_id:
+        _adjust_read_comment_count(db, comment.read_id, -1)
     db.commit()
     
+    _publish_comment_event(comment, COMMENT_DELETED, {
+        'id': comment.id,
+        'parent_comment_id': comment.parent_comment_id
+    })
+    
     return True
 
 
@@ -196,28 +264,33 @@ def toggle_reaction(
     comment_id: int,
     user_id: int,
     reaction_type: str
-) -> Dict[str, int]:
+) -> tuple[Dict[str, Dict], List[str]]:
     """
     Toggle a reaction on a comment. Returns updated reaction counts.
+    The comment's reaction_counts counter is incremented in SQL in the same
+    transaction as the reaction insert/delete, so concurrent toggles don't lose
+    updates and no re-scan of comment_reactions is needed.
     """
-    # Validate comment exists and is not deleted
+    # Validate comment exists and is not deleted (row lock on databases that support it)
     comment = db.query(Comment).filter(
         Comment.id == comment_id,
         Comment.is_deleted == False
-    ).first()
+    ).with_for_update().first()
     if not comment:
         raise ValueError("Comment not found or deleted")
     
-    # Check if reaction exists
-    existing = db.query(CommentReaction).filter(
+    # Current user's reactions on this comment (indexed, at most 7 rows)
+    user_reactions = db.query(CommentReaction).filter(
         CommentReaction.comment_id == comment_id,
-        CommentReaction.user_id == user_id,
-        CommentReaction.reaction_type == reaction_type
-    ).first()
+        CommentReaction.user_id == user_id
+    ).all()
+    existing = next((r for r in user_reactions if r.reaction_type == reaction_type), None)
+    current_user_reactions = [r.reaction_type for r in user_reactions if r is not existing]
     
     if existing:
         # Remove reaction
         db.delete(existing)
+        counts = _adjust_reaction_count(db, comment_id, reaction_type, -1)
     else:
         # Add reaction
         reaction = CommentReaction(
@@ -226,65 +299,171 @@ def toggle_reaction(
             reaction_type=reaction_type
         )
         db.add(reaction)
-    
+        counts = _adjust_reaction_count(db, comment_id, reaction_type, 1)
+        current_user_reactions.append(reaction_type)
     db.commit()
     
-    # Get updated counts
-    return aggregate_reactions(db, comment_id, user_id)
+    reactions = format_reaction_counts(counts)
+    _publish_comment_event(comment, REACTION_CHANGED, {
+        'comment_id': comment_id,
+        'reactions': reactions
+    })
+    
+    return reactions, current_user_reactions
+
+
+def format_reaction_counts(reaction_counts: Optional[Dict[str, int]]) -> Dict[str, Dict]:
+    """
+    Convert a comment's reaction_counts counter into the API shape.
+    Returns: {
+        'heart': {'count': 5},
+        'thumbs_up': {'count': 3},
+        ...
+    }
+    """
+    return {
+        reaction_type: {'count': count}
+        for reaction_type, count in (reaction_counts or {}).items()
+        if count > 0
+    }
+
+
+def _user_reactions_select(comment_ids: List[int], user_id: int):
+    return select(CommentReaction.comment_id, CommentReaction.reaction_type).where(
+        CommentReaction.user_id == user_id,
+        CommentReaction.comment_id.in_(comment_ids)
+    )
+
+
+def _group_user_reactions(rows) -> Dict[int, List[str]]:
+    result: Dict[int, List[str]] = {}
+    for comment_id, reaction_type in rows:
+        result.setdefault(comment_id, []).append(reaction_type)
+    return result
+
+
+def get_user_reactions(
+    db: Session,
+    comment_ids: List[int],
+    user_id: Optional[int]
+) -> Dict[int, List[str]]:
+    """
+    Get the reaction types a user has left on each of the given comments
+    in a single query. Returns {comment_id: [reaction_type, ...]}.
+    """
+    if not user_id or not comment_ids:
+        return {}
+    return _group_user_reactions(db.execute(_user_reactions_select(comment_ids, user_id)))
+
+
+async def get_user_reactions_async(
+    db: AsyncSession,
+    comment_ids: List[int],
+    user_id: Optional[int]
+) -> Dict[int, List[str]]:
+    """get_user_reactions on an AsyncSession"""
+    if not user_id or not comment_ids:
+        return {}
+    return _group_user_reactions(await db.execute(_user_reactions_select(comment_ids, user_id)))
 
 
 def aggregate_reactions(
     db: Session,
     comment_id: int,
     current_user_id: Optional[int] = None
-) -> Dict[str, Dict]:
+) -> tuple[Dict[str, Dict], List[str]]:
     """
-    Aggregate reactions for a comment.
-    Returns: {
-        'heart': {'count': 5, 'users': [1, 2, 3]},
-        'thumbs_up': {'count': 3, 'users': [4, 5]},
-        ...
-    }
-    Also returns current_user_reactions list.
+    Aggregate reactions for a comment from its reaction_counts counter.
+    Returns (reactions, current_user_reactions).
     """
-    reactions = db.query(CommentReaction).filter(
-        CommentReaction.comment_id == comment_id
-    ).all()
+    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    if not comment:
+        return {}, []
+    user_reactions = get_user_reactions(db, [comment_id], current_user_id)
+    return format_reaction_counts(comment.reaction_counts), user_reactions.get(comment_id, [])
+
+
+def reconcile_reaction_counts(
+    db: Session,
+    comment_ids: Optional[List[int]] = None
+) -> int:
+    """
+    Repair drift between comments.reaction_counts and the comment_reactions rows
+    (e.g. reactions removed by user deletion cascades). Recounts with one grouped
+    query and only writes comments whose counter differs.
+    Returns the number of comments repaired.
+    """
+    counts_query = db.query(
+        CommentReaction.comment_id,
+        CommentReaction.reaction_type,
+        func.count(CommentReaction.id)
+    ).group_by(CommentReaction.comment_id, CommentReaction.reaction_type)
+    comments_query = db.query(Comment.id, Comment.reaction_counts)
+    if comment_ids is not None:
+        counts_query = counts_query.filter(CommentReaction.comment_id.in_(comment_ids))
+        comments_query = comments_query.filter(Comment.id.in_(comment_ids))
     
-    # Group by reaction type
-    aggregated = {}
-    current_user_reactions = []
-    
-    for reaction in reactions:
-        if reaction.reaction_type not in aggregated:
-            aggregated[reaction.reaction_type] = {
-                'count': 0,
-                'users': []
-            }
-        aggregated[reaction.reaction_type]['count'] += 1
-        aggregated[reaction.reaction_type]['users'].append(reaction.user_id)
-        
-        if current_user_id and reaction.user_id == current_user_id:
-            current_user_reactions.append(reaction.reaction_type)
+    actual: Dict[int, Dict[str, int]] = {}
+    for comment_id, reaction_type, count in counts_query.all():
+        actual.setdefault(comment_id, {})[reaction_type] = count
+    
+    repaired = 0
+    for comment_id, stored in comments_query.all():
+        expected = actual.get(comment_id, {})
+        if (stored or {}) != expected:
+            db.query(Comment).filter(Comment.id == comment_id).update(
+                {Comment.reaction_counts: expected},
+                synchronize_session=False
+            )
+            repaired += 1
+    
+    db.commit()
+    return repaired
+
+
+def reconcile_read_comment_counts(db: Session) -> int:
+    """
+    Recompute reads.comment_count from non-deleted comments, repairing drift
+    (e.g. comments removed by user deletion cascades).
+    Returns the number of reads repaired.
+    """
+    actual = dict(
+        db.query(Comment.read_id, func.count(Comment.id)).filter(
+            Comment.read_id.isnot(None),
+            Comment.is_deleted == False
+        ).group_by(Comment.read_id).all()
+    )
     
-    return aggregated, current_user_reactions
+    repaired = 0
+    for read_id, stored in db.query(Read.id, Read.comment_count).all():
+        expected = actual.get(read_id, 0)
+        if stored != expected:
+            db.query(Read).filter(Read.id == read_id).update(
+                {Read.comment_count: expected},
+                synchronize_session=False
+            )
+            repaired += 1
+    
+    db.commit()
+    return repaired
 
 
 def format_comment_response(
     db: Session,
     comment: Comment,
-    current_user_id: Optional[int] = None
+    current_user_id: Optional[int] = None,
+    user_reactions: Optional[Dict[int, List[str]]] = None,
+    include_replies: bool = True
 ) -> Dict:
     """
     Format a comment (and its replies) for API response.
-    Includes aggregated reactions.
+    Includes reaction counts read from the denormalized counter.
+    Pass user_reactions (from get_user_reactions) to avoid a per-comment query.
     """
-    # Aggregate reactions
-    reactions_dict, current_user_reactions = aggregate_reactions(
-        db,
-        comment.id,
-        current_user_id
-    )
+    if user_reactions is None:
+        replies = (comment.replies or []) if include_replies else []
+        comment_ids = [comment.id] + [reply.id for reply in replies]
+        user_reactions = get_user_reactions(db, comment_ids, current_user_id)
     
     # Format user
     user_data = {
@@ -306,19 +485,218 @@ def format_comment_response(
         'deleted_at': comment.deleted_at.isoformat() if comment.deleted_at else None,
         'user': user_data,
         'replies': [],
-        'reactions': reactions_dict,
-        'current_user_reactions': current_user_reactions,
+        'reactions': format_reaction_counts(comment.reaction_counts),
+        'current_user_reactions': user_reactions.get(comment.id, []),
         'created_at': comment.created_at,
         'updated_at': comment.updated_at
     }
     
     # Format replies (max 1 level)
-    if comment.replies:
+    if include_replies and comment.replies:
         result['replies'] = [
-            format_comment_response(db, reply, current_user_id)
+            format_comment_response(db, reply, current_user_id, user_reactions, include_replies=False)
             for reply in sorted(comment.replies, key=lambda r: r.created_at)
             if not reply.is_deleted
         ]
     
     return result
 
+
+def _page_comment_ids(comments: List[Comment]) -> List[int]:
+    comment_ids = []
+    for comment in comments:
+        comment_ids.append(comment.id)
+        comment_ids.extend(reply.id for reply in comment.replies or [])
+    return comment_ids
+
+
+def format_comments(
+    db: Session,
+    comments: List[Comment],
+    current_user_id: Optional[int] = None
+) -> List[Dict]:
+    """
+    Format a page of comments (and their replies) for API response,
+    loading the current user's reactions for the whole page in one query.
+    """
+    user_reactions = get_user_reactions(db, _page_comment_ids(comments), current_user_id)
+    
+    return [
+        format_comment_response(db, comment, current_user_id, user_reactions)
+        for comment in comments
+    ]
+
+
+async def format_comments_async(
+    db: AsyncSession,
+    comments: List[Comment],
+    current_user_id: Optional[int] = None
+) -> List[Dict]:
+    """format_comments on an AsyncSession (comments need user and replies eager-loaded)"""
+    user_reactions = await get_user_reactions_async(db, _page_comment_ids(comments), current_user_id)
+    
+    # With user_reactions given, formatting runs no queries
+    return [
+        format_comment_response(db.sync_session, comment, current_user_id, user_reactions)
+        for comment in comments
+    ]
+
+
+# Full-text search
+# Highlight markers are control characters so the snippet can be HTML-escaped
+# before they are swapped for <mark> tags.
+_HIGHLIGHT_START = "\x02"
+_HIGHLIGHT_END = "\x03"
+_comments_fts = table("comments_fts", column("rowid"))
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a search cursor cannot be decoded"""
+
+
+def encode_search_cursor(score: float, comment_id: int) -> str:
+    """Encode a (score, id) keyset position as an opaque cursor"""
+    raw = json.dumps([score, comment_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, int]:
+    """Decode a cursor produced by encode_search_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, comment_id = json.loads(raw)
+        return float(score), int(comment_id)
+    except (ValueError, TypeError):
+        raise InvalidCursorError("Invalid cursor")
+
+
+def _fts5_query(q: str) -> str:
+    """Turn free text into an FTS5 query: every term quoted, last term prefix-matched"""
+    terms = re.findall(r"\w+", q)
+    if not terms:
+        return ""
+    quoted = ['"' + term.replace('"', '""') + '"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _format_snippet(snippet: Optional[str]) -> str:
+    """HTML-escape a highlighted snippet and wrap matches in <mark> tags"""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(_HIGHLIGHT_START, "<mark>").replace(_HIGHLIGHT_END, "</mark>")
+
+
+def search_comments(
+    db: Session,
+    q: str,
+    current_user_id: Optional[int] = None,
+    read_id: Optional[int] = None,
+    semester_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20
+) -> tuple[List[Dict], Optional[str]]:
+    """
+    Ranked full-text search over comment content.
+    Uses the comments_fts FTS5 table on SQLite and the GIN tsvector index on
+    PostgreSQL. Only visible comments are searched: not deleted, not a reply to
+    a deleted comment, and written by an active user.
+    Returns (formatted results with 'snippet' and 'rank', next_cursor).
+    """
+    dialect = db.get_bind().dialect.name
+    
+    # Score is "lower is better" on every backend so the keyset is (score, id) ascending
+    if dialect == "sqlite":
+        fts_query = _fts5_query(q)
+        if not fts_query:
+            return [], None
+        score = func.bm25(literal_column("comments_fts"))
+        snippet = func.snippet(
+            literal_column("comments_fts"), 0, _HIGHLIGHT_START, _HIGHLIGHT_END, "…", 16
+        )
+        hits = db.query(
+            Comment.id.label("id"),
+            score.label("score"),
+            snippet.label("snippet")
+        ).join(
+            _comments_fts, _comments_fts.c.rowid == Comment.id
+        ).filter(
+            literal_column("comments_fts").op("MATCH")(fts_query)
+        )
+    elif dialect == "postgresql":
+        ts_query = func.websearch_to_tsquery(literal_column("'english'::regconfig"), q)
+        vector = func.to_tsvector(literal_column("'english'::regconfig"), Comment.content)
+        score = (-func.ts_rank(vector, ts_query)).cast(Float)
+        snippet = func.ts_headline(
+            literal_column("'english'::regconfig"),
+            Comment.content,
+            ts_query,
+            f"StartSel={_HIGHLIGHT_START}, StopSel={_HIGHLIGHT_END}, MaxWords=24, MinWords=8"
+        )
+        hits = db.query(
+            Comment.id.label("id"),
+            score.label("score"),
+            snippet.label("snippet")
+        ).filter(vector.op("@@")(ts_query))
+    else:
+        # No full-text support: unranked substring match
+        hits = db.query(
+            Comment.id.label("id"),
+            literal_column("0.0", Float).label("score"),
+            func.substr(Comment.content, 1, 200).label("snippet")
+        ).filter(Comment.content.ilike(f"%{q}%"))
+    
+    # Visibility scope
+    parent = aliased(Comment)
+    hits = hits.join(User, User.id == Comment.user_id).outerjoin(
+        parent, parent.id == Comment.parent_comment_id
+    ).filter(
+        Comment.is_deleted == False,
+        User.is_active == True,
+        or_(parent.id.is_(None), parent.is_deleted == False)
+    )
+    if read_id:
+        hits = hits.filter(Comment.read_id == read_id)
+    if semester_id:
+        hits = hits.filter(Comment.semester_id == semester_id)
+    if user_id:
+        hits = hits.filter(Comment.user_id == user_id)
+    
+    # Keyset pagination over (score, id)
+    ranked = hits.subquery()
+    page_query = db.query(ranked.c.id, ranked.c.score, ranked.c.snippet)
+    if cursor:
+        after_score, after_id = decode_search_cursor(cursor)
+        page_query = page_query.filter(or_(
+            ranked.c.score > after_score,
+            and_(ranked.c.score == after_score, ranked.c.id > after_id)
+        ))
+    rows = page_query.order_by(ranked.c.score.asc(), ranked.c.id.asc()).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(rows[-1].score, rows[-1].id)
+    if not rows:
+        return [], None
+    
+    # Batch-load the hit comments and the caller's reactions
+    comment_ids = [row.id for row in rows]
+    comments = {
+        comment.id: comment
+        for comment in db.query(Comment).options(
+            joinedload(Comment.user)
+        ).filter(Comment.id.in_(comment_ids)).all()
+    }
+    user_reactions = get_user_reactions(db, comment_ids, current_user_id)
+    
+    results = []
+    for row in rows:
+        formatted = format_comment_response(
+            db, comments[row.id], current_user_id, user_reactions, include_replies=False
+        )
+        formatted['snippet'] = _format_snippet(row.snippet)
+        formatted['rank'] = -row.score  # higher is more relevant
+        results.append(formatted)
+    
+    return results, next_cursor
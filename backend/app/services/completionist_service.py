@@ -2,17 +2,59 @@
 Completionist service for tracking author completion progress
 """
 from datetime import date, datetime
-from typing import List, Dict, Optional, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, case, desc, asc
+from typing import Iterable, List, Dict, Optional, Tuple, Set
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy import func, and_, or_, case, desc, asc, exists, insert, literal, select, union_all, update
 from collections import defaultdict
+import logging
+import threading
+import time
 
+from app.config import settings
+
+from app.core.matching import WorkBookMatcher
 from app.models.author import Author
-from app.models.author_canon import AuthorCanon, AuthorWork, UserAuthorProgress, CompletionAchievement
+from app.models.author_canon import (
+    AuthorCanon,
+    AuthorWork,
+    UserAuthorProgress,
+    CompletionAchievement,
+    CompletionistLeaderboardEntry,
+)
 from app.models.book import Book
 from app.models.read import Read
 from app.models.user import User
 from app.services.author_service import find_or_create_author, normalize_author_name
+from app.services.domain_events import DomainEvent, READ_CHANGED, BOOK_CHANGED, subscribe
+
+logger = logging.getLogger(__name__)
+
+# (achievement type, progress field, minimum value)
+ACHIEVEMENT_THRESHOLDS = [
+    ('canon_complete', 'completion_percentage', 100),  # Canon Complete (100%)
+    ('nearly_there', 'completion_percentage', 90),  # Nearly There (90%+)
+    ('deep_dive', 'books_read_count', 10),  # Deep Dive (10+ books)
+]
+
+# Progress fields recomputed by a resync
+_PROGRESS_FIELDS = (
+    'books_read_count',
+    'books_total_count',
+    'completion_percentage',
+    'first_book_read_id',
+    'first_read_date',
+    'most_recent_book_read_id',
+    'most_recent_read_date',
+)
+
+
+def _as_datetime(value: Optional[date]) -> Optional[datetime]:
+    """Read dates are stored on progress rows as (naive) midnight datetimes"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    return datetime.combine(value, datetime.min.time())
 
 
 class CompletionistService:
@@ -73,9 +115,9 @@ class CompletionistService:
         books_total = canon.total_works_count
         if books_total == 0:
             # Estimate: use number of unique books by this author in the system
-            books_total = self.db.query(Book).filter(
+            books_total = self.db.query(func.count(func.distinct(Book.title))).filter(
                 Book.author_id == author_id
-            ).distinct(Book.title).count()
+            ).scalar()
             if books_total == 0:
                 books_total = len(user_books)  # Fallback to user's books
         
@@ -122,31 +164,34 @@ class CompletionistService:
         
         return progress
     
+    def release_book(self, book_id: int) -> None:
+        """
+        Clear progress references to a book that is about to be deleted.
+        The BOOK_CHANGED resync re-points them at the remaining reads.
+        """
+        for column in (UserAuthorProgress.first_book_read_id, UserAuthorProgress.most_recent_book_read_id):
+            self.db.query(UserAuthorProgress).filter(column == book_id).update({column: None})
+    
     def check_achievements(self, user_id: int, author_canon_id: int, progress: UserAuthorProgress):
         """Check and award achievements based on progress"""
-        achievements_to_check = []
-        
-        # Canon Complete (100%)
-        if progress.completion_percentage >= 100:
-            achievements_to_check.append('canon_complete')
-        
-        # Nearly There (90%+)
-        if progress.completion_percentage >= 90:
-            achievements_to_check.append('nearly_there')
-        
-        # Deep Dive (10+ books)
-        if progress.books_read_count >= 10:
-            achievements_to_check.append('deep_dive')
-        
-        # Award achievements if not already awarded
-        for achievement_type in achievements_to_check:
-            existing = self.db.query(CompletionAchievement).filter(
+        achievements_to_check = [
+            achievement_type
+            for achievement_type, field, threshold in ACHIEVEMENT_THRESHOLDS
+            if (getattr(progress, field) or 0) >= threshold
+        ]
+        
+        if not achievements_to_check:
+            return
+        
+        # Award achievements if not already awarded (one lookup for all types)
+        existing_types = set(
+            row[0] for row in self.db.query(CompletionAchievement.achievement_type).filter(
                 CompletionAchievement.user_id == user_id,
-                CompletionAchievement.author_canon_id == author_canon_id,
-                CompletionAchievement.achievement_type == achievement_type
-            ).first()
-            
-            if not existing:
+                CompletionAchievement.author_canon_id == author_canon_id
+            ).all()
+        )
+        for achievement_type in achievements_to_check:
+            if achievement_type not in existing_types:
                 achievement = CompletionAchievement(
                     user_id=user_id,
                     author_canon_id=author_canon_id,
@@ -156,6 +201,302 @@ class CompletionistService:
         
         self.db.flush()
     
+    def bulk_resync(self, batch_size: int = 500) -> Dict:
+        """
+        Rebuild user_author_progress for every (user, author) pair with
+        set-based queries: grouped read counts and window-ranked first/most
+        recent reads, batched inserts/updates of changed rows only, and one
+        anti-join insert for missing achievements. Does not commit.
+        """
+        started = time.perf_counter()
+        
+        # Create missing canons for every author that has books
+        canons_created = self.db.execute(
+            insert(AuthorCanon).from_select(
+                ['author_id', 'total_works_count', 'bibliography_source', 'is_living'],
+                select(
+                    Book.author_id,
+                    literal(0),
+                    literal('manual'),
+                    literal(True)
+                ).where(
+                    Book.author_id.isnot(None),
+                    ~exists().where(AuthorCanon.author_id == Book.author_id)
+                ).distinct()
+            )
+        ).rowcount
+        
+        canons = {}
+        for canon_id, author_id, total_works in self.db.query(
+            AuthorCanon.id, AuthorCanon.author_id, AuthorCanon.total_works_count
+        ).order_by(AuthorCanon.id.desc()):
+            # Lowest id wins, matching ensure_author_canon's .first()
+            canons[author_id] = (canon_id, total_works or 0)
+        
+        # Distinct titles per author: the fallback total when a canon has no works
+        title_totals = dict(
+            self.db.query(Book.author_id, func.count(func.distinct(Book.title)))
+            .filter(Book.author_id.isnot(None))
+            .group_by(Book.author_id)
+        )
+        
+        # Every (user, author) pair the user owns books for, with books read
+        read_join = and_(
+            Read.book_id == Book.id,
+            Read.user_id == Book.user_id,
+            Read.read_status == "READ"
+        )
+        pair_counts = self.db.query(
+            Book.user_id,
+            Book.author_id,
+            func.count(func.distinct(Read.book_id))
+        ).outerjoin(Read, read_join).filter(
+            Book.author_id.isnot(None)
+        ).group_by(Book.user_id, Book.author_id).all()
+        
+        # First and most recent read per pair (undated reads sort last)
+        partition = (Book.user_id, Book.author_id)
+        ranked = select(
+            Book.user_id,
+            Book.author_id,
+            Read.book_id,
+            Read.date_finished,
+            func.row_number().over(
+                partition_by=partition,
+                order_by=(Read.date_finished.is_(None), Read.date_finished.asc(), Read.id.asc())
+            ).label('first_rank'),
+            func.row_number().over(
+                partition_by=partition,
+                order_by=(Read.date_finished.is_(None), Read.date_finished.desc(), Read.id.desc())
+            ).label('recent_rank')
+        ).join(Read, read_join).where(Book.author_id.isnot(None)).subquery()
+        
+        first_reads = {}
+        recent_reads = {}
+        for row in self.db.execute(
+            select(ranked).where(or_(ranked.c.first_rank == 1, ranked.c.recent_rank == 1))
+        ):
+            key = (row.user_id, row.author_id)
+            read_date = _as_datetime(row.date_finished)
+            if row.first_rank == 1:
+                first_reads[key] = (row.book_id, read_date)
+            if row.recent_rank == 1:
+                recent_reads[key] = (row.book_id, read_date)
+        
+        existing = {
+            (p.user_id, p.author_canon_id): p
+            for p in self.db.query(
+                UserAuthorProgress.id,
+                UserAuthorProgress.user_id,
+                UserAuthorProgress.author_canon_id,
+                *[getattr(UserAuthorProgress, f) for f in _PROGRESS_FIELDS]
+            )
+        }
+        
+        inserts = []
+        updates = []
+        for user_id, author_id, books_read in pair_counts:
+            canon_id, total_works = canons[author_id]
+            books_total = total_works or title_totals.get(author_id, 0)
+            first_book_id, first_date = first_reads.get((user_id, author_id), (None, None))
+            recent_book_id, recent_date = recent_reads.get((user_id, author_id), (None, None))
+            values = {
+                'books_read_count': books_read,
+                'books_total_count': books_total,
+                'completion_percentage': int(books_read / books_total * 100) if books_total > 0 else 0,
+                'first_book_read_id': first_book_id,
+                'first_read_date': first_date,
+                'most_recent_book_read_id': recent_book_id,
+                'most_recent_read_date': recent_date,
+            }
+            
+            current = existing.get((user_id, canon_id))
+            if current is None:
+                inserts.append({'user_id': user_id, 'author_canon_id': canon_id, **values})
+                continue
+            
+            # Like sync_user_progress, keep recorded history when no read supplies one
+            for field in _PROGRESS_FIELDS[3:]:
+                if values[field] is None:
+                    values[field] = getattr(current, field)
+            if any(
+                _as_datetime(values[f]) != _as_datetime(getattr(current, f))
+                if f.endswith('_date') else values[f] != getattr(current, f)
+                for f in _PROGRESS_FIELDS
+            ):
+                updates.append({'id': current.id, **values})
+        
+        for i in range(0, len(inserts), batch_size):
+            self.db.execute(insert(UserAuthorProgress), inserts[i:i + batch_size])
+        for i in range(0, len(updates), batch_size):
+            self.db.execute(update(UserAuthorProgress), updates[i:i + batch_size])
+        
+        # Award every missing achievement in one statement
+        candidates = union_all(*[
+            select(
+                UserAuthorProgress.user_id,
+                UserAuthorProgress.author_canon_id,
+                literal(achievement_type).label('achievement_type')
+            ).where(getattr(UserAuthorProgress, field) >= threshold)
+            for achievement_type, field, threshold in ACHIEVEMENT_THRESHOLDS
+        ]).subquery()
+        achievements_awarded = self.db.execute(
+            insert(CompletionAchievement).from_select(
+                ['user_id', 'author_canon_id', 'achievement_type'],
+                select(
+                    candidates.c.user_id,
+                    candidates.c.author_canon_id,
+                    candidates.c.achievement_type
+                ).where(~exists().where(
+                    CompletionAchievement.user_id == candidates.c.user_id,
+                    CompletionAchievement.author_canon_id == candidates.c.author_canon_id,
+                    CompletionAchievement.achievement_type == candidates.c.achievement_type
+                ))
+            )
+        ).rowcount
+        
+        leaderboard_updated = self.refresh_leaderboard()
+        
+        result = {
+            'pairs_scanned': len(pair_counts),
+            'canons_created': canons_created,
+            'progress_inserted': len(inserts),
+            'progress_updated': len(updates),
+            'achievements_awarded': achievements_awarded,
+            'leaderboard_updated': leaderboard_updated,
+            'elapsed_seconds': round(time.perf_counter() - started, 3),
+        }
+        logger.info(f"Completionist bulk resync: {result}")
+        return result
+    
+    def refresh_leaderboard(self, user_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Recompute materialized leaderboard rows from user_author_progress.
+        Pass the users whose progress changed, or None to rebuild every row.
+        Returns the number of rows inserted, updated or deleted. Does not commit.
+        """
+        if user_ids is not None:
+            user_ids = set(user_ids)
+            if not user_ids:
+                return 0
+        
+        aggregates = self.db.query(
+            UserAuthorProgress.user_id,
+            func.sum(case((UserAuthorProgress.completion_percentage >= 100, 1), else_=0)),
+            func.count(UserAuthorProgress.id),
+            func.avg(UserAuthorProgress.completion_percentage)
+        ).group_by(UserAuthorProgress.user_id)
+        existing_rows = self.db.query(CompletionistLeaderboardEntry)
+        if user_ids is not None:
+            aggregates = aggregates.filter(UserAuthorProgress.user_id.in_(user_ids))
+            existing_rows = existing_rows.filter(CompletionistLeaderboardEntry.user_id.in_(user_ids))
+        existing = {entry.user_id: entry for entry in existing_rows}
+        
+        changed = 0
+        touched = []  # New entries and entries whose values changed
+        vacated = []  # Ranks held by those entries (and removed ones) before the refresh
+        for user_id, completed, tracked, avg_completion in aggregates:
+            values = {
+                'authors_completed': int(completed or 0),
+                'total_authors_tracked': int(tracked),
+                'avg_completion': float(avg_completion or 0),
+            }
+            entry = existing.pop(user_id, None)
+            if entry is None:
+                entry = CompletionistLeaderboardEntry(user_id=user_id, **values)
+                self.db.add(entry)
+            elif any(getattr(entry, k) != v for k, v in values.items()):
+                vacated.append(entry.rank)
+                for k, v in values.items():
+                    setattr(entry, k, v)
+            else:
+                continue
+            touched.append(entry)
+            changed += 1
+        
+        # Users left without any tracked author drop off the board
+        for entry in existing.values():
+            vacated.append(entry.rank)
+            self.db.delete(entry)
+            changed += 1
+        
+        self.db.flush()
+        if changed:
+            # A net change in board size shifts every rank below the change
+            resized = len(touched) != len(vacated)
+            self._renumber_leaderboard(touched, vacated, resized, full=user_ids is None)
+        return changed
+    
+    def _leaderboard_position(self, entry: CompletionistLeaderboardEntry) -> int:
+        """1-based position of an entry in leaderboard order, from the current rows"""
+        Entry = CompletionistLeaderboardEntry
+        ahead = self.db.query(func.count()).select_from(Entry).filter(or_(
+            Entry.authors_completed > entry.authors_completed,
+            and_(Entry.authors_completed == entry.authors_completed,
+                 Entry.avg_completion > entry.avg_completion),
+            and_(Entry.authors_completed == entry.authors_completed,
+                 Entry.avg_completion == entry.avg_completion,
+                 Entry.user_id < entry.user_id)
+        )).scalar()
+        return ahead + 1
+    
+    def _renumber_leaderboard(
+        self,
+        touched: List[CompletionistLeaderboardEntry],
+        vacated: List[Optional[int]],
+        resized: bool,
+        full: bool = False
+    ) -> None:
+        """
+        Store 1-based positions for the rank interval a refresh disturbed.
+        Only rows between the lowest and highest old/new rank of the touched
+        entries can move (down to the end of the board if its size changed),
+        so only that interval is read and only rows whose rank moved are written.
+        """
+        Entry = CompletionistLeaderboardEntry
+        ordered = self.db.query(Entry.user_id, Entry.rank).order_by(
+            Entry.authors_completed.desc(),
+            Entry.avg_completion.desc(),
+            Entry.user_id.asc()
+        )
+        if full:
+            lo = 1
+        else:
+            bounds = [rank for rank in vacated if rank is not None]
+            bounds += [self._leaderboard_position(entry) for entry in touched]
+            if not bounds:
+                return
+            lo = min(bounds)
+            # Apply rank interval filter; new entries have no stored rank yet
+            in_interval = Entry.rank >= lo if resized else Entry.rank.between(lo, max(bounds))
+            ordered = ordered.filter(or_(
+                in_interval, Entry.user_id.in_([entry.user_id for entry in touched])
+            ))
+        moved = [
+            {'user_id': user_id, 'rank': position}
+            for position, (user_id, rank) in enumerate(ordered, lo)
+            if rank != position
+        ]
+        if moved:
+            self.db.execute(update(Entry), moved)
+    
+    def get_leaderboard_rank(self, user_id: int) -> Optional[int]:
+        """1-based leaderboard rank as stored at the last refresh; None if not on the board"""
+        return self.db.query(CompletionistLeaderboardEntry.rank).filter(
+            CompletionistLeaderboardEntry.user_id == user_id
+        ).scalar()
+    
+    def get_leaderboard_page(self, first_rank: int, last_rank: int) -> Tuple[List, int]:
+        """Leaderboard rows (entry, username, display_name) ranked first_rank..last_rank, and the total"""
+        Entry = CompletionistLeaderboardEntry
+        rows = self.db.query(Entry, User.username, User.display_name).join(
+            User, User.id == Entry.user_id
+        ).filter(
+            Entry.rank.between(first_rank, last_rank)
+        ).order_by(Entry.rank).all()
+        total = self.db.query(func.count()).select_from(Entry).scalar()
+        return rows, total
+    
     def get_user_author_progress_list(
         self, 
         user_id: int,
@@ -168,7 +509,9 @@ class CompletionistService:
         
         query = self.db.query(UserAuthorProgress).filter(
             UserAuthorProgress.user_id == user_id
-        ).join(AuthorCanon).join(Author)
+        ).join(UserAuthorProgress.canon).join(AuthorCanon.author).options(
+            contains_eager(UserAuthorProgress.canon).contains_eager(AuthorCanon.author)
+        )
         
         # Apply minimum completion filter
         if min_completion is not None:
@@ -233,17 +576,14 @@ class CompletionistService:
         read_book_ids = set(r.book_id for r in reads)
         read_by_book = {r.book_id: r for r in reads}
         
+        # Match works to user's books once (hash lookups on title/ISBN)
+        matcher = WorkBookMatcher(user_books)
+        matched_books = {work.id: matcher.match(work) for work in works}
+        
         # Build timeline
         timeline = []
         for work in works:
-            # Try to match work to user's books
-            matched_book = None
-            for book in user_books:
-                if (book.title.lower() == work.title.lower() or
-                    (work.isbn_13 and book.isbn_13 == work.isbn_13) or
-                    (work.isbn_10 and book.isbn_10 == work.isbn_10)):
-                    matched_book = book
-                    break
+            matched_book = matched_books[work.id]
             
             if matched_book and matched_book.id in read_book_ids:
                 read = read_by_book[matched_book.id]
@@ -270,7 +610,7 @@ class CompletionistService:
         reading_pattern = self._calculate_reading_pattern(timeline, author.birth_year)
         
         # Generate recommendations
-        recommendations = self._generate_recommendations(works, read_book_ids, user_books)
+        recommendations = self._generate_recommendations(works, read_book_ids, matched_books)
         
         # Get achievements
         achievements = self.db.query(CompletionAchievement).filter(
@@ -347,33 +687,88 @@ class CompletionistService:
         self, 
         works: List[AuthorWork], 
         read_book_ids: set, 
-        user_books: List[Book]
+        matched_books: Dict[int, Optional[Book]]
     ) -> List[Dict]:
-        """Generate recommendations for next books to read"""
+        """Generate recommendations for next books to read (matched_books: work id -> user's book)"""
         recommendations = []
         
-        # Find unread works
+        # Find unread works the user owns
         for work in works:
-            # Check if user has a matching book
-            has_book = False
-            for book in user_books:
-                if (book.title.lower() == work.title.lower() or
-                    (work.isbn_13 and book.isbn_13 == work.isbn_13) or
-                    (work.isbn_10 and book.isbn_10 == work.isbn_10)):
-                    has_book = True
-                    if book.id not in read_book_ids:
-                        recommendations.append({
-                            'title': work.title,
-                            'work_id': work.id,
-                            'reason': 'You own this book but haven\'t read it yet',
-                            'priority': 1,
-                            'publication_year': work.publication_year,
-                            'page_count': work.page_count
-                        })
-                    break
+            book = matched_books.get(work.id)
+            if book and book.id not in read_book_ids:
+                recommendations.append({
+                    'title': work.title,
+                    'work_id': work.id,
+                    'reason': 'You own this book but haven\'t read it yet',
+                    'priority': 1,
+                    'publication_year': work.publication_year,
+                    'page_count': work.page_count
+                })
         
         # Sort by priority and publication year
-        recommendations.sort(key=lambda x: (x['priority'], x.get('publication_year', 0)))
+        recommendations.sort(key=lambda x: (x['priority'], x.get('publication_year') or 0))
         
         return recommendations[:5]  # Top 5 recommendations
 
+
+
+class CompletionistProgressUpdater:
+    """
+    Keeps user_author_progress (and the materialized leaderboard) current
+    from read/book domain events.
+    Changed (user, author) pairs are coalesced for a short delay, so a burst
+    (e.g. a bulk import) syncs each affected progress row once.
+    """
+    
+    def __init__(self, delay_seconds: float):
+        self.delay_seconds = delay_seconds
+        self._pending: Dict[object, Set[Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+    
+    def handle(self, domain_event: DomainEvent) -> None:
+        """Domain event handler: schedule a sync for the affected (user, author)"""
+        if domain_event.author_id is None or domain_event.bind is None:
+            return
+        timer = None
+        with self._lock:
+            self._pending.setdefault(domain_event.bind, set()).add(
+                (domain_event.user_id, domain_event.author_id)
+            )
+            if self.delay_seconds > 0 and self._timer is None:
+                timer = self._timer = threading.Timer(self.delay_seconds, self.flush)
+                timer.daemon = True
+        if self.delay_seconds <= 0:
+            self.flush()
+        elif timer is not None:
+            timer.start()
+    
+    def flush(self) -> int:
+        """Sync all pending (user, author) pairs now. Returns the number synced."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        
+        synced = 0
+        for bind, pairs in pending.items():
+            db = Session(bind=bind)
+            try:
+                service = CompletionistService(db)
+                for user_id, author_id in sorted(pairs):
+                    service.sync_user_progress(user_id, author_id)
+                    synced += 1
+                service.refresh_leaderboard(user_id for user_id, _ in pairs)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Completionist progress sync failed: {e}")
+            finally:
+                db.close()
+        return synced
+
+
+progress_updater = CompletionistProgressUpdater(settings.COMPLETIONIST_SYNC_DELAY_SECONDS)
+subscribe(READ_CHANGED, progress_updater.handle)
+subscribe(BOOK_CHANGED, progress_updater.handle)
@@ -0,0 +1,336 @@
+"""
+Remote cover ingestion.
+
+Book covers picked from SearchService results point at Google Books or Open
+Library, so every page view hot-links a third-party host. CoverIngestor
+downloads each distinct remote cover URL once through a pooled async HTTP
+client, stores it in the content-addressed media store (with responsive
+derivatives) and rewrites every books.cover_image_url that used it.
+
+Downloads are retried with exponential backoff on connection errors, 429 and
+5xx (honoring Retry-After), and limited per host as well as overall.
+Cover URLs are user-supplied, so only COVER_INGEST_ALLOWED_HOSTS are fetched,
+and only if they resolve to public addresses; redirects are followed by hand
+and every hop is checked again.
+Responses that are not a supported image, or are a 1x1 "no cover"
+placeholder, leave the remote URL as it was.
+
+`manage.py ingest-covers` runs a full pass. With COVER_INGEST_ENABLED,
+`cover_ingest_scheduler` also ingests a user's remote covers shortly after
+their books change.
+"""
+import asyncio
+import io
+import ipaddress
+import logging
+import random
+import socket
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.book import Book
+from app.services.domain_events import BOOK_CHANGED, DomainEvent, subscribe
+from app.services.file_upload import FileUploadService
+from app.services.image_derivatives import DerivativePipeline, derivative_pipeline
+from app.services.media_store import MediaStore, media_store
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+REDIRECT_STATUS_CODES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 5
+
+# Pillow format -> stored extension (FileUploadService.ALLOWED_EXTENSIONS)
+IMAGE_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png", "WEBP": ".webp"}
+
+USER_AGENT = f"{settings.APP_NAME}/1.0 (cover cache)"
+
+
+class CoverDownloadError(Exception):
+    """A cover could not be fetched; retryable errors are retried first"""
+
+    def __init__(self, message: str, retryable: bool = False, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return max(0.0, float(response.headers["retry-after"]))
+    except (KeyError, ValueError):
+        return None
+
+
+class CoverURLRejected(CoverDownloadError):
+    """A cover URL (or a redirect target) is not allowed to be fetched"""
+
+
+def _host_allowed(host: str, allowed_hosts: Iterable[str]) -> bool:
+    host = host.lower().rstrip(".")
+    return any(host == allowed or host.endswith(f".{allowed}") for allowed in allowed_hosts)
+
+
+def _image_extension(data: bytes) -> Optional[str]:
+    """Stored extension for a downloaded image, or None if it isn't a usable cover"""
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+            if image.width <= 1 or image.height <= 1:
+                return None  # Open Library / Google "no cover" placeholders
+            return IMAGE_EXTENSIONS.get(image.format)
+    except Exception:
+        return None
+
+
+class CoverIngestor:
+    """Downloads remote cover URLs into the media store and rewrites books"""
+
+    def __init__(
+        self,
+        db: Session,
+        store: MediaStore = media_store,
+        derivatives: Optional[DerivativePipeline] = derivative_pipeline,
+        max_connections: int = settings.COVER_INGEST_MAX_CONNECTIONS,
+        per_host_limit: int = settings.COVER_INGEST_PER_HOST_LIMIT,
+        max_attempts: int = settings.COVER_INGEST_MAX_ATTEMPTS,
+        backoff_seconds: float = 0.5,
+        timeout_seconds: float = 10.0,
+        max_bytes: int = FileUploadService.MAX_FILE_SIZE,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        allowed_hosts: Iterable[str] = tuple(settings.COVER_INGEST_ALLOWED_HOSTS),
+        allow_private_addresses: bool = False,
+    ):
+        self.db = db
+        self.store = store
+        self.derivatives = derivatives
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_seconds = backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.max_bytes = max_bytes
+        self.transport = transport
+        self.allowed_hosts = tuple(host.lower() for host in allowed_hosts)
+        self.allow_private_addresses = allow_private_addresses
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def remote_cover_urls(self, user_ids: Optional[Iterable[int]] = None, limit: Optional[int] = None) -> List[str]:
+        """Distinct remote cover URLs, optionally only those on some users' books"""
+        query = self.db.query(Book.cover_image_url).filter(
+            or_(Book.cover_image_url.like("http://%"), Book.cover_image_url.like("https://%"))
+        ).distinct().order_by(Book.cover_image_url)
+        if user_ids is not None:
+            query = query.filter(Book.user_id.in_(list(user_ids)))
+        if limit:
+            query = query.limit(limit)
+        return [url for url, in query]
+
+    async def run(self, user_ids: Optional[Iterable[int]] = None, limit: Optional[int] = None) -> Dict:
+        """
+        Ingest remote covers and rewrite the books using them. Does not commit.
+        """
+        started = time.perf_counter()
+        urls = self.remote_cover_urls(user_ids, limit)
+        result = {
+            'urls_found': len(urls),
+            'downloaded': 0,
+            'deduplicated': 0,
+            'skipped': 0,
+            'failed': 0,
+            'books_updated': 0,
+        }
+
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        async with httpx.AsyncClient(
+            limits=limits,
+            timeout=self.timeout_seconds,
+            follow_redirects=False,  # Followed in _fetch, checking each hop
+            headers={"User-Agent": USER_AGENT},
+            transport=self.transport,
+        ) as client:
+            # One URL's unexpected error must not cancel the others or drop their rewrites
+            outcomes = await asyncio.gather(
+                *(self._ingest_one(client, url) for url in urls), return_exceptions=True
+            )
+
+        for remote_url, outcome in zip(urls, outcomes):
+            if isinstance(outcome, BaseException):
+                if not isinstance(outcome, Exception):
+                    raise outcome
+                logger.error(f"Failed to ingest cover {remote_url}: {outcome!r}", exc_info=outcome)
+                result['failed'] += 1
+                continue
+            status, local_url = outcome
+            result[status] += 1
+            if local_url:
+                result['books_updated'] += self.db.execute(
+                    update(Book).where(Book.cover_image_url == remote_url).values(cover_image_url=local_url)
+                ).rowcount
+
+        result['elapsed_seconds'] = round(time.perf_counter() - started, 3)
+        logger.info(f"Cover ingestion: {result}")
+        return result
+
+    async def _ingest_one(self, client: httpx.AsyncClient, url: str):
+        """(outcome key, local URL or None) for one remote cover"""
+        try:
+            await self._check_url(url)
+            data = await self._download(client, url)
+        except CoverURLRejected as e:
+            logger.warning(f"Skipping cover {url}: {e}")
+            return 'skipped', None
+        except CoverDownloadError as e:
+            logger.warning(f"Failed to ingest cover {url}: {e}")
+            return 'failed', None
+
+        extension = await run_in_threadpool(_image_extension, data)
+        if extension is None:
+            logger.info(f"Skipping cover {url}: not a usable image")
+            return 'skipped', None
+
+        path, local_url, created = await run_in_threadpool(self.store.store_bytes, data, extension)
+        if created and self.derivatives:
+            await self.derivatives.generate(path)
+        return ('downloaded' if created else 'deduplicated'), local_url
+
+    async def _download(self, client: httpx.AsyncClient, url: str) -> bytes:
+        host = urlsplit(url).hostname or ""
+        semaphore = self._host_limits.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                async with semaphore:
+                    return await self._fetch(client, url)
+            except CoverDownloadError as e:
+                if not e.retryable or attempt == self.max_attempts:
+                    raise
+                delay = e.retry_after
+                if delay is None:
+                    delay = self.backoff_seconds * 2 ** (attempt - 1) * (1 + random.random() / 2)
+                # Sleep outside the host slot so other URLs can proceed
+                await asyncio.sleep(min(delay, 60))
+
+    async def _check_url(self, url: str) -> None:
+        """Raise CoverURLRejected unless url is http(s) on an allowed host with public addresses"""
+        parts = urlsplit(url)
+        host = parts.hostname
+        if parts.scheme not in ("http", "https") or not host:
+            raise CoverURLRejected(f"Not an http(s) URL: {url}")
+        if not _host_allowed(host, self.allowed_hosts):
+            raise CoverURLRejected(f"Host {host} is not an allowed cover host")
+        if self.allow_private_addresses:
+            return
+        try:
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except (OSError, ValueError) as e:
+            raise CoverDownloadError(f"Cannot resolve {host}: {e}", retryable=True) from e
+        for info in infos:
+            address = ipaddress.ip_address(info[4][0].split("%")[0])
+            if not address.is_global or address.is_multicast:
+                raise CoverURLRejected(f"Host {host} resolves to non-public address {address}")
+
+    async def _fetch(self, client: httpx.AsyncClient, url: str) -> bytes:
+        for _ in range(MAX_REDIRECTS + 1):
+            location = await self._fetch_once(client, url)
+            if isinstance(location, bytes):
+                return location
+            url = location
+            await self._check_url(url)
+        raise CoverDownloadError(f"More than {MAX_REDIRECTS} redirects")
+
+    async def _fetch_once(self, client: httpx.AsyncClient, url: str):
+        """The cover bytes, or the absolute URL of a redirect"""
+        try:
+            async with client.stream("GET", url) as response:
+                if response.status_code in REDIRECT_STATUS_CODES and "location" in response.headers:
+                    return urljoin(url, response.headers["location"])
+                if response.status_code in RETRY_STATUS_CODES:
+                    raise CoverDownloadError(
+                        f"HTTP {response.status_code}", retryable=True, retry_after=_retry_after(response)
+                    )
+                if response.status_code != 200:
+                    raise CoverDownloadError(f"HTTP {response.status_code}")
+                content_type = response.headers.get("content-type", "")
+                if not content_type.startswith("image/"):
+                    raise CoverDownloadError(f"Unexpected content type {content_type!r}")
+
+                chunks, size = [], 0
+                async for chunk in response.aiter_bytes():
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise CoverDownloadError(f"Cover larger than {self.max_bytes} bytes")
+                    chunks.append(chunk)
+                return b"".join(chunks)
+        except httpx.TransportError as e:
+            raise CoverDownloadError(f"{type(e).__name__}: {e}", retryable=True) from e
+
+
+class CoverIngestScheduler:
+    """
+    Ingests remote covers for users whose books changed. Changes are
+    coalesced for a short delay, then ingested on a background thread.
+    """
+
+    def __init__(self, enabled: bool, delay_seconds: float):
+        self.enabled = enabled
+        self.delay_seconds = delay_seconds
+        self._pending: Dict[object, Set[int]] = {}
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def handle(self, domain_event: DomainEvent) -> None:
+        """Domain event handler: schedule cover ingestion for the user"""
+        if not self.enabled or domain_event.bind is None:
+            return
+        with self._lock:
+            self._pending.setdefault(domain_event.bind, set()).add(domain_event.user_id)
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> int:
+        """Ingest covers for all pending users now. Returns the number of books updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        updated = 0
+        for bind, user_ids in pending.items():
+            db = Session(bind=bind)
+            try:
+                result = asyncio.run(CoverIngestor(db).run(user_ids=user_ids))
+                db.commit()
+                updated += result['books_updated']
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Cover ingestion failed: {e}")
+            finally:
+                db.close()
+        return updated
+
+    def cancel(self) -> None:
+        """Drop pending work (the next ingest-covers run picks it up)"""
+        with self._lock:
+            self._pending = {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+cover_ingest_scheduler = CoverIngestScheduler(settings.COVER_INGEST_ENABLED, settings.COVER_INGEST_DELAY_SECONDS)
+subscribe(BOOK_CHANGED, cover_ingest_scheduler.handle)
@@ -0,0 +1,71 @@
+"""
+In-process domain events.
+
+API handlers record events on their SQLAlchemy session with `emit(db, event)`.
+Events are dispatched to subscribers only after that session commits (and are
+discarded on rollback), so handlers never see uncommitted state. Each event
+carries the engine it was committed on, letting handlers open their own
+session against the same database.
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Event types
+READ_CHANGED = "read.changed"
+BOOK_CHANGED = "book.changed"
+
+_PENDING_KEY = "pending_domain_events"
+
+
+@dataclass
+class DomainEvent:
+    """Something changed for a user's books/reads by an author"""
+    type: str
+    user_id: int
+    author_id: Optional[int]
+    bind: Optional[Engine] = field(default=None, repr=False, compare=False)
+
+
+Handler = Callable[[DomainEvent], None]
+_handlers: Dict[str, List[Handler]] = {}
+
+
+def subscribe(event_type: str, handler: Handler) -> None:
+    """Register a handler for an event type"""
+    _handlers.setdefault(event_type, []).append(handler)
+
+
+def emit(db: Session, domain_event: DomainEvent) -> None:
+    """Record an event to be dispatched once the session commits"""
+    db.info.setdefault(_PENDING_KEY, []).append(domain_event)
+
+
+def _dispatch(domain_event: DomainEvent) -> None:
+    for handler in _handlers.get(domain_event.type, []):
+        try:
+            handler(domain_event)
+        except Exception as e:
+            logger.error(f"Domain event handler failed for {domain_event}: {e}")
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_after_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    bind = session.get_bind()
+    for domain_event in pending:
+        domain_event.bind = bind
+        _dispatch(domain_event)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
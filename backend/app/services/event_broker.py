@@ -0,0 +1,304 @@
+"""
+In-process pub/sub broker for live comment/reaction events (Server-Sent Events).
+
+Publishers (sync request handlers running in the threadpool) call
+`broker.publish(channel, event_type, data)`. SSE endpoints subscribe to a
+channel and await events on an asyncio queue, so open pages cost no database
+queries between changes.
+
+Fan-out across uvicorn workers is delegated to a pluggable backend:
+- MemoryBackend: single process (default, EVENT_BROKER_URL="memory://")
+- SQLiteBackend: events appended to a shared SQLite file and tailed by one
+  thread per worker (EVENT_BROKER_URL="sqlite:///./events.db")
+"""
+import abc
+import asyncio
+import itertools
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Set
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Event types
+COMMENT_CREATED = "comment-created"
+COMMENT_DELETED = "comment-deleted"
+REACTION_CHANGED = "reaction-changed"
+
+
+def read_channel(read_id: int) -> str:
+    return f"read:{read_id}"
+
+
+def semester_channel(semester_id: int) -> str:
+    return f"semester:{semester_id}"
+
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+@dataclass
+class BrokerEvent:
+    """A single event delivered to subscribers"""
+    id: int
+    channel: str
+    type: str
+    data: dict
+
+    def to_sse(self) -> str:
+        """Format as a Server-Sent Events frame"""
+        payload = json.dumps(self.data, default=_json_default)
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+DeliverCallback = Callable[[BrokerEvent], None]
+
+
+class BrokerBackend(abc.ABC):
+    """Transport between publishers and the subscribers of every worker"""
+
+    @abc.abstractmethod
+    def start(self, deliver: DeliverCallback) -> None:
+        """Begin handing every published event to deliver"""
+
+    @abc.abstractmethod
+    def publish(self, channel: str, event_type: str, data: dict) -> None:
+        """Send an event to the subscribers of channel in every worker"""
+
+    def stop(self) -> None:
+        pass
+
+
+class MemoryBackend(BrokerBackend):
+    """Delivers directly to subscribers in this process"""
+
+    def __init__(self):
+        self._deliver: Optional[DeliverCallback] = None
+        self._ids = itertools.count(1)
+
+    def start(self, deliver: DeliverCallback) -> None:
+        self._deliver = deliver
+
+    def publish(self, channel: str, event_type: str, data: dict) -> None:
+        if self._deliver:
+            self._deliver(BrokerEvent(next(self._ids), channel, event_type, data))
+
+
+class SQLiteBackend(BrokerBackend):
+    """
+    Shared-file backend for multiple workers on one host.
+    Publish appends a row; each worker tails the table from a background
+    thread and delivers new rows to its local subscribers.
+    """
+
+    MAX_BACKOFF_SECONDS = 5.0
+
+    def __init__(self, path: str, poll_interval: float = 0.25, retention_seconds: int = 300):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ensure_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _ensure_schema(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS broker_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel TEXT NOT NULL,
+                    event_type TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+        finally:
+            conn.close()
+
+    def start(self, deliver: DeliverCallback) -> None:
+        conn = self._connect()
+        try:
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM broker_events").fetchone()[0]
+        finally:
+            conn.close()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._tail, args=(deliver, last_id), name="event-broker-sqlite", daemon=True
+        )
+        self._thread.start()
+
+    def publish(self, channel: str, event_type: str, data: dict) -> None:
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO broker_events (channel, event_type, data, created_at) VALUES (?, ?, ?, ?)",
+                (channel, event_type, json.dumps(data, default=_json_default), time.time())
+            )
+        finally:
+            conn.close()
+
+    def _tail(self, deliver: DeliverCallback, last_id: int) -> None:
+        """
+        Poll for new rows until stopped. Errors (e.g. "database is locked"
+        during a prune) are logged and retried with backoff on a fresh
+        connection, so one failure never ends cross-worker delivery.
+        """
+        conn: Optional[sqlite3.Connection] = None
+        last_prune = time.time()
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                if conn is None:
+                    conn = self._connect()
+                last_id = self._deliver_new(conn, deliver, last_id)
+
+                if time.time() - last_prune > self.retention_seconds:
+                    conn.execute(
+                        "DELETE FROM broker_events WHERE created_at < ?",
+                        (time.time() - self.retention_seconds,)
+                    )
+                    last_prune = time.time()
+                failures = 0
+                delay = self.poll_interval
+            except Exception as e:
+                failures += 1
+                delay = min(self.poll_interval * 2 ** failures, self.MAX_BACKOFF_SECONDS)
+                logger.error(f"Event broker tail failed, retrying in {delay:.2f}s: {e}")
+                if conn is not None:
+                    conn.close()
+                    conn = None
+            self._stop.wait(delay)
+        if conn is not None:
+            conn.close()
+
+    @staticmethod
+    def _deliver_new(conn: sqlite3.Connection, deliver: DeliverCallback, last_id: int) -> int:
+        """Deliver rows after last_id; returns the new last_id"""
+        rows = conn.execute(
+            "SELECT id, channel, event_type, data FROM broker_events WHERE id > ? ORDER BY id",
+            (last_id,)
+        ).fetchall()
+        for event_id, channel, event_type, data in rows:
+            last_id = event_id
+            try:
+                payload = json.loads(data)
+            except ValueError:
+                logger.warning(f"Skipping malformed broker event {event_id} on {channel}")
+                continue
+            deliver(BrokerEvent(event_id, channel, event_type, payload))
+        return last_id
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+
+@dataclass(eq=False)
+class Subscription:
+    """A subscriber's queue, bound to the event loop it was created on"""
+    channel: str
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=100))
+
+    async def get(self) -> BrokerEvent:
+        return await self.queue.get()
+
+
+class EventBroker:
+    """Routes backend events to per-channel subscriber queues"""
+
+    def __init__(self, backend: BrokerBackend):
+        self.backend = backend
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.backend.start(self._deliver)
+
+    def stop(self) -> None:
+        with self._lock:
+            if not self._started:
+                return
+            self._started = False
+        self.backend.stop()
+
+    def publish(self, channel: str, event_type: str, data: dict) -> None:
+        """Publish an event; never raises into the request that triggered it"""
+        self.start()
+        try:
+            self.backend.publish(channel, event_type, data)
+        except Exception as e:
+            logger.error(f"Failed to publish {event_type} on {channel}: {e}")
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str):
+        """Subscribe to a channel for the lifetime of the context"""
+        self.start()
+        subscription = Subscription(channel, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+    def _deliver(self, event: BrokerEvent) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(event.channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(self._enqueue, subscription, event)
+            except RuntimeError:
+                # Subscriber's loop has closed
+                pass
+
+    @staticmethod
+    def _enqueue(subscription: Subscription, event: BrokerEvent) -> None:
+        try:
+            subscription.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning(f"Dropping {event.type} for slow subscriber on {event.channel}")
+
+
+def create_backend(url: str) -> BrokerBackend:
+    """Create a broker backend from an EVENT_BROKER_URL"""
+    if url.startswith("memory://"):
+        return MemoryBackend()
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported EVENT_BROKER_URL: {url}")
+
+
+broker = EventBroker(create_backend(settings.EVENT_BROKER_URL))
@@ -1,10 +1,16 @@
-import os
-import uuid
+import hashlib
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+import aiofiles
+import aiofiles.os
 import logging
 
+from app.config import settings
+from app.services.image_derivatives import DerivativePipeline, derivative_pipeline, manifest_path_for
+from app.services.media_store import MediaStore
+
 try:
     from PIL import Image
     PIL_AVAILABLE = True
@@ -15,14 +21,20 @@ logger = logging.getLogger(__name__)
 
 
 class FileUploadService:
-    """Service for handling file uploads (cover images, read vibe photos)"""
+    """
+    Service for handling file uploads (cover images, read vibe photos).
+    Files are stored by content hash (see app.services.media_store).
+    """
     
     ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
     MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+    CHUNK_SIZE = 64 * 1024  # Upload streaming chunk
     
-    def __init__(self, base_media_path: str = "media"):
+    def __init__(self, base_media_path: str = settings.MEDIA_ROOT, derivatives: Optional[DerivativePipeline] = derivative_pipeline):
         self.base_media_path = Path(base_media_path)
         self.base_media_path.mkdir(parents=True, exist_ok=True)
+        self.store = MediaStore(base_media_path)
+        self.derivatives = derivatives
     
     async def upload_cover_image(self, file: UploadFile, user_id: int, book_id: int) -> str:
         """
@@ -32,32 +44,24 @@ class FileUploadService:
         # Validate file
         self._validate_file(file)
         
-        # Generate file path
+        # Objects keep the uploaded extension
         file_extension = Path(file.filename).suffix.lower()
         if file_extension not in self.ALLOWED_EXTENSIONS:
             file_extension = ".jpg"  # Default to jpg
         
-        file_path = self.base_media_path / "covers" / str(user_id) / f"{book_id}{file_extension}"
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        
         # Save file
         try:
-            contents = await file.read()
-            
-            # Validate file size
-            if len(contents) > self.MAX_FILE_SIZE:
-                raise HTTPException(status_code=400, detail="File size exceeds 5MB limit")
-            
-            # Save file
-            with open(file_path, "wb") as f:
-                f.write(contents)
+            file_path, url, created = await self._save_upload(file, file_extension)
             
-            # Optionally create thumbnail (for future use)
-            # self._create_thumbnail(file_path)
+            # Responsive WebP/JPEG widths for srcset, unless this content already has them
+            if self.derivatives and (created or not manifest_path_for(file_path).exists()):
+                await self.derivatives.generate(file_path)
             
             # Return relative URL path
-            return f"/media/covers/{user_id}/{book_id}{file_extension}"
+            return url
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error uploading cover image: {e}")
             raise HTTPException(status_code=500, detail="Failed to upload cover image")
@@ -70,32 +74,24 @@ class FileUploadService:
         # Validate file
         self._validate_file(file)
         
-        # Generate file path
+        # Objects keep the uploaded extension
         file_extension = Path(file.filename).suffix.lower()
         if file_extension not in self.ALLOWED_EXTENSIONS:
             file_extension = ".jpg"
         
-        # Use timestamp to make unique filename
-        import datetime
-        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-        file_path = self.base_media_path / "read_vibes" / str(user_id) / f"{read_id}_{timestamp}{file_extension}"
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        
         # Save file
         try:
-            contents = await file.read()
-            
-            # Validate file size
-            if len(contents) > self.MAX_FILE_SIZE:
-                raise HTTPException(status_code=400, detail="File size exceeds 5MB limit")
+            file_path, url, created = await self._save_upload(file, file_extension)
             
-            # Save file
-            with open(file_path, "wb") as f:
-                f.write(contents)
+            # Responsive WebP/JPEG widths for srcset, unless this content already has them
+            if self.derivatives and (created or not manifest_path_for(file_path).exists()):
+                await self.derivatives.generate(file_path)
             
             # Return relative URL path
-            return f"/media/read_vibes/{user_id}/{read_id}_{timestamp}{file_extension}"
+            return url
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error uploading read vibe photo: {e}")
             raise HTTPException(status_code=500, detail="Failed to upload read vibe photo")
@@ -108,36 +104,60 @@ class FileUploadService:
         # Validate file
         self._validate_file(file)
         
-        # Generate file path
+        # Objects keep the uploaded extension
         file_extension = Path(file.filename).suffix.lower()
         if file_extension not in self.ALLOWED_EXTENSIONS:
             file_extension = ".jpg"
         
-        file_path = self.base_media_path / "profiles" / f"{user_id}{file_extension}"
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        
         # Save file
         try:
-            contents = await file.read()
-            
-            # Validate file size
-            if len(contents) > self.MAX_FILE_SIZE:
-                raise HTTPException(status_code=400, detail="File size exceeds 5MB limit")
-            
-            # Save file
-            with open(file_path, "wb") as f:
-                f.write(contents)
+            file_path, url, created = await self._save_upload(file, file_extension)
             
             # Create thumbnail for profile (smaller size)
-            self._create_thumbnail(file_path, max_size=(200, 200))
+            if created:
+                await run_in_threadpool(self._create_thumbnail, file_path, max_size=(200, 200))
             
             # Return relative URL path
-            return f"/media/profiles/{user_id}{file_extension}"
+            return url
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error uploading profile photo: {e}")
             raise HTTPException(status_code=500, detail="Failed to upload profile photo")
     
+    async def _save_upload(self, file: UploadFile, extension: str) -> Tuple[Path, str, bool]:
+        """
+        Stream an upload into the content-addressed store in chunks, hashing
+        and enforcing MAX_FILE_SIZE as bytes arrive. The temp file is only
+        moved into place once complete, so readers never see a partial file
+        and oversized uploads leave nothing behind.
+        Returns (path, url, created) as MediaStore.commit does.
+        """
+        too_large = HTTPException(
+            status_code=400,
+            detail=f"File size exceeds {self.MAX_FILE_SIZE // (1024 * 1024)}MB limit"
+        )
+        if file.size is not None and file.size > self.MAX_FILE_SIZE:
+            raise too_large
+        
+        temp_path = self.store.incoming_path()
+        try:
+            size = 0
+            digest = hashlib.sha256()
+            async with aiofiles.open(temp_path, "wb") as out:
+                while chunk := await file.read(self.CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > self.MAX_FILE_SIZE:
+                        raise too_large
+                    digest.update(chunk)
+                    await out.write(chunk)
+            return await run_in_threadpool(self.store.commit, temp_path, digest.hexdigest(), extension)
+        except BaseException:
+            if await aiofiles.os.path.exists(temp_path):
+                await aiofiles.os.remove(temp_path)
+            raise
+    
     def _validate_file(self, file: UploadFile):
         """Validate uploaded file"""
         if not file.filename:
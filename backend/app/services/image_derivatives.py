@@ -0,0 +1,202 @@
+"""
+Responsive image derivatives for uploaded covers and read vibe photos.
+
+After an upload is saved, each configured width is rendered in WebP and JPEG
+by a process pool (Pillow resizing is CPU-bound). The variants are written
+next to the original as `{stem}_{width}w.{ext}`, described by a
+`{stem}.manifest.json`, and exposed to the API as `srcset` strings.
+
+Schemas do no file I/O: endpoints call add_srcsets on the rows they return,
+which looks each distinct manifest up once. Manifests of content-addressed
+objects never change, so those stay cached without a stat.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVE_FORMATS = {"webp": ".webp", "jpeg": ".jpg"}
+
+MEDIA_URL_PREFIX = "/media/"
+# Same bytes for the life of the URL (see app.services.media_store)
+IMMUTABLE_URL_PREFIX = f"{MEDIA_URL_PREFIX}objects/"
+
+
+def manifest_path_for(image_path: Path) -> Path:
+    return image_path.parent / f"{image_path.stem}.manifest.json"
+
+
+def render_derivatives(source_path: str, widths: Tuple[int, ...], quality: int) -> Dict:
+    """
+    Render every width/format variant of an image and write its manifest.
+    Runs in a worker process. Widths at or above the original are skipped
+    (the original is always listed as the largest JPEG/WebP candidate).
+    """
+    from PIL import Image, ImageOps
+
+    source = Path(source_path)
+    variants = []
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+        width, height = image.size
+        for target_width in sorted(set(widths)):
+            if target_width >= width:
+                continue
+            target_height = max(1, round(height * target_width / width))
+            resized = image.resize((target_width, target_height), Image.Resampling.LANCZOS)
+            for fmt, extension in DERIVATIVE_FORMATS.items():
+                variant_path = source.parent / f"{source.stem}_{target_width}w{extension}"
+                resized.save(variant_path, format=fmt.upper(), quality=quality, optimize=True)
+                variants.append({
+                    "width": target_width,
+                    "height": target_height,
+                    "format": fmt,
+                    "file": variant_path.name,
+                    "bytes": variant_path.stat().st_size,
+                })
+
+    manifest = {
+        "source": source.name,
+        "width": width,
+        "height": height,
+        "variants": variants,
+    }
+    temp_path = manifest_path_for(source).with_suffix(".tmp")
+    temp_path.write_text(json.dumps(manifest))
+    os.replace(temp_path, manifest_path_for(source))
+    return manifest
+
+
+class DerivativePipeline:
+    """Generates derivatives off the event loop and builds srcset strings"""
+
+    def __init__(
+        self, media_root: str, widths: Tuple[int, ...], quality: int, workers: int, manifest_cache_size: int = 4096
+    ):
+        self.media_root = Path(media_root)
+        self.widths = widths
+        self.quality = quality
+        self.workers = workers
+        self.manifest_cache_size = manifest_cache_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # LRU of url -> (manifest mtime, manifest); manifests are rewritten on re-upload
+        self._manifests: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._manifests_lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def generate(self, image_path: Path) -> Optional[Dict]:
+        """Render derivatives for a saved upload; failures are logged, not raised"""
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(render_derivatives, str(image_path), self.widths, self.quality)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), render_derivatives, str(image_path), self.widths, self.quality
+            )
+        except Exception as e:
+            logger.warning(f"Failed to create derivatives for {image_path}: {e}")
+            return None
+
+    def _path_for_url(self, url: str) -> Optional[Path]:
+        if not url or not url.startswith(MEDIA_URL_PREFIX):
+            return None  # External covers (e.g. Open Library) have no derivatives
+        relative = url[len(MEDIA_URL_PREFIX):]
+        path = (self.media_root / relative).resolve()
+        if self.media_root.resolve() not in path.parents:
+            return None
+        return path
+
+    def manifest_for(self, url: Optional[str]) -> Optional[Dict]:
+        """Manifest for a media URL, or None if it has no derivatives"""
+        path = self._path_for_url(url)
+        if path is None:
+            return None
+        with self._manifests_lock:
+            cached = self._manifests.get(url)
+            if cached:
+                self._manifests.move_to_end(url)
+        if cached and url.startswith(IMMUTABLE_URL_PREFIX):
+            return cached[1]
+        manifest_path = manifest_path_for(path)
+        try:
+            mtime = manifest_path.stat().st_mtime
+        except OSError:
+            return None
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except (OSError, ValueError):
+            return None
+        with self._manifests_lock:
+            self._manifests[url] = (mtime, manifest)
+            self._manifests.move_to_end(url)
+            while len(self._manifests) > self.manifest_cache_size:
+                self._manifests.popitem(last=False)
+        return manifest
+
+    def srcset_for(self, url: Optional[str], fmt: str = "webp") -> Optional[str]:
+        """`srcset` value ("url 160w, url 320w, ...") for a media URL, or None"""
+        manifest = self.manifest_for(url)
+        if not manifest:
+            return None
+        base_url = url.rsplit("/", 1)[0]
+        candidates = [
+            f"{base_url}/{variant['file']} {variant['width']}w"
+            for variant in manifest["variants"]
+            if variant["format"] == fmt
+        ]
+        if fmt == "jpeg" or url.lower().endswith(DERIVATIVE_FORMATS[fmt]):
+            candidates.append(f"{url} {manifest['width']}w")
+        return ", ".join(candidates) or None
+
+    def add_srcsets(self, books: Iterable = (), reads: Iterable = ()) -> None:
+        """
+        Set cover_image_srcset / read_vibe_photo_srcset on ORM rows before
+        they are returned as BookResponse / ReadResponse (books include their
+        reads). Each distinct URL is looked up once. May read manifests from
+        disk, so async endpoints should call it through run_in_threadpool.
+        """
+        books = list(books)
+        reads = list(reads) + [read for book in books for read in book.reads]
+        urls = {book.cover_image_url for book in books} | {read.read_vibe_photo_url for read in reads}
+        srcsets = {url: self.srcset_for(url) for url in urls if url}
+        for book in books:
+            book.cover_image_srcset = srcsets.get(book.cover_image_url)
+        for read in reads:
+            read.read_vibe_photo_srcset = srcsets.get(read.read_vibe_photo_url)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+derivative_pipeline = DerivativePipeline(
+    media_root=settings.MEDIA_ROOT,
+    widths=tuple(settings.IMAGE_DERIVATIVE_WIDTHS),
+    quality=settings.IMAGE_DERIVATIVE_QUALITY,
+    workers=settings.IMAGE_DERIVATIVE_WORKERS,
+    manifest_cache_size=settings.IMAGE_MANIFEST_CACHE_SIZE,
+)
@@ -0,0 +1,115 @@
+"""
+Expired shareable link sweeper.
+
+Links used to be revoked only when their owner created a new one for the same
+book, so expired links stayed "active" forever. The sweeper bulk-revokes
+links past expires_at in short batches (keeping SQLite write locks brief)
+and can purge links that have been revoked for longer than a retention
+period. It runs every SHARE_LINK_SWEEP_INTERVAL_SECONDS in the app and via
+`manage.py sweep-shareable-links`.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.shareable_link import ShareableLink
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_expired_links(db: Session, purge_after_days: int = 0, batch_size: int = 1000) -> Dict:
+    """
+    Revoke expired links and, if purge_after_days > 0, delete links revoked
+    longer ago than that. Commits after each batch.
+    """
+    now = datetime.now(timezone.utc)
+    result = {'revoked': 0, 'purged': 0}
+
+    while True:
+        batch = select(ShareableLink.id).where(
+            ShareableLink.is_revoked == False,
+            ShareableLink.expires_at <= now
+        ).limit(batch_size)
+        revoked = db.execute(
+            update(ShareableLink)
+            .where(ShareableLink.id.in_(batch))
+            .values(is_revoked=True, revoked_at=now)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        result['revoked'] += revoked
+        if revoked < batch_size:
+            break
+
+    if purge_after_days > 0:
+        cutoff = now - timedelta(days=purge_after_days)
+        while True:
+            batch = select(ShareableLink.id).where(
+                ShareableLink.is_revoked == True,
+                ShareableLink.revoked_at < cutoff
+            ).limit(batch_size)
+            purged = db.execute(
+                delete(ShareableLink)
+                .where(ShareableLink.id.in_(batch))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+            result['purged'] += purged
+            if purged < batch_size:
+                break
+
+    if result['revoked'] or result['purged']:
+        logger.info(f"Shareable link sweep: {result}")
+    return result
+
+
+class LinkSweeper:
+    """Runs sweep_expired_links periodically on a background timer"""
+
+    def __init__(self, interval_seconds: float, purge_after_days: int):
+        self.interval_seconds = interval_seconds
+        self.purge_after_days = purge_after_days
+        self._session_factory: Optional[Callable[[], Session]] = None
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def start(self, session_factory: Callable[[], Session]) -> None:
+        if self.interval_seconds <= 0:
+            return
+        with self._lock:
+            self._session_factory = session_factory
+        self._schedule()
+
+    def _schedule(self) -> None:
+        with self._lock:
+            if self._session_factory is None:
+                return
+            self._timer = threading.Timer(self.interval_seconds, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self) -> None:
+        db = self._session_factory()
+        try:
+            sweep_expired_links(db, self.purge_after_days)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Shareable link sweep failed: {e}")
+        finally:
+            db.close()
+        self._schedule()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._session_factory = None
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+link_sweeper = LinkSweeper(settings.SHARE_LINK_SWEEP_INTERVAL_SECONDS, settings.SHARE_LINK_PURGE_AFTER_DAYS)
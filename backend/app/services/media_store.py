@@ -0,0 +1,155 @@
+"""
+Content-addressed media store.
+
+Uploaded images are stored once per distinct content under
+`media/objects/{aa}/{bb}/{sha256}{ext}`, so identical uploads share one file
+and a URL always names the same bytes. Derivatives (srcset variants,
+manifests, thumbnails) live next to the original and start with its digest.
+
+Objects are not deleted when a row stops pointing at them. They are
+reference-counted from books.cover_image_url, reads.read_vibe_photo_url and
+users.profile_photo_url, and `collect_garbage` removes unreferenced objects
+once they are older than a grace period (which covers uploads whose URL has
+not been committed yet).
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, select, union_all
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.book import Book
+from app.models.read import Read
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+OBJECTS_DIR = "objects"
+INCOMING_DIR = ".incoming"
+OBJECT_URL_PREFIX = f"/media/{OBJECTS_DIR}/"
+
+_DIGEST_RE = re.compile(r"^([0-9a-f]{64})(?![0-9a-f])")
+
+
+def object_relative_path(digest: str, extension: str) -> str:
+    """Path of an object below the media root"""
+    return f"{OBJECTS_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def digest_from_url(url: Optional[str]) -> Optional[str]:
+    """Digest of a content-addressed media URL, or None for any other URL"""
+    if not url or not url.startswith(OBJECT_URL_PREFIX):
+        return None
+    match = _DIGEST_RE.match(url.rsplit("/", 1)[-1])
+    return match.group(1) if match else None
+
+
+def reference_counts(db: Session) -> Counter:
+    """Digest -> number of rows referencing it across all media columns"""
+    prefix = f"{OBJECT_URL_PREFIX}%"
+    urls = union_all(
+        select(Book.cover_image_url.label("url")).where(Book.cover_image_url.like(prefix)),
+        select(Read.read_vibe_photo_url).where(Read.read_vibe_photo_url.like(prefix)),
+        select(User.profile_photo_url).where(User.profile_photo_url.like(prefix)),
+    ).subquery()
+
+    counts = Counter()
+    for url, count in db.execute(select(urls.c.url, func.count()).group_by(urls.c.url)):
+        digest = digest_from_url(url)
+        if digest:
+            counts[digest] += count
+    return counts
+
+
+class MediaStore:
+    """Writes objects by content hash and collects unreferenced ones"""
+
+    def __init__(self, media_root: str):
+        self.media_root = Path(media_root)
+
+    @property
+    def objects_root(self) -> Path:
+        return self.media_root / OBJECTS_DIR
+
+    def incoming_path(self) -> Path:
+        """A fresh temp path for an upload whose digest is not known yet"""
+        incoming = self.objects_root / INCOMING_DIR
+        incoming.mkdir(parents=True, exist_ok=True)
+        return incoming / f"{uuid.uuid4().hex}.tmp"
+
+    def commit(self, temp_path: Path, digest: str, extension: str) -> Tuple[Path, str, bool]:
+        """
+        Move a fully written temp file to its content address.
+        Returns (path, url, created); created is False if the bytes were
+        already stored, in which case the temp file is discarded.
+        """
+        relative = object_relative_path(digest, extension)
+        path = self.media_root / relative
+        if path.exists():
+            os.remove(temp_path)
+            # Refresh the mtime so a pending GC run treats it as a new upload
+            os.utime(path)
+            return path, f"/media/{relative}", False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_path, path)
+        return path, f"/media/{relative}", True
+
+    def store_bytes(self, data: bytes, extension: str) -> Tuple[Path, str, bool]:
+        """Store an in-memory image (see commit for the return value)"""
+        temp_path = self.incoming_path()
+        temp_path.write_bytes(data)
+        return self.commit(temp_path, hashlib.sha256(data).hexdigest(), extension)
+
+    def collect_garbage(self, db: Session, grace_seconds: float = 24 * 3600, dry_run: bool = False) -> Dict:
+        """
+        Delete objects (and their derivatives) that no row references and
+        that were last written more than grace_seconds ago. Abandoned
+        incoming temp files past the grace period are removed as well.
+        """
+        referenced = reference_counts(db)
+        cutoff = time.time() - grace_seconds
+
+        groups: Dict[str, list] = {}
+        for path in self.objects_root.glob("*/*/*"):
+            match = _DIGEST_RE.match(path.name)
+            if match and path.is_file():
+                groups.setdefault(match.group(1), []).append(path)
+
+        result = {
+            'objects_scanned': len(groups),
+            'objects_referenced': sum(1 for digest in groups if referenced.get(digest)),
+            'objects_deleted': 0,
+            'files_deleted': 0,
+            'bytes_freed': 0,
+        }
+        doomed = []
+        for digest, paths in groups.items():
+            if referenced.get(digest):
+                continue
+            if max(p.stat().st_mtime for p in paths) > cutoff:
+                continue
+            result['objects_deleted'] += 1
+            doomed.extend(paths)
+
+        doomed.extend(
+            p for p in (self.objects_root / INCOMING_DIR).glob("*.tmp") if p.stat().st_mtime <= cutoff
+        )
+        for path in doomed:
+            result['bytes_freed'] += path.stat().st_size
+            result['files_deleted'] += 1
+            if not dry_run:
+                path.unlink(missing_ok=True)
+
+        logger.info(f"Media garbage collection{' (dry run)' if dry_run else ''}: {result}")
+        return result
+
+
+media_store = MediaStore(settings.MEDIA_ROOT)
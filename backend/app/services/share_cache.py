@@ -0,0 +1,190 @@
+"""
+Cache of public share-page payloads.
+
+GET /api/shareable-links/token/{token} is unauthenticated and was a link
+lookup, a joined book/user/author load and a latest-read query per hit.
+Rendered payloads are cached by token with an ETag, so repeat views (and
+304 revalidations) cost only the endpoint's indexed link lookup, which also
+makes revocation and expiry take effect at once in every worker. An entry
+lives for SHARE_CACHE_TTL_SECONDS but never past its link's expires_at.
+
+Entries are dropped when their link, book, the book's reads or the sharing
+user are inserted, updated or deleted through the ORM (again after commit,
+as in the principal cache). The TTL bounds staleness of the book content
+for changes made elsewhere (other workers, bulk UPDATEs such as cover
+ingestion).
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.book import Book
+from app.models.read import Read
+from app.models.shareable_link import ShareableLink
+from app.models.user import User
+
+
+@dataclass(frozen=True)
+class CachedShare:
+    """A rendered share payload"""
+    link_id: int
+    book_id: int
+    user_id: int
+    body: bytes
+    etag: str
+    expires_at: float  # time.monotonic() deadline
+
+
+class SharePayloadCache:
+    """Thread-safe LRU of share payloads with per-entry deadlines"""
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CachedShare]" = OrderedDict()
+        self._by_book: Dict[int, Set[str]] = {}
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl_seconds > 0
+
+    def get(self, token: str) -> Optional[CachedShare]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(token)
+                return None
+            self._entries.move_to_end(token)
+            return entry
+
+    def put(self, token: str, link: ShareableLink, body: bytes) -> CachedShare:
+        """Cache a rendered payload for a valid link and return the entry"""
+        expires_at = link.expires_at
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        link_seconds_left = (expires_at - datetime.now(timezone.utc)).total_seconds()
+        entry = CachedShare(
+            link_id=link.id,
+            book_id=link.book_id,
+            user_id=link.user_id,
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            expires_at=time.monotonic() + min(self.ttl_seconds, link_seconds_left),
+        )
+        if not self.enabled or link_seconds_left <= 0:
+            return entry
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = entry
+            self._by_book.setdefault(entry.book_id, set()).add(token)
+            self._by_user.setdefault(entry.user_id, set()).add(token)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def invalidate_token(self, token: str) -> None:
+        with self._lock:
+            self._remove(token)
+
+    def invalidate_book(self, book_id: int) -> None:
+        with self._lock:
+            for token in list(self._by_book.get(book_id, ())):
+                self._remove(token)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_book.clear()
+            self._by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        for index, key in ((self._by_book, entry.book_id), (self._by_user, entry.user_id)):
+            tokens = index.get(key)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del index[key]
+
+
+share_cache = SharePayloadCache(settings.SHARE_CACHE_SIZE, settings.SHARE_CACHE_TTL_SECONDS)
+
+_PENDING_KEY = "share_cache_invalidations"
+
+
+def _invalidation(target) -> Optional[tuple]:
+    """(kind, key) of the cache entries a changed row affects"""
+    if isinstance(target, ShareableLink):
+        return ("token", target.token)
+    if isinstance(target, Book):
+        return ("book", target.id)
+    if isinstance(target, Read):
+        return ("book", target.book_id)
+    if isinstance(target, User):
+        return ("user", target.id)
+    return None
+
+
+def _apply(invalidation: tuple) -> None:
+    kind, key = invalidation
+    if key is None:
+        return
+    if kind == "token":
+        share_cache.invalidate_token(key)
+    elif kind == "book":
+        share_cache.invalidate_book(key)
+    else:
+        share_cache.invalidate_user(key)
+
+
+def _invalidate_row(mapper, connection, target) -> None:
+    invalidation = _invalidation(target)
+    if invalidation is None:
+        return
+    _apply(invalidation)
+    # Again after commit, in case a concurrent request re-cached the old payload
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(invalidation)
+
+
+for _model in (ShareableLink, Book, Read, User):
+    event.listen(_model, "after_update", _invalidate_row)
+    event.listen(_model, "after_delete", _invalidate_row)
+# A new read can become the "latest read" shown on the page
+event.listen(Read, "after_insert", _invalidate_row)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    for invalidation in session.info.pop(_PENDING_KEY, ()):
+        _apply(invalidation)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
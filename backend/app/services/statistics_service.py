@@ -4,17 +4,18 @@ All statistics are based on reads (not books) as the first-class citizen
 """
 from datetime import date, datetime, timedelta
 from typing import List, Dict, Optional, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, and_, or_, case, distinct, select
 from collections import defaultdict
 import statistics
 
 from app.models.read import Read
 from app.models.book import Book
-from app.models.comment import Comment
 from app.models.user import User
 from app.core.semesters import calculate_semester_number, get_semester_date_range
 from app.core.enums import Format, BookType
+from app.core.matching import normalize_book_identifier
 
 
 class StatisticsService:
@@ -99,8 +100,11 @@ class StatisticsService:
     
     def calculate_format_breakdown(self, user_id: int, time_dimension: str = "alltime") -> List[Dict]:
         """Calculate format distribution based on reads"""
-        reads = self.get_reads_query(user_id, time_dimension).all()
-        
+        return self.format_breakdown_from_reads(self.get_reads_query(user_id, time_dimension).all())
+    
+    @staticmethod
+    def format_breakdown_from_reads(reads: List[Read]) -> List[Dict]:
+        """Format distribution of already-loaded reads (each with its book)"""
         if not reads:
             return []
         
@@ -215,8 +219,10 @@ class StatisticsService:
     
     def calculate_viewner_rate(self, user_id: int, time_dimension: str = "alltime") -> Tuple[List[Dict], float]:
         """Calculate viewner rate (percentage of reads with reviews) over time"""
-        reads = self.get_reads_query(user_id, time_dimension).all()
-        
+        return self.viewner_rate_from_reads(self.get_reads_query(user_id, time_dimension).all(), time_dimension)
+    
+    def viewner_rate_from_reads(self, reads: List[Read], time_dimension: str = "alltime") -> Tuple[List[Dict], float]:
+        """Viewner rate over already-loaded reads"""
         if not reads:
             return [], 0.0
         
@@ -252,20 +258,15 @@ class StatisticsService:
     
     def calculate_commentu_rate(self, user_id: int, time_dimension: str = "alltime") -> Tuple[List[Dict], float]:
         """Calculate commentu rate (percentage of reads with comments) over time"""
-        reads = self.get_reads_query(user_id, time_dimension).all()
-        
+        return self.commentu_rate_from_reads(self.get_reads_query(user_id, time_dimension).all(), time_dimension)
+    
+    def commentu_rate_from_reads(self, reads: List[Read], time_dimension: str = "alltime") -> Tuple[List[Dict], float]:
+        """Commentu rate over already-loaded reads"""
         if not reads:
             return [], 0.0
         
-        # Get read IDs
-        read_ids = [r.id for r in reads]
-        
-        # Get reads with comments
-        commented_read_ids = self.db.query(Comment.read_id).filter(
-            Comment.read_id.in_(read_ids),
-            Comment.is_deleted == False
-        ).distinct().all()
-        commented_read_ids_set = set(row[0] for row in commented_read_ids)
+        # Reads with comments (denormalized reads.comment_count)
+        commented_read_ids_set = set(r.id for r in reads if r.comment_count)
         
         # Group by time dimension
         grouped = defaultdict(lambda: {"total": 0, "with_comments": 0})
@@ -439,39 +440,8 @@ class StatisticsService:
         return result
     
     def _normalize_book_identifier(self, title: str, author) -> tuple:
-        """Normalize book title and author for matching across users
-        
-        Args:
-            title: Book title string
-            author: Author string or Author object (relationship)
-        """
-        import re
-        # Convert to lowercase, strip whitespace, and normalize multiple spaces to single space
-        # Also remove common punctuation that might differ
-        if title:
-            normalized_title = re.sub(r'\s+', ' ', title.lower().strip())
-            # Remove common punctuation that might differ between entries
-            normalized_title = re.sub(r'[.,;:!?\'"()]', '', normalized_title)
-        else:
-            normalized_title = ""
-        
-        # Handle author - could be string or Author object
-        author_str = None
-        if author:
-            if hasattr(author, 'name'):  # Author object
-                author_str = author.name
-            elif isinstance(author, str):  # String (legacy)
-                author_str = author
-            else:
-                author_str = str(author)
-        
-        if author_str:
-            normalized_author = re.sub(r'\s+', ' ', author_str.lower().strip())
-            # Remove common punctuation
-            normalized_author = re.sub(r'[.,;:!?\'"()]', '', normalized_author)
-        else:
-            normalized_author = ""
-        return (normalized_title, normalized_author)
+        """Normalize book title and author for matching across users"""
+        return normalize_book_identifier(title, author)
     
     def calculate_similar_sentiment(self, threshold: float = 1.5) -> List[Dict]:
         """Calculate books with similar sentiment (low rating std dev)"""
@@ -691,3 +661,28 @@ class StatisticsService:
         
         return result[:limit]
 
+
+
+async def load_summary_reads(db: AsyncSession, user_id: int) -> List[Read]:
+    """get_reads_query(user_id) on an AsyncSession: all-time finished reads with their books"""
+    reads = await db.execute(
+        select(Read).options(selectinload(Read.book)).join(Book).where(
+            Read.user_id == user_id,
+            Read.read_status == "READ",
+            Read.date_finished.isnot(None)
+        )
+    )
+    return list(reads.scalars().all())
+
+
+async def count_community_books(db: AsyncSession, min_user_count: int = 2) -> int:
+    """
+    Number of books (grouped by books.match_key, the same normalized
+    title|author key calculate_community_reads_in_common groups by) that at
+    least min_user_count users have finished.
+    """
+    shared = select(Book.match_key).join(Read, Read.book_id == Book.id).where(
+        Read.read_status == "READ",
+        Read.date_finished.isnot(None)
+    ).group_by(Book.match_key).having(func.count(distinct(Read.user_id)) >= min_user_count)
+    return (await db.execute(select(func.count()).select_from(shared.subquery()))).scalar()
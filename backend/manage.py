@@ -0,0 +1,240 @@
+"""
+Maintenance commands for CookBomPy
+
+Usage (from the backend directory):
+    python manage.py reconcile-reactions
+    python manage.py reconcile-comment-counts
+    python manage.py resync-completionist [--batch-size N]
+    python manage.py prune-revoked-tokens
+    python manage.py ingest-bibliography AUTHORS_DUMP [--works WORKS_DUMP] [--batch-size N]
+    python manage.py gc-media [--grace-hours H] [--dry-run]
+    python manage.py ingest-covers [--limit N] [--max-connections N] [--per-host N]
+    python manage.py sweep-shareable-links [--purge-after-days N]
+    python manage.py benchmark-sqlite [--workers N] [--transactions N]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.core.sqlite_benchmark import run_write_benchmark
+from app.database import SessionLocal, sqlite_pragmas
+from app.models import *  # noqa: F401,F403 - register all models with the mapper
+from app.services.comment_service import reconcile_reaction_counts, reconcile_read_comment_counts
+from app.core.token_revocation import revocation_store
+from app.services.bibliography_ingest import BibliographyIngestor
+from app.services.completionist_service import CompletionistService
+from app.services.cover_ingest import CoverIngestor
+from app.services.link_sweeper import sweep_expired_links
+from app.services.media_store import media_store
+
+
+def reconcile_reactions(args) -> None:
+    """Repair drift in comments.reaction_counts"""
+    db = SessionLocal()
+    try:
+        repaired = reconcile_reaction_counts(db)
+        print(f"Repaired reaction counts on {repaired} comment(s)")
+    finally:
+        db.close()
+
+
+def reconcile_comment_counts(args) -> None:
+    """Repair drift in reads.comment_count"""
+    db = SessionLocal()
+    try:
+        repaired = reconcile_read_comment_counts(db)
+        print(f"Repaired comment counts on {repaired} read(s)")
+    finally:
+        db.close()
+
+
+def resync_completionist(args) -> None:
+    """Rebuild user_author_progress and achievements for all users"""
+    db = SessionLocal()
+    try:
+        result = CompletionistService(db).bulk_resync(batch_size=args.batch_size)
+        db.commit()
+        print(
+            f"Resynced {result['pairs_scanned']} user/author pair(s) in {result['elapsed_seconds']}s: "
+            f"{result['progress_inserted']} inserted, {result['progress_updated']} updated, "
+            f"{result['canons_created']} canon(s) created, "
+            f"{result['achievements_awarded']} achievement(s) awarded, "
+            f"{result['leaderboard_updated']} leaderboard row(s) refreshed"
+        )
+    finally:
+        db.close()
+
+
+def prune_revoked_tokens(args) -> None:
+    """Delete revoked refresh-token ids whose tokens have expired"""
+    db = SessionLocal()
+    try:
+        pruned = revocation_store.prune(db)
+        print(f"Pruned {pruned} expired revoked token(s)")
+    finally:
+        db.close()
+
+
+def ingest_bibliography(args) -> None:
+    """Load author bibliographies from Open Library dump files, then resync progress"""
+    db = SessionLocal()
+    try:
+        result = BibliographyIngestor(db, batch_size=args.batch_size).ingest(args.authors, args.works)
+        db.commit()
+        print(
+            f"Matched {result['authors_matched']} author(s) in {result['elapsed_seconds']}s: "
+            f"{result['works_inserted']} work(s) inserted, {result['works_updated']} updated, "
+            f"{result['duplicates_skipped']} duplicate(s) skipped, "
+            f"{result['authors_ambiguous']} ambiguous author name(s) left unmatched"
+        )
+        if result['works_inserted'] or result['works_updated']:
+            # Canon totals changed, so completion percentages need recomputing
+            resync_completionist(args)
+    finally:
+        db.close()
+
+
+def gc_media(args) -> None:
+    """Delete stored media that no book, read or user references"""
+    db = SessionLocal()
+    try:
+        result = media_store.collect_garbage(db, grace_seconds=args.grace_hours * 3600, dry_run=args.dry_run)
+        print(
+            f"{'Would delete' if args.dry_run else 'Deleted'} {result['objects_deleted']} orphaned object(s) "
+            f"({result['files_deleted']} file(s), {result['bytes_freed']} bytes) of "
+            f"{result['objects_scanned']} scanned; {result['objects_referenced']} referenced"
+        )
+    finally:
+        db.close()
+
+
+def ingest_covers(args) -> None:
+    """Download remote book covers into the media store and rewrite their URLs"""
+    db = SessionLocal()
+    try:
+        ingestor = CoverIngestor(db, max_connections=args.max_connections, per_host_limit=args.per_host)
+        result = asyncio.run(ingestor.run(limit=args.limit))
+        db.commit()
+        print(
+            f"Ingested {result['urls_found']} remote cover URL(s) in {result['elapsed_seconds']}s: "
+            f"{result['downloaded']} downloaded, {result['deduplicated']} already stored, "
+            f"{result['skipped']} skipped, {result['failed']} failed; "
+            f"{result['books_updated']} book(s) updated"
+        )
+    finally:
+        db.close()
+
+
+def sweep_shareable_links(args) -> None:
+    """Revoke expired shareable links and optionally purge old revoked ones"""
+    db = SessionLocal()
+    try:
+        result = sweep_expired_links(db, purge_after_days=args.purge_after_days)
+        print(f"Revoked {result['revoked']} expired link(s), purged {result['purged']} revoked link(s)")
+    finally:
+        db.close()
+
+
+def benchmark_sqlite(args) -> None:
+    """Compare concurrent write throughput without and with the SQLite tuning profile"""
+    for label, pragmas in (("baseline", sqlite_pragmas(tuned=False)), ("tuned", sqlite_pragmas(tuned=True))):
+        result = run_write_benchmark(pragmas, workers=args.workers, transactions=args.transactions)
+        print(
+            f"{label:>8}: {result['transactions_per_second']} tx/s "
+            f"({result['committed']} committed, {result['failed']} failed in {result['elapsed_seconds']}s)"
+        )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="CookBomPy maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reconcile_parser = subparsers.add_parser(
+        "reconcile-reactions",
+        help="Recount comment reactions and repair denormalized counters"
+    )
+    reconcile_parser.set_defaults(func=reconcile_reactions)
+
+    comment_counts_parser = subparsers.add_parser(
+        "reconcile-comment-counts",
+        help="Recount comments per read and repair reads.comment_count"
+    )
+    comment_counts_parser.set_defaults(func=reconcile_comment_counts)
+
+    resync_parser = subparsers.add_parser(
+        "resync-completionist",
+        help="Rebuild completionist progress and achievements for all users"
+    )
+    resync_parser.add_argument("--batch-size", type=int, default=500, help="Rows per insert/update batch")
+    resync_parser.set_defaults(func=resync_completionist)
+
+    prune_parser = subparsers.add_parser(
+        "prune-revoked-tokens",
+        help="Delete revoked refresh-token ids whose tokens have expired"
+    )
+    prune_parser.set_defaults(func=prune_revoked_tokens)
+
+    ingest_parser = subparsers.add_parser(
+        "ingest-bibliography",
+        help="Load author bibliographies from Open Library dump files (.txt or .txt.gz)"
+    )
+    ingest_parser.add_argument("authors", help="Authors dump, or the combined all-types dump")
+    ingest_parser.add_argument("--works", help="Works dump (defaults to the authors dump)")
+    ingest_parser.add_argument("--batch-size", type=int, default=1000, help="Rows per insert/update batch")
+    ingest_parser.set_defaults(func=ingest_bibliography)
+
+    gc_parser = subparsers.add_parser(
+        "gc-media",
+        help="Delete content-addressed media that nothing references"
+    )
+    gc_parser.add_argument(
+        "--grace-hours", type=float, default=24,
+        help="Keep orphans written within this many hours (uploads not yet saved on a row)"
+    )
+    gc_parser.add_argument("--dry-run", action="store_true", help="Report what would be deleted")
+    gc_parser.set_defaults(func=gc_media)
+
+    covers_parser = subparsers.add_parser(
+        "ingest-covers",
+        help="Download remote book covers once and serve them from local media"
+    )
+    covers_parser.add_argument("--limit", type=int, help="Only ingest this many distinct URLs")
+    covers_parser.add_argument(
+        "--max-connections", type=int, default=settings.COVER_INGEST_MAX_CONNECTIONS,
+        help="Concurrent downloads overall"
+    )
+    covers_parser.add_argument(
+        "--per-host", type=int, default=settings.COVER_INGEST_PER_HOST_LIMIT,
+        help="Concurrent downloads per host"
+    )
+    covers_parser.set_defaults(func=ingest_covers)
+
+    sweep_parser = subparsers.add_parser(
+        "sweep-shareable-links",
+        help="Revoke expired shareable links"
+    )
+    sweep_parser.add_argument(
+        "--purge-after-days", type=int, default=settings.SHARE_LINK_PURGE_AFTER_DAYS,
+        help="Also delete links revoked more than this many days ago (0 keeps them)"
+    )
+    sweep_parser.set_defaults(func=sweep_shareable_links)
+
+    benchmark_parser = subparsers.add_parser(
+        "benchmark-sqlite",
+        help="Measure concurrent SQLite write throughput with and without the tuning profile"
+    )
+    benchmark_parser.add_argument("--workers", type=int, default=4, help="Concurrent writer threads")
+    benchmark_parser.add_argument("--transactions", type=int, default=250, help="Write transactions per worker")
+    benchmark_parser.set_defaults(func=benchmark_sqlite)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
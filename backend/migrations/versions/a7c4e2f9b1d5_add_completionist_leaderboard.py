@@ -0,0 +1,51 @@
+"""add_completionist_leaderboard
+
+Revision ID: a7c4e2f9b1d5
+Revises: f6b1d4e8a3c9
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c4e2f9b1d5'
+down_revision = 'f6b1d4e8a3c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Materialized leaderboard, one row per user with tracked authors
+    op.create_table(
+        'completionist_leaderboard',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('authors_completed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_authors_tracked', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('avg_completion', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(
+        'ix_completionist_leaderboard_rank',
+        'completionist_leaderboard',
+        [sa.text('authors_completed DESC'), sa.text('avg_completion DESC'), 'user_id']
+    )
+    
+    # Backfill from existing progress
+    op.execute("""
+        INSERT INTO completionist_leaderboard (user_id, authors_completed, total_authors_tracked, avg_completion)
+        SELECT user_id,
+               SUM(CASE WHEN completion_percentage >= 100 THEN 1 ELSE 0 END),
+               COUNT(id),
+               AVG(completion_percentage)
+        FROM user_author_progress
+        GROUP BY user_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_completionist_leaderboard_rank', table_name='completionist_leaderboard')
+    op.drop_table('completionist_leaderboard')
@@ -0,0 +1,25 @@
+"""add_completionist_leaderboard_position_index
+
+Revision ID: b3d9f1a6c2e7
+Revises: e1a8c6d4f9b3
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d9f1a6c2e7'
+down_revision = 'e1a8c6d4f9b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Leaderboard pages are range scans on the stored rank
+    op.create_index('ix_completionist_leaderboard_position', 'completionist_leaderboard', ['rank'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_completionist_leaderboard_position', table_name='completionist_leaderboard')
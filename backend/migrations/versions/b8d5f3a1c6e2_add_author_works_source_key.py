@@ -0,0 +1,27 @@
+"""add_author_works_source_key
+
+Revision ID: b8d5f3a1c6e2
+Revises: a7c4e2f9b1d5
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d5f3a1c6e2'
+down_revision = 'a7c4e2f9b1d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Upstream record key (e.g. Open Library work key) for incremental bibliography reloads
+    op.add_column('author_works', sa.Column('source_key', sa.String(length=100), nullable=True))
+    op.create_index(op.f('ix_author_works_source_key'), 'author_works', ['source_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_author_works_source_key'), table_name='author_works')
+    op.drop_column('author_works', 'source_key')
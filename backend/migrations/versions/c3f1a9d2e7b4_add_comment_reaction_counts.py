@@ -0,0 +1,46 @@
+"""add_comment_reaction_counts
+
+Revision ID: c3f1a9d2e7b4
+Revises: 75872fb16116
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f1a9d2e7b4'
+down_revision = '75872fb16116'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Denormalized reaction counters: {reaction_type: count}
+    op.add_column(
+        'comments',
+        sa.Column('reaction_counts', sa.JSON(), nullable=False, server_default='{}')
+    )
+    
+    # Backfill counters from existing reactions
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("""
+        SELECT comment_id, reaction_type, COUNT(id)
+        FROM comment_reactions
+        GROUP BY comment_id, reaction_type
+    """)).fetchall()
+    counts = {}
+    for comment_id, reaction_type, count in rows:
+        counts.setdefault(comment_id, {})[reaction_type] = count
+    for comment_id, reaction_counts in counts.items():
+        conn.execute(
+            sa.text("UPDATE comments SET reaction_counts = :counts WHERE id = :id"),
+            {"counts": json.dumps(reaction_counts), "id": comment_id}
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('comments', 'reaction_counts')
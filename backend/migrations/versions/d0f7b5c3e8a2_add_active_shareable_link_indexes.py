@@ -0,0 +1,34 @@
+"""add_active_shareable_link_indexes
+
+Revision ID: d0f7b5c3e8a2
+Revises: c9e6a4b2d7f1
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd0f7b5c3e8a2'
+down_revision = 'c9e6a4b2d7f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Partial indexes over unrevoked links (owner lookup, expiry sweep)
+    active = sa.text('is_revoked = false') if op.get_bind().dialect.name == 'postgresql' else sa.text('is_revoked = 0')
+    op.create_index(
+        'ix_shareable_links_active_owner', 'shareable_links', ['user_id', 'book_id', 'expires_at'],
+        unique=False, sqlite_where=active, postgresql_where=active
+    )
+    op.create_index(
+        'ix_shareable_links_active_expires_at', 'shareable_links', ['expires_at'],
+        unique=False, sqlite_where=active, postgresql_where=active
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_shareable_links_active_expires_at', table_name='shareable_links')
+    op.drop_index('ix_shareable_links_active_owner', table_name='shareable_links')
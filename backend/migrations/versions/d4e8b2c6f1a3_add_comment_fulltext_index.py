@@ -0,0 +1,61 @@
+"""add_comment_fulltext_index
+
+Revision ID: d4e8b2c6f1a3
+Revises: c3f1a9d2e7b4
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4e8b2c6f1a3'
+down_revision = 'c3f1a9d2e7b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        # FTS5 external-content table over comments.content, synced by triggers
+        op.execute("""
+            CREATE VIRTUAL TABLE comments_fts USING fts5(
+                content, content='comments', content_rowid='id', tokenize='porter unicode61'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER comments_fts_ai AFTER INSERT ON comments BEGIN
+                INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER comments_fts_ad AFTER DELETE ON comments BEGIN
+                INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER comments_fts_au AFTER UPDATE OF content ON comments BEGIN
+                INSERT INTO comments_fts(comments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                INSERT INTO comments_fts(rowid, content) VALUES (new.id, new.content);
+            END
+        """)
+        # Index existing comments
+        op.execute("INSERT INTO comments_fts(comments_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute(
+            "CREATE INDEX ix_comments_content_fts ON comments "
+            "USING gin (to_tsvector('english'::regconfig, content))"
+        )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS comments_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS comments_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS comments_fts_ai")
+        op.execute("DROP TABLE IF EXISTS comments_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_comments_content_fts")
@@ -0,0 +1,37 @@
+"""add_completionist_leaderboard_rank
+
+Revision ID: e1a8c6d4f9b3
+Revises: d0f7b5c3e8a2
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1a8c6d4f9b3'
+down_revision = 'd0f7b5c3e8a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Stored position so rank lookups are a primary-key read
+    op.add_column('completionist_leaderboard', sa.Column('rank', sa.Integer(), nullable=True))
+    
+    # Backfill in leaderboard order
+    bind = op.get_bind()
+    user_ids = bind.execute(sa.text("""
+        SELECT user_id FROM completionist_leaderboard
+        ORDER BY authors_completed DESC, avg_completion DESC, user_id ASC
+    """)).scalars().all()
+    if user_ids:
+        bind.execute(
+            sa.text("UPDATE completionist_leaderboard SET rank = :rank WHERE user_id = :user_id"),
+            [{'rank': rank, 'user_id': user_id} for rank, user_id in enumerate(user_ids, 1)]
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('completionist_leaderboard', 'rank')
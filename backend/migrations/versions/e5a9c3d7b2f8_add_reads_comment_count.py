@@ -0,0 +1,39 @@
+"""add_reads_comment_count
+
+Revision ID: e5a9c3d7b2f8
+Revises: d4e8b2c6f1a3
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a9c3d7b2f8'
+down_revision = 'd4e8b2c6f1a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Denormalized count of non-deleted comments per read
+    op.add_column(
+        'reads',
+        sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0')
+    )
+    
+    # Backfill from existing comments
+    op.execute("""
+        UPDATE reads
+        SET comment_count = (
+            SELECT COUNT(comments.id)
+            FROM comments
+            WHERE comments.read_id = reads.id
+              AND comments.is_deleted = false
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('reads', 'comment_count')
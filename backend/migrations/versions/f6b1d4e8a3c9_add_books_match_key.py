@@ -0,0 +1,54 @@
+"""add_books_match_key
+
+Revision ID: f6b1d4e8a3c9
+Revises: e5a9c3d7b2f8
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6b1d4e8a3c9'
+down_revision = 'e5a9c3d7b2f8'
+branch_labels = None
+depends_on = None
+
+
+def _normalize(value):
+    # Frozen copy of app.core.matching normalization as of this revision
+    if not value:
+        return ""
+    normalized = re.sub(r'\s+', ' ', value.lower().strip())
+    return re.sub(r'[.,;:!?\'"()]', '', normalized)
+
+
+def _match_key(title, author):
+    return f"{_normalize(title)}|{_normalize(author)}"
+
+
+def upgrade() -> None:
+    # Normalized "title|author" key for cross-user book matching
+    op.add_column('books', sa.Column('match_key', sa.String(1010), nullable=True))
+    op.create_index(op.f('ix_books_match_key'), 'books', ['match_key'], unique=False)
+    
+    # Backfill in Python with the normalization the ORM hook used at this revision
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("""
+        SELECT books.id, books.title, books.author, authors.name
+        FROM books
+        LEFT JOIN authors ON authors.id = books.author_id
+    """)).fetchall()
+    for book_id, title, legacy_author, author_name in rows:
+        conn.execute(
+            sa.text("UPDATE books SET match_key = :match_key WHERE id = :id"),
+            {"match_key": _match_key(title, author_name or legacy_author), "id": book_id}
+        )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_books_match_key'), table_name='books')
+    op.drop_column('books', 'match_key')
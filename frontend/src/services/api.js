@@ -46,6 +46,25 @@ api.interceptors.request.use(
 )
 console.log('[API] Request interceptor registered')
 
+// Exchange the stored refresh token for a new token pair.
+// Concurrent 401s share one in-flight refresh (refresh tokens are single-use).
+let refreshPromise = null
+const refreshTokens = () => {
+  if (!refreshPromise) {
+    const refreshToken = localStorage.getItem('refresh_token')
+    refreshPromise = axios.post(`${api.defaults.baseURL}/auth/refresh`, { refresh_token: refreshToken })
+      .then((response) => {
+        localStorage.setItem('access_token', response.data.access_token)
+        localStorage.setItem('refresh_token', response.data.refresh_token)
+        return response.data.access_token
+      })
+      .finally(() => {
+        refreshPromise = null
+      })
+  }
+  return refreshPromise
+}
+
 // Response interceptor for error handling
 console.log('[API] Setting up response interceptor...')
 api.interceptors.response.use(
@@ -53,7 +72,7 @@ api.interceptors.response.use(
     console.log('[API] Response interceptor (success):', { status: response.status, url: response.config.url, method: response.config.method })
     return response
   },
-  (error) => {
+  async (error) => {
     console.error('[API] Response interceptor (error):', { 
       message: error.message, 
       status: error.response?.status, 
@@ -61,6 +80,20 @@ api.interceptors.response.use(
       method: error.config?.method 
     })
     
+    const originalRequest = error.config
+    const isAuthRequest = originalRequest?.url?.startsWith('/auth/login') || originalRequest?.url?.startsWith('/auth/refresh')
+    if (error.response?.status === 401 && originalRequest && !originalRequest._retried && !isAuthRequest && localStorage.getItem('refresh_token')) {
+      console.log('[API] 401 Unauthorized detected, refreshing access token...')
+      originalRequest._retried = true
+      try {
+        const accessToken = await refreshTokens()
+        originalRequest.headers.Authorization = `Bearer ${accessToken}`
+        return api(originalRequest)
+      } catch (refreshError) {
+        console.log('[API] Token refresh failed')
+      }
+    }
+    
     if (error.response?.status === 401) {
       console.log('[API] 401 Unauthorized detected, clearing tokens...')
       // Token expired or invalid - clear tokens
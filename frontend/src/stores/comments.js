@@ -241,6 +241,38 @@ export const useCommentsStore = defineStore('comments', () => {
     }
   }
 
+  // Live updates over Server-Sent Events. Returns a function that closes the stream.
+  const subscribeToComments = (readId = null, semesterId = null) => {
+    const path = readId ? `/comments/read/${readId}/stream` : `/comments/semester/${semesterId}/stream`
+    const token = localStorage.getItem('access_token')
+    const source = new EventSource(`${api.defaults.baseURL}${path}?token=${encodeURIComponent(token || '')}`)
+    const getItems = () => readId
+      ? commentsByRead.value[readId]?.items
+      : commentsBySemester.value[semesterId]?.items
+    const refresh = () => {
+      const pagination = getPagination.value(readId, semesterId)
+      fetchComments(readId, semesterId, pagination.page || 1, pagination.page_size || 20)
+    }
+
+    source.addEventListener('comment-created', refresh)
+    source.addEventListener('comment-deleted', refresh)
+    source.addEventListener('reaction-changed', (event) => {
+      const { comment_id, reactions } = JSON.parse(event.data)
+      const updateReactions = (comments) => {
+        for (const comment of comments || []) {
+          if (comment.id === comment_id) {
+            comment.reactions = reactions
+            return
+          }
+          updateReactions(comment.replies)
+        }
+      }
+      updateReactions(getItems())
+    })
+
+    return () => source.close()
+  }
+
   const clearComments = (readId = null, semesterId = null) => {
     if (readId) {
       delete commentsByRead.value[readId]
@@ -272,6 +304,7 @@ export const useCommentsStore = defineStore('comments', () => {
     toggleReaction,
     fetchReactionUsers,
     searchComments,
+    subscribeToComments,
     clearComments
   }
 })
@@ -1,3 +1,7 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
@@ -5,7 +9,13 @@ from sqlalchemy.orm import sessionmaker
 from app.main import app
 from app.database import Base, get_db
 from app.models.user import User
+from app.models.revoked_token import RevokedToken
+from app.core.token_revocation import revocation_store
 from app.core.security import get_password_hash
+from app.core.principal_cache import principal_cache
+from app.core.password_pool import PasswordPool, PasswordPoolBusy, login_throttle
+from app.config import settings
+from passlib.context import CryptContext
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
@@ -108,3 +118,134 @@ def test_get_current_user(client, test_user):
     assert "id" in response.json()
     assert "email" in response.json()
 
+
+
+def _login_headers(client):
+    login_response = client.post("/api/auth/login", data={
+        "username": "testuser",
+        "password": "testpassword123"
+    })
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+
+def test_principal_cache_serves_repeat_requests_and_invalidates_on_change(client, test_user):
+    headers = _login_headers(client)
+    client.get("/api/auth/me", headers=headers)
+    hits = principal_cache.hits
+    
+    assert client.get("/api/auth/me", headers=headers).status_code == 200
+    assert principal_cache.hits == hits + 1
+    
+    # Preference updates invalidate the cached principal
+    client.put("/api/users/me", headers=headers, json={"color_theme": "forest"})
+    assert client.get("/api/users/me", headers=headers).json()["color_theme"] == "forest"
+    
+    # So does deactivation
+    db = TestingSessionLocal()
+    try:
+        db.query(User).filter(User.username == "testuser").one().is_active = False
+        db.commit()
+    finally:
+        db.close()
+    assert client.get("/api/auth/me", headers=headers).status_code == 400
+
+
+def test_login_attempts_are_throttled_per_identifier(client, test_user, monkeypatch):
+    monkeypatch.setattr(login_throttle, "max_attempts", 2)
+    for _ in range(2):
+        response = client.post("/api/auth/login", data={"username": "testuser", "password": "wrong"})
+        assert response.status_code == 401
+    
+    response = client.post("/api/auth/login", data={"username": "TestUser", "password": "testpassword123"})
+    assert response.status_code == 429
+    assert client.post("/api/auth/login", data={"username": "other", "password": "x"}).status_code == 401
+    login_throttle.reset("testuser")
+
+
+def test_login_rehashes_lower_cost_passwords_when_enabled(client, monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_REHASH_ON_LOGIN", True)
+    db = TestingSessionLocal()
+    try:
+        cheap_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("oldpassword1")
+        db.add(User(username="legacy", email="legacy@example.com", password_hash=cheap_hash))
+        db.commit()
+    finally:
+        db.close()
+    
+    response = client.post("/api/auth/login", data={"username": "legacy", "password": "oldpassword1"})
+    assert response.status_code == 200
+    
+    db = TestingSessionLocal()
+    try:
+        new_hash = db.query(User).filter(User.username == "legacy").one().password_hash
+        assert new_hash.startswith(f"$2b${settings.BCRYPT_ROUNDS}$")
+    finally:
+        db.close()
+
+
+def test_password_pool_rejects_work_beyond_max_pending():
+    pool = PasswordPool(workers=0, max_pending=1, rounds=4)
+    assert pool.verify("secret", pool.hash("secret"))
+    
+    pool._slots.acquire()  # Simulate a call already in flight
+    try:
+        with pytest.raises(PasswordPoolBusy):
+            pool.hash("secret")
+    finally:
+        pool._slots.release()
+
+
+def test_password_pool_timeouts_and_crashes_fail_as_busy():
+    pool = PasswordPool(workers=1, max_pending=1, rounds=4, timeout=0.2)
+    try:
+        with pytest.raises(PasswordPoolBusy):
+            pool._submit(time.sleep, 1.5)
+        # Still running in the worker, so it still holds the only slot
+        with pytest.raises(PasswordPoolBusy):
+            pool.hash("secret")
+        assert pool._slots.acquire(timeout=10)  # Released once the sleep finishes
+        pool._slots.release()
+
+        pool.timeout = 30
+        with pytest.raises(PasswordPoolBusy):
+            pool._submit(os._exit, 1)  # Worker process dies
+        # The broken pool is replaced and the slot was returned
+        assert pool.verify("secret", pool.hash("secret"))
+    finally:
+        pool.shutdown()
+
+
+def test_refresh_rotates_tokens_and_rejects_reuse(client, test_user):
+    login_response = client.post("/api/auth/login", data={
+        "username": "testuser",
+        "password": "testpassword123"
+    })
+    old_refresh = login_response.json()["refresh_token"]
+    
+    response = client.post("/api/auth/refresh", json={"refresh_token": old_refresh})
+    assert response.status_code == 200
+    tokens = response.json()
+    assert tokens["refresh_token"] != old_refresh
+    me = client.get("/api/auth/me", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert me.json()["username"] == "testuser"
+    
+    # The rotated-out token cannot be used again; access tokens are not refresh tokens
+    assert client.post("/api/auth/refresh", json={"refresh_token": old_refresh}).status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": tokens["access_token"]}).status_code == 401
+    assert client.post("/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 200
+
+
+def test_prune_removes_only_expired_revocations(client):
+    db = TestingSessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        db.add_all([
+            RevokedToken(jti="expired", expires_at=now - timedelta(days=1)),
+            RevokedToken(jti="live", expires_at=now + timedelta(days=1)),
+        ])
+        db.commit()
+        
+        assert revocation_store.prune(db) == 1
+        assert [t.jti for t in db.query(RevokedToken)] == ["live"]
+    finally:
+        db.close()
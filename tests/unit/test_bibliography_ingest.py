@@ -0,0 +1,134 @@
+import gzip
+import json
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import *  # noqa: F401,F403 - register all models with the mapper
+from app.models.author import Author
+from app.models.author_canon import AuthorCanon, AuthorWork
+from app.services.bibliography_ingest import BibliographyIngestor
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+FIXTURE_DUMP = os.path.join(os.path.dirname(__file__), "fixtures", "ol_dump_sample.txt")
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    session.add_all([
+        Author(name="Frank Herbert", normalized_name="frank herbert"),
+        Author(name="Jane Austen", normalized_name="jane austen"),
+    ])
+    session.commit()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _works(db, author_name):
+    return sorted(
+        (w.title, w.publication_year)
+        for w in db.query(AuthorWork).join(AuthorCanon).join(Author).filter(Author.name == author_name)
+    )
+
+
+def test_ingest_loads_deduplicated_works_for_known_authors(db):
+    result = BibliographyIngestor(db, batch_size=2).ingest(FIXTURE_DUMP)
+    db.commit()
+
+    assert result["authors_matched"] == 2
+    assert result["works_inserted"] == 3
+    assert result["duplicates_skipped"] == 1  # "Dune." is the same work as "Dune"
+    assert _works(db, "Frank Herbert") == [("Dune", 1965), ("Dune Messiah", 1969)]
+    assert _works(db, "Jane Austen") == [("Pride and Prejudice", 1813)]
+
+    herbert = db.query(Author).filter_by(name="Frank Herbert").one()
+    canon = db.query(AuthorCanon).filter_by(author_id=herbert.id).one()
+    assert canon.total_works_count == 2
+    assert canon.bibliography_source == "openlibrary"
+    assert canon.is_living is False
+    assert herbert.death_year == 1986
+
+
+def test_reingest_is_incremental(db, tmp_path):
+    BibliographyIngestor(db).ingest(FIXTURE_DUMP)
+    db.commit()
+
+    # A newer gzipped dump: one work retitled, one new work
+    with open(FIXTURE_DUMP) as f:
+        lines = f.read().replace('"title": "Dune Messiah"', '"title": "Dune Messiah (Revised)"')
+    new_work = {"key": "/works/OL893417W", "title": "Children of Dune", "first_publish_date": "1976",
+                "authors": [{"author": {"key": "/authors/OL79034A"}}]}
+    lines += f"/type/work\t/works/OL893417W\t1\t2024-06-01T00:00:00\t{json.dumps(new_work)}\n"
+    newer = tmp_path / "ol_dump_newer.txt.gz"
+    with gzip.open(newer, "wt", encoding="utf-8") as f:
+        f.write(lines)
+
+    result = BibliographyIngestor(db).ingest(str(newer))
+    db.commit()
+
+    assert (result["works_inserted"], result["works_updated"]) == (1, 1)
+    assert _works(db, "Frank Herbert") == [
+        ("Children of Dune", 1976), ("Dune", 1965), ("Dune Messiah (Revised)", 1969)
+    ]
+    assert db.query(AuthorWork).count() == 4
+
+
+def _write_author_dump(tmp_path, records):
+    dump = tmp_path / "ol_dump_authors.txt"
+    dump.write_text("".join(
+        f"/type/author\t{r['key']}\t1\t2024-05-01T10:00:00\t{json.dumps(r)}\n" for r in records
+    ))
+    return str(dump)
+
+
+def test_living_status_follows_the_local_death_year(db, tmp_path):
+    austen = db.query(Author).filter_by(name="Jane Austen").one()
+    austen.death_year = 1817
+    db.commit()
+
+    # Austen's record has no death date
+    dump = _write_author_dump(tmp_path, [
+        {"key": "/authors/OL79034A", "name": "Frank Herbert", "death_date": "1986"},
+        {"key": "/authors/OL21594A", "name": "Jane Austen"},
+    ])
+
+    BibliographyIngestor(db).ingest(dump)
+    db.commit()
+
+    living = {author.name: canon.is_living for canon, author in db.query(AuthorCanon, Author).join(Author)}
+    assert living == {"Frank Herbert": False, "Jane Austen": False}
+    assert db.query(Author).filter_by(name="Frank Herbert").one().death_year == 1986
+
+
+def test_namesake_authors_are_not_merged(db, tmp_path):
+    records = [
+        {"key": "/authors/OL79034A", "name": "Frank Herbert", "death_date": "1986"},
+        {"key": "/authors/OL21594A", "name": "Jane Austen"},
+        {"key": "/authors/OL9999A", "name": "Frank Herbert"},
+    ]
+    works = [
+        {"key": "/works/OL893415W", "title": "Dune", "authors": [{"author": {"key": "/authors/OL79034A"}}]},
+        {"key": "/works/OL1W", "title": "Garden Birds", "authors": [{"author": {"key": "/authors/OL9999A"}}]},
+        {"key": "/works/OL66554W", "title": "Emma", "authors": [{"author": {"key": "/authors/OL21594A"}}]},
+    ]
+    dump = _write_author_dump(tmp_path, records)
+    with open(dump, "a") as f:
+        f.write("".join(
+            f"/type/work\t{w['key']}\t1\t2024-05-01T10:00:00\t{json.dumps(w)}\n" for w in works
+        ))
+
+    result = BibliographyIngestor(db).ingest(dump)
+    db.commit()
+
+    assert (result["authors_matched"], result["authors_ambiguous"]) == (1, 1)
+    assert _works(db, "Frank Herbert") == []
+    assert _works(db, "Jane Austen") == [("Emma", None)]
+    assert db.query(Author).filter_by(name="Frank Herbert").one().death_year is None
@@ -0,0 +1,115 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.main import app
+from app.database import Base, get_async_db, get_db
+from app.services.completionist_service import progress_updater
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# NullPool: TestClient runs each request on a fresh event loop
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    Base.metadata.create_all(bind=engine)
+    yield TestClient(app)
+    progress_updater.flush()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _auth_headers(client, username):
+    client.post("/api/auth/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "password123"
+    })
+    response = client.post("/api/auth/login", data={
+        "username": username,
+        "password": "password123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _add_book(client, headers, title, author, date_finished=None, review=None):
+    book = client.post("/api/books", headers=headers, json={
+        "title": title,
+        "author": author,
+        "description": "A book.",
+        "format": "PAPERBACK"
+    }).json()
+    if date_finished:
+        client.post(f"/api/reads?book_id={book['id']}", headers=headers, json={
+            "read_status": "READ",
+            "date_finished": date_finished,
+            "review": review
+        })
+    return book
+
+
+def _titles(response):
+    assert response.status_code == 200
+    return [book["title"] for book in response.json()["items"]]
+
+
+def test_async_book_list_filters_sorts_and_pages(client):
+    alice = _auth_headers(client, "alice")
+    _add_book(client, alice, "Dune", "Frank Herbert", "2024-03-01", review="Spice.")
+    _add_book(client, alice, "Emma", "Jane Austen", "2024-01-15")
+    _add_book(client, alice, "Persuasion", "Jane Austen")
+    _add_book(client, _auth_headers(client, "bob"), "Bob's Book", "Jane Austen", "2024-02-01")
+
+    # Default sort: most recently read first, unread last
+    assert _titles(client.get("/api/books", headers=alice)) == ["Dune", "Emma", "Persuasion"]
+    assert _titles(client.get("/api/books?sort=author_asc", headers=alice))[0] == "Dune"
+    assert _titles(client.get("/api/books?read_status=UNREAD", headers=alice)) == ["Persuasion"]
+    assert _titles(client.get("/api/books?has_review=true", headers=alice)) == ["Dune"]
+    # The author filter and the general search both use the authors table
+    assert _titles(client.get("/api/books?author=austen&search=emma", headers=alice)) == ["Emma"]
+
+    page = client.get("/api/books?sort=title_asc&page=2&page_size=2", headers=alice).json()
+    assert (page["total"], page["total_pages"]) == (3, 2)
+    assert [book["title"] for book in page["items"]] == ["Persuasion"]
+    # Reads and their users are loaded up front for the response
+    listed = client.get("/api/books?sort=title_asc", headers=alice).json()["items"]
+    assert listed[0]["author_name"] == "Frank Herbert"
+    assert [read["user"]["username"] for read in listed[0]["reads"]] == ["alice"]
+
+
+def test_async_book_list_serves_concurrent_requests(client):
+    alice = _auth_headers(client, "alice")
+    _add_book(client, alice, "Dune", "Frank Herbert", "2024-03-01")
+
+    async def fetch_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*(async_client.get("/api/books", headers=alice) for _ in range(20)))
+
+    responses = asyncio.run(fetch_all())
+
+    assert {response.status_code for response in responses} == {200}
+    assert {tuple(_titles(response)) for response in responses} == {("Dune",)}
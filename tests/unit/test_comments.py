@@ -0,0 +1,285 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.main import app
+from app.database import Base, apply_sqlite_pragmas, get_async_db, get_db
+from app.models.comment import Comment, CommentReaction
+from app.models.user import User
+from app.services.comment_service import reconcile_reaction_counts, toggle_reaction
+from app.services.completionist_service import progress_updater
+from app.services.event_broker import broker, read_channel, COMMENT_CREATED
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# NullPool: TestClient runs each request on a fresh event loop
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    Base.metadata.create_all(bind=engine)
+    yield TestClient(app)
+    progress_updater.flush()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _auth_headers(client, username):
+    client.post("/api/auth/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "password123"
+    })
+    response = client.post("/api/auth/login", data={
+        "username": username,
+        "password": "password123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def comment_setup(client):
+    """Two users, a book and read owned by the first, and one comment on it"""
+    owner = _auth_headers(client, "owner")
+    friend = _auth_headers(client, "friend")
+    book = client.post("/api/books", headers=owner, json={
+        "title": "Dune",
+        "author": "Frank Herbert",
+        "description": "Spice.",
+        "format": "PAPERBACK"
+    }).json()
+    read = client.post(f"/api/reads?book_id={book['id']}", headers=owner, json={
+        "read_status": "READ"
+    }).json()
+    comment = client.post("/api/comments", headers=friend, json={
+        "read_id": read["id"],
+        "content": "Loved this one"
+    }).json()
+    return {"owner": owner, "friend": friend, "read": read, "comment": comment}
+
+
+def test_toggle_reaction_updates_counters(client, comment_setup):
+    comment_id = comment_setup["comment"]["id"]
+    owner, friend = comment_setup["owner"], comment_setup["friend"]
+
+    response = client.post(f"/api/comments/{comment_id}/reactions", headers=owner, json={"reaction_type": "heart"})
+    assert response.status_code == 200
+    assert response.json()["reactions"] == {"heart": {"count": 1}}
+    assert response.json()["current_user_reactions"] == ["heart"]
+
+    response = client.post(f"/api/comments/{comment_id}/reactions", headers=friend, json={"reaction_type": "heart"})
+    assert response.json()["reactions"] == {"heart": {"count": 2}}
+
+    # Toggling again removes the reaction and decrements the counter
+    response = client.post(f"/api/comments/{comment_id}/reactions", headers=owner, json={"reaction_type": "heart"})
+    assert response.json()["reactions"] == {"heart": {"count": 1}}
+    assert response.json()["current_user_reactions"] == []
+
+    db = TestingSessionLocal()
+    try:
+        assert db.get(Comment, comment_id).reaction_counts == {"heart": 1}
+    finally:
+        db.close()
+
+
+def test_concurrent_reaction_toggles_do_not_lose_updates(client, comment_setup):
+    comment_id = comment_setup["comment"]["id"]
+
+    db = TestingSessionLocal()
+    try:
+        users = dict(db.query(User.username, User.id))
+
+        # Another writer commits a reaction after this toggle has read the comment
+        fired = []
+
+        def concurrent_toggle(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().startswith("SELECT comment_reactions") and not fired:
+                fired.append(True)
+                other = TestingSessionLocal()
+                try:
+                    toggle_reaction(other, comment_id, users["friend"], "heart")
+                finally:
+                    other.close()
+
+        event.listen(engine, "after_cursor_execute", concurrent_toggle)
+        try:
+            reactions, _ = toggle_reaction(db, comment_id, users["owner"], "heart")
+        finally:
+            event.remove(engine, "after_cursor_execute", concurrent_toggle)
+        assert fired
+        assert reactions == {"heart": {"count": 2}}
+        db.expire_all()
+        assert db.get(Comment, comment_id).reaction_counts == {"heart": 2}
+    finally:
+        db.close()
+
+
+def test_comment_list_reads_counters(client, comment_setup):
+    comment_id = comment_setup["comment"]["id"]
+    friend = comment_setup["friend"]
+    client.post(f"/api/comments/{comment_id}/reactions", headers=friend, json={"reaction_type": "clap"})
+
+    response = client.get(f"/api/comments/read/{comment_setup['read']['id']}", headers=friend)
+    assert response.status_code == 200
+    item = response.json()["items"][0]
+    assert item["reactions"] == {"clap": {"count": 1}}
+    assert item["current_user_reactions"] == ["clap"]
+
+
+def test_comment_list_shows_live_replies_in_order(client, comment_setup):
+    owner, read_id = comment_setup["owner"], comment_setup["read"]["id"]
+    parent_id = comment_setup["comment"]["id"]
+    replies = [
+        client.post("/api/comments", headers=owner, json={
+            "read_id": read_id, "content": content, "parent_comment_id": parent_id
+        }).json()
+        for content in ("First", "Removed", "Last")
+    ]
+    client.delete(f"/api/comments/{replies[1]['id']}", headers=owner)
+    client.post(f"/api/comments/{replies[2]['id']}/reactions", headers=owner, json={"reaction_type": "heart"})
+
+    response = client.get(f"/api/comments/read/{read_id}", headers=owner)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total"] == 1
+    listed = body["items"][0]["replies"]
+    assert [(r["content"], r["user"]["username"]) for r in listed] == [("First", "owner"), ("Last", "owner")]
+    assert listed[1]["current_user_reactions"] == ["heart"]
+    assert client.get("/api/comments/read/9999", headers=owner).status_code == 404
+
+
+def test_reconcile_reaction_counts_repairs_drift(client, comment_setup):
+    comment_id = comment_setup["comment"]["id"]
+    client.post(f"/api/comments/{comment_id}/reactions", headers=comment_setup["friend"], json={"reaction_type": "book"})
+
+    db = TestingSessionLocal()
+    try:
+        # Simulate drift: a reaction row removed without touching the counter
+        db.query(CommentReaction).filter(CommentReaction.comment_id == comment_id).delete()
+        db.commit()
+
+        assert reconcile_reaction_counts(db) == 1
+        db.expire_all()
+        assert db.get(Comment, comment_id).reaction_counts == {}
+        assert reconcile_reaction_counts(db) == 0
+    finally:
+        db.close()
+
+
+def test_search_comments_ranked_with_snippets(client, comment_setup):
+    friend, read_id = comment_setup["friend"], comment_setup["read"]["id"]
+    for content in ["Spice must flow <b>", "The desert planet", "Spice and sandworms, spice everywhere"]:
+        client.post("/api/comments", headers=friend, json={"read_id": read_id, "content": content})
+
+    response = client.get("/api/comments/search", headers=friend, params={"q": "spice", "page_size": 1})
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["items"]) == 1
+    assert body["has_more"] is True
+    # Repeated term ranks first; snippet is highlighted
+    first = body["items"][0]
+    assert first["content"] == "Spice and sandworms, spice everywhere"
+    assert "<mark>Spice</mark>" in first["snippet"]
+
+    response = client.get("/api/comments/search", headers=friend, params={
+        "q": "spice", "page_size": 1, "cursor": body["next_cursor"]
+    })
+    second = response.json()
+    assert second["items"][0]["content"] == "Spice must flow <b>"
+    assert "&lt;b&gt;" in second["items"][0]["snippet"]
+    assert second["has_more"] is False
+
+
+def test_search_comments_excludes_deleted(client, comment_setup):
+    comment_id = comment_setup["comment"]["id"]
+    client.delete(f"/api/comments/{comment_id}", headers=comment_setup["owner"])
+
+    response = client.get("/api/comments/search", headers=comment_setup["friend"], params={"q": "loved"})
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+
+
+def test_search_comments_rejects_bad_cursor(client, comment_setup):
+    response = client.get("/api/comments/search", headers=comment_setup["friend"], params={
+        "q": "loved", "cursor": "not-a-cursor"
+    })
+    assert response.status_code == 400
+
+
+def test_create_comment_publishes_live_event(client, comment_setup):
+    read_id = comment_setup["read"]["id"]
+
+    async def scenario():
+        async with broker.subscribe(read_channel(read_id)) as subscription:
+            await asyncio.to_thread(
+                client.post,
+                "/api/comments",
+                headers=comment_setup["owner"],
+                json={"read_id": read_id, "content": "Thanks!"}
+            )
+            event = await asyncio.wait_for(subscription.get(), timeout=1)
+            assert event.type == COMMENT_CREATED
+            assert event.data["content"] == "Thanks!"
+
+    asyncio.run(scenario())
+
+
+def test_comment_stream_requires_existing_read(client, comment_setup):
+    token = comment_setup["friend"]["Authorization"].split()[1]
+    response = client.get("/api/comments/read/9999/stream", params={"token": token})
+    assert response.status_code == 404
+    response = client.get("/api/comments/read/9999/stream")
+    assert response.status_code == 401
+
+
+def test_read_comment_count_tracks_create_and_delete(client, comment_setup):
+    owner, read_id = comment_setup["owner"], comment_setup["read"]["id"]
+    reply = client.post("/api/comments", headers=owner, json={
+        "read_id": read_id,
+        "content": "Me too",
+        "parent_comment_id": comment_setup["comment"]["id"]
+    }).json()
+
+    response = client.get(f"/api/reads/book/{comment_setup['read']['book_id']}/community", headers=owner)
+    assert response.json()[0]["comment_count"] == 2
+
+    # Soft delete decrements once, even if repeated
+    client.delete(f"/api/comments/{reply['id']}", headers=owner)
+    client.delete(f"/api/comments/{reply['id']}", headers=owner)
+    response = client.get(f"/api/reads/book/{comment_setup['read']['book_id']}/community", headers=owner)
+    assert response.json()[0]["comment_count"] == 1
+
+
+def test_drop_all_removes_search_index_with_foreign_keys_enforced(tmp_path):
+    fk_engine = create_engine(f"sqlite:///{tmp_path / 'fts.db'}")
+    event.listen(fk_engine, "connect", lambda conn, _: apply_sqlite_pragmas(conn, {"foreign_keys": "ON"}))
+    try:
+        Base.metadata.create_all(bind=fk_engine)
+        Base.metadata.drop_all(bind=fk_engine)
+        assert inspect(fk_engine).get_table_names() == []
+        with fk_engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT name FROM sqlite_master").fetchall() == []
+    finally:
+        fk_engine.dispose()
+
@@ -0,0 +1,351 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.config import settings
+from app.database import Base, apply_sqlite_pragmas, get_db
+from app.models.author import Author
+from app.models.author_canon import (
+    AuthorCanon,
+    AuthorWork,
+    UserAuthorProgress,
+    CompletionAchievement,
+    CompletionistLeaderboardEntry,
+)
+from app.models.user import User
+from app.services.completionist_service import CompletionistService, progress_updater
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    yield TestClient(app)
+    progress_updater.flush()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _auth_headers(client, username):
+    client.post("/api/auth/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "password123"
+    })
+    response = client.post("/api/auth/login", data={
+        "username": username,
+        "password": "password123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _add_book_with_read(client, headers, title, author, date_finished):
+    book = client.post("/api/books", headers=headers, json={
+        "title": title,
+        "author": author,
+        "description": "A book.",
+        "format": "PAPERBACK"
+    }).json()
+    client.post(f"/api/reads?book_id={book['id']}", headers=headers, json={
+        "read_status": "READ",
+        "date_finished": date_finished
+    })
+    return book
+
+
+def test_bulk_resync_rebuilds_progress_and_awards_achievements(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_USERNAMES", ["admin"])
+    alice = _auth_headers(client, "alice")
+    admin = _auth_headers(client, "admin")
+    first = _add_book_with_read(client, alice, "Dune", "Frank Herbert", "2024-01-10")
+    latest = _add_book_with_read(client, alice, "Dune Messiah", "Frank Herbert", "2024-03-02")
+    progress_updater.flush()
+
+    # Simulate a lost progress table
+    db = TestingSessionLocal()
+    try:
+        db.query(CompletionAchievement).delete()
+        db.query(UserAuthorProgress).delete()
+        db.query(AuthorCanon).update({"total_works_count": 2})
+        db.commit()
+    finally:
+        db.close()
+
+    assert client.post("/api/completionist/admin/resync", headers=alice).status_code == 403
+
+    response = client.post("/api/completionist/admin/resync", headers=admin)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["progress_inserted"] == 1
+    assert result["progress_updated"] == 0
+    assert result["achievements_awarded"] == 2  # canon_complete, nearly_there
+
+    db = TestingSessionLocal()
+    try:
+        progress = db.query(UserAuthorProgress).one()
+        assert progress.books_read_count == 2
+        assert progress.completion_percentage == 100
+        assert progress.first_book_read_id == first["id"]
+        assert progress.most_recent_book_read_id == latest["id"]
+
+        # A second run finds nothing to change
+        again = CompletionistService(db).bulk_resync()
+        assert (again["progress_inserted"], again["progress_updated"], again["achievements_awarded"]) == (0, 0, 0)
+    finally:
+        db.close()
+
+
+def test_author_detail_matches_works_by_normalized_title_and_isbn(client):
+    alice = _auth_headers(client, "alice")
+    dune = _add_book_with_read(client, alice, "Dune.", "Frank Herbert", "2024-01-10")
+    client.post("/api/books", headers=alice, json={
+        "title": "Messiah (1st ed)",
+        "author": "Frank Herbert",
+        "isbn_13": "978-0-593-09823-5",
+        "description": "A book.",
+        "format": "PAPERBACK"
+    }).json()
+    progress_updater.flush()
+
+    db = TestingSessionLocal()
+    try:
+        canon = db.query(AuthorCanon).one()
+        db.add_all([
+            AuthorWork(author_canon_id=canon.id, title="Dune", publication_year=1965),
+            AuthorWork(author_canon_id=canon.id, title="Dune Messiah", publication_year=1969,
+                       isbn_13="9780593098235"),
+            AuthorWork(author_canon_id=canon.id, title="Children of Dune", publication_year=1976),
+        ])
+        db.commit()
+        canon_id = canon.id
+    finally:
+        db.close()
+
+    response = client.get(f"/api/completionist/authors/{canon_id}", headers=alice)
+    assert response.status_code == 200
+    timeline = response.json()["timeline"]
+    assert [(t["title"], t["read"], t.get("book_id")) for t in timeline] == [
+        ("Dune", True, dune["id"]),
+        ("Dune Messiah", False, None),
+        ("Children of Dune", False, None),
+    ]
+    recommendations = response.json()["recommendations"]
+    assert [r["title"] for r in recommendations] == ["Dune Messiah"]
+
+
+def _count_queries(fn):
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+    return result, len(statements)
+
+
+def test_author_progress_list_query_count_is_independent_of_page_size(client):
+    alice = _auth_headers(client, "alice")
+    _add_book_with_read(client, alice, "Dune", "Frank Herbert", "2024-01-10")
+    progress_updater.flush()
+    _, single = _count_queries(lambda: client.get("/api/completionist/authors", headers=alice))
+
+    _add_book_with_read(client, alice, "Emma", "Jane Austen", "2024-02-01")
+    _add_book_with_read(client, alice, "Persuasion", "Jane Austen", "2024-02-20")
+    _add_book_with_read(client, alice, "Kindred", "Octavia Butler", "2024-03-05")
+    progress_updater.flush()
+    response, several = _count_queries(lambda: client.get("/api/completionist/authors", headers=alice))
+
+    assert several == single
+    authors = {a["author_name"]: a for a in response.json()["authors"]}
+    assert authors["Jane Austen"]["books_read"] == 2
+    assert authors["Jane Austen"]["first_read"]["title"] == "Emma"
+    assert authors["Jane Austen"]["most_recent_read"]["title"] == "Persuasion"
+
+
+def test_leaderboard_is_refreshed_incrementally_and_ranks_any_user(client):
+    headers = {name: _auth_headers(client, name) for name in ("ann", "ben", "cat", "dan")}
+    _add_book_with_read(client, headers["ann"], "Dune", "Frank Herbert", "2024-01-10")
+    progress_updater.flush()
+
+    db = TestingSessionLocal()
+    try:
+        # Read-driven progress updates refresh the leaderboard row too
+        ann_id = db.query(UserAuthorProgress.user_id).scalar()
+        assert db.get(CompletionistLeaderboardEntry, ann_id).authors_completed == 1
+
+        # Seed ben/cat/dan with progress on new authors and rebuild
+        users = {u.username: u.id for u in db.query(User)}
+        for name, percentages in (("ben", [100, 100]), ("cat", [100, 40]), ("dan", [50])):
+            for i, pct in enumerate(percentages):
+                author = Author(name=f"{name} author {i}", normalized_name=f"{name} author {i}")
+                db.add(author)
+                db.flush()
+                canon = AuthorCanon(author_id=author.id)
+                db.add(canon)
+                db.flush()
+                db.add(UserAuthorProgress(user_id=users[name], author_canon_id=canon.id,
+                                          completion_percentage=pct))
+        db.flush()
+        CompletionistService(db).refresh_leaderboard()
+        db.commit()
+
+        # Ranks are stored at refresh time: ben (2 complete), ann (1 @ 100%), cat (1 @ 70%), dan (0)
+        ranks = {users[n]: r for n, r in (("ben", 1), ("ann", 2), ("cat", 3), ("dan", 4))}
+        assert {e.user_id: e.rank for e in db.query(CompletionistLeaderboardEntry)} == ranks
+    finally:
+        db.close()
+
+    response = client.get("/api/completionist/leaderboard?page=2&page_size=2", headers=headers["dan"])
+    body = response.json()
+    assert body["user_rank"] == 4
+    assert body["total_users"] == 4
+    assert [(e["rank"], e["username"]) for e in body["entries"]] == [(3, "cat"), (4, "dan")]
+
+    response = client.get(
+        "/api/completionist/leaderboard?around_me=true&window=1&page=3&page_size=1", headers=headers["ann"]
+    )
+    body = response.json()
+    assert body["user_rank"] == 2
+    assert [(e["rank"], e["username"]) for e in body["entries"]] == [(1, "ben"), (2, "ann"), (3, "cat")]
+    # The page reported is the one the caller sits on, not the one requested
+    assert body["page"] == 2
+
+
+def test_incremental_refresh_renumbers_stored_ranks(client):
+    db = TestingSessionLocal()
+    try:
+        users = []
+        for name, pct in (("amy", 100), ("bob", 60), ("cy", 30)):
+            user = User(username=name, email=f"{name}@example.com", password_hash="x")
+            author = Author(name=f"{name} author", normalized_name=f"{name} author")
+            db.add_all([user, author])
+            db.flush()
+            canon = AuthorCanon(author_id=author.id)
+            db.add(canon)
+            db.flush()
+            db.add(UserAuthorProgress(user_id=user.id, author_canon_id=canon.id,
+                                      completion_percentage=pct))
+            users.append(user.id)
+        db.flush()
+        service = CompletionistService(db)
+        service.refresh_leaderboard()
+        assert [service.get_leaderboard_rank(u) for u in users] == [1, 2, 3]
+
+        # cy completes their author; refreshing only cy moves everyone else down
+        db.query(UserAuthorProgress).filter(UserAuthorProgress.user_id == users[2]).update(
+            {UserAuthorProgress.completion_percentage: 100}
+        )
+        service.refresh_leaderboard([users[2]])
+        assert [service.get_leaderboard_rank(u) for u in users] == [1, 3, 2]
+
+        # Dropping off the board closes the gap
+        db.query(UserAuthorProgress).filter(UserAuthorProgress.user_id == users[0]).delete()
+        service.refresh_leaderboard([users[0]])
+        assert [service.get_leaderboard_rank(u) for u in users] == [None, 2, 1]
+    finally:
+        db.close()
+
+
+
+def test_refresh_rewrites_only_the_disturbed_rank_interval(client):
+    db = TestingSessionLocal()
+    try:
+        users = []
+        for i, pct in enumerate((90, 80, 70, 60, 50, 40, 30, 20)):
+            user = User(username=f"reader{i}", email=f"reader{i}@example.com", password_hash="x")
+            author = Author(name=f"author {i}", normalized_name=f"author {i}")
+            db.add_all([user, author])
+            db.flush()
+            canon = AuthorCanon(author_id=author.id)
+            db.add(canon)
+            db.flush()
+            db.add(UserAuthorProgress(user_id=user.id, author_canon_id=canon.id,
+                                      completion_percentage=pct))
+            users.append(user.id)
+        db.flush()
+        service = CompletionistService(db)
+        service.refresh_leaderboard()
+
+        rank_writes = []
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE completionist_leaderboard SET rank"):
+                rank_writes.extend(parameters if executemany else [parameters])
+
+        def refresh(user_id, pct):
+            db.query(UserAuthorProgress).filter(UserAuthorProgress.user_id == user_id).update(
+                {UserAuthorProgress.completion_percentage: pct}
+            )
+            rank_writes.clear()
+            event.listen(engine, "before_cursor_execute", before_execute)
+            try:
+                service.refresh_leaderboard([user_id])
+            finally:
+                event.remove(engine, "before_cursor_execute", before_execute)
+            return len(rank_writes)
+
+        # Rank 6 climbing to rank 3 moves ranks 3..6 only
+        assert refresh(users[5], 75) == 4
+        order = [users[i] for i in (0, 1, 5, 2, 3, 4, 6, 7)]
+        assert [service.get_leaderboard_rank(u) for u in order] == list(range(1, 9))
+
+        # A value change that keeps the position writes nothing
+        assert refresh(users[5], 72) == 0
+        assert service.get_leaderboard_rank(users[5]) == 3
+
+        rows, total = service.get_leaderboard_page(3, 5)
+        assert total == 8
+        assert [(entry.rank, entry.user_id) for entry, _, _ in rows] == [
+            (3, users[5]), (4, users[2]), (5, users[3])
+        ]
+    finally:
+        db.close()
+
+
+def test_deleting_a_read_book_with_foreign_keys_enforced(client):
+    fk_engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+    event.listen(fk_engine, "connect", lambda conn, _: apply_sqlite_pragmas(conn, {"foreign_keys": "ON"}))
+    FKSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=fk_engine)
+
+    def override_get_fk_db():
+        db = FKSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_fk_db
+    try:
+        headers = _auth_headers(client, "alice")
+        dune = _add_book_with_read(client, headers, "Dune", "Frank Herbert", "2024-01-10")
+        messiah = _add_book_with_read(client, headers, "Dune Messiah", "Frank Herbert", "2024-03-02")
+        progress_updater.flush()
+
+        assert client.delete(f"/api/books/{messiah['id']}", headers=headers).status_code == 204
+        progress_updater.flush()
+
+        db = FKSessionLocal()
+        try:
+            progress = db.query(UserAuthorProgress).one()
+            assert (progress.first_book_read_id, progress.most_recent_book_read_id) == (dune["id"], dune["id"])
+        finally:
+            db.close()
+    finally:
+        app.dependency_overrides[get_db] = override_get_db
+        fk_engine.dispose()
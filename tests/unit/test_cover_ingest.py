@@ -0,0 +1,228 @@
+import asyncio
+import io
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.enums import Format
+from app.database import Base
+from app.models import *  # noqa: F401,F403 - register all models with the mapper
+from app.models.book import Book
+from app.models.user import User
+from app.services.cover_ingest import CoverIngestor
+from app.services.media_store import MediaStore
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _image(size=(40, 60), fmt="JPEG") -> bytes:
+    data = io.BytesIO()
+    Image.new("RGB", size, "navy").save(data, format=fmt)
+    return data.getvalue()
+
+
+class StubCoverServer:
+    """Local HTTP server standing in for Google Books / Open Library"""
+
+    def __init__(self):
+        self.routes = {}  # path -> list of (status, content type, body), last one repeats
+        self.hits = Counter()
+        self.in_flight = Counter()
+        self.max_in_flight = Counter()
+        self.delay = 0.0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                host = self.headers["Host"].split(":")[0]
+                with stub._lock:
+                    stub.hits[self.path] += 1
+                    stub.in_flight[host] += 1
+                    stub.max_in_flight[host] = max(stub.max_in_flight[host], stub.in_flight[host])
+                    responses = stub.routes.get(self.path, [(404, "text/plain", b"missing")])
+                    status, content_type, body = responses[min(stub.hits[self.path], len(responses)) - 1]
+                time.sleep(stub.delay)
+                with stub._lock:
+                    stub.in_flight[host] -= 1
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if status == 503:
+                    self.send_header("Retry-After", "0")
+                if 300 <= status < 400:
+                    self.send_header("Location", body.decode())
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, path, host="127.0.0.1"):
+        return f"http://{host}:{self.port}{path}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubCoverServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    session.add(User(username="reader", email="reader@example.com", password_hash="x"))
+    session.commit()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _add_books(db, *cover_urls):
+    user = db.query(User).one()
+    books = [
+        Book(user_id=user.id, title=f"Book {i}", author="Someone", format=Format.PAPERBACK, cover_image_url=url)
+        for i, url in enumerate(cover_urls)
+    ]
+    db.add_all(books)
+    db.commit()
+    return books
+
+
+def _ingestor(db, tmp_path, **kwargs):
+    # The stub server is on loopback, which the default settings refuse to fetch from
+    kwargs.setdefault("allowed_hosts", ("127.0.0.1", "localhost"))
+    kwargs.setdefault("allow_private_addresses", True)
+    return CoverIngestor(db, store=MediaStore(str(tmp_path)), derivatives=None, backoff_seconds=0.01, **kwargs)
+
+
+def test_remote_covers_are_downloaded_once_and_rewritten(db, tmp_path, stub):
+    cover = _image()
+    stub.routes["/cover.jpg"] = [(200, "image/jpeg", cover)]
+    stub.routes["/same-bytes.jpg"] = [(200, "image/jpeg", cover)]
+    stub.routes["/placeholder.gif"] = [(200, "image/png", _image((1, 1), "PNG"))]
+    stub.routes["/page.html"] = [(200, "text/html", b"<html></html>")]
+    remote = stub.url("/cover.jpg")
+    books = _add_books(
+        db, remote, remote, stub.url("/same-bytes.jpg"), stub.url("/placeholder.gif"),
+        stub.url("/page.html"), stub.url("/gone.jpg"), "/media/objects/aa/bb/local.jpg", None
+    )
+
+    result = asyncio.run(_ingestor(db, tmp_path).run())
+    db.commit()
+
+    assert result["urls_found"] == 5
+    assert (result["downloaded"], result["deduplicated"], result["skipped"], result["failed"]) == (1, 1, 1, 2)
+    assert result["books_updated"] == 3
+    assert stub.hits["/cover.jpg"] == 1
+
+    urls = [db.get(Book, book.id).cover_image_url for book in books]
+    assert urls[0] == urls[1] == urls[2]
+    assert urls[0].startswith("/media/objects/") and urls[0].endswith(".jpg")
+    assert (tmp_path / urls[0][len("/media/"):]).read_bytes() == cover
+    assert urls[3:] == [
+        stub.url("/placeholder.gif"), stub.url("/page.html"), stub.url("/gone.jpg"),
+        "/media/objects/aa/bb/local.jpg", None
+    ]
+
+    # Nothing left to ingest except the ones that stay remote
+    again = asyncio.run(_ingestor(db, tmp_path).run())
+    assert again["books_updated"] == 0
+    assert stub.hits["/cover.jpg"] == 1
+
+
+def test_transient_errors_are_retried_with_backoff(db, tmp_path, stub):
+    stub.routes["/flaky.jpg"] = [(503, "text/plain", b"busy"), (500, "text/plain", b"oops"), (200, "image/jpeg", _image())]
+    stub.routes["/down.jpg"] = [(503, "text/plain", b"busy")]
+    _add_books(db, stub.url("/flaky.jpg"), stub.url("/down.jpg"))
+
+    result = asyncio.run(_ingestor(db, tmp_path, max_attempts=3).run())
+
+    assert (result["downloaded"], result["failed"]) == (1, 1)
+    assert stub.hits["/flaky.jpg"] == 3
+    assert stub.hits["/down.jpg"] == 3
+
+
+def test_downloads_are_limited_per_host(db, tmp_path, stub):
+    stub.delay = 0.05
+    urls = []
+    for i in range(4):
+        stub.routes[f"/{i}.jpg"] = [(200, "image/jpeg", _image((40 + i, 60)))]
+        urls += [stub.url(f"/{i}.jpg"), stub.url(f"/{i}.jpg", host="localhost")]
+    _add_books(db, *urls)
+
+    result = asyncio.run(_ingestor(db, tmp_path, per_host_limit=2).run())
+
+    assert result["downloaded"] == 4 and result["deduplicated"] == 4
+    assert stub.max_in_flight["127.0.0.1"] == 2
+    assert stub.max_in_flight["localhost"] == 2
+
+
+def test_oversized_covers_are_not_stored(db, tmp_path, stub):
+    stub.routes["/huge.jpg"] = [(200, "image/jpeg", _image((400, 600)))]
+    _add_books(db, stub.url("/huge.jpg"))
+
+    result = asyncio.run(_ingestor(db, tmp_path, max_bytes=100).run())
+
+    assert result["failed"] == 1
+    assert not (tmp_path / "objects").exists() or not any((tmp_path / "objects").glob("*/*/*"))
+
+
+def test_unexpected_errors_fail_one_cover_not_the_batch(db, tmp_path, stub):
+    broken = _image((41, 60))
+    stub.routes["/broken.jpg"] = [(200, "image/jpeg", broken)]
+    stub.routes["/fine.jpg"] = [(200, "image/jpeg", _image())]
+    books = _add_books(db, stub.url("/broken.jpg"), stub.url("/fine.jpg"))
+
+    class FlakyDerivatives:
+        async def generate(self, path):
+            if open(path, "rb").read() == broken:
+                raise RuntimeError("decoder crashed")
+
+    ingestor = _ingestor(db, tmp_path)
+    ingestor.derivatives = FlakyDerivatives()
+    result = asyncio.run(ingestor.run())
+    db.commit()
+
+    assert (result["downloaded"], result["failed"], result["books_updated"]) == (1, 1, 1)
+    assert db.get(Book, books[0].id).cover_image_url == stub.url("/broken.jpg")
+    assert db.get(Book, books[1].id).cover_image_url.startswith("/media/objects/")
+
+
+def test_only_allowed_public_hosts_are_fetched(db, tmp_path, stub):
+    stub.routes["/cover.jpg"] = [(200, "image/jpeg", _image())]
+    stub.routes["/hop.jpg"] = [(302, "text/plain", stub.url("/cover.jpg", host="localhost").encode())]
+    _add_books(db, stub.url("/cover.jpg"), "http://169.254.169.254/latest/meta-data/", "file:///etc/passwd")
+
+    # Default settings: loopback and link-local are refused without a request
+    result = asyncio.run(CoverIngestor(db, store=MediaStore(str(tmp_path)), derivatives=None).run())
+    assert (result["skipped"], result["books_updated"]) == (2, 0)
+    assert stub.hits["/cover.jpg"] == 0
+
+    # Even on an allowed host, non-public addresses are refused
+    result = asyncio.run(_ingestor(db, tmp_path, allowed_hosts=("127.0.0.1",), allow_private_addresses=False).run())
+    assert result["skipped"] == 2 and stub.hits["/cover.jpg"] == 0
+
+    # Redirects are checked hop by hop
+    _add_books(db, stub.url("/hop.jpg"))
+    result = asyncio.run(_ingestor(db, tmp_path, allowed_hosts=("127.0.0.1",)).run())
+    assert stub.hits["/hop.jpg"] == 1
+    assert stub.hits["/cover.jpg"] == 1  # Only the direct URL, not via localhost
+    assert result["books_updated"] == 1
@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app import database
+from app.core.enums import Format
+from app.core.sqlite_benchmark import run_write_benchmark
+from app.database import Base, check_sqlite_pragmas, create_sqlite_engine, get_async_db, get_db, sqlite_pragmas
+from app.main import app
+from app.models.book import Book
+from app.models.user import User
+from app.services.completionist_service import progress_updater
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# NullPool: TestClient runs each request on a fresh event loop
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    Base.metadata.create_all(bind=engine)
+    yield TestClient(app)
+    progress_updater.flush()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _auth_headers(client, username):
+    client.post("/api/auth/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "password123"
+    })
+    response = client.post("/api/auth/login", data={
+        "username": username,
+        "password": "password123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_tuning_profile_is_applied_to_every_connection(tmp_path):
+    engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'tuned.db'}", sqlite_pragmas(tuned=True))
+
+    with engine.connect() as connection:
+        pragma = lambda name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == 5000
+        assert pragma("temp_store") == 2  # MEMORY
+        assert pragma("foreign_keys") == 1
+
+    report = check_sqlite_pragmas(engine, sqlite_pragmas(tuned=True))
+    assert all(entry["ok"] for entry in report.values())
+    engine.dispose()
+
+
+def test_self_check_reports_pragmas_that_did_not_apply():
+    # In-memory databases cannot use WAL
+    engine = create_sqlite_engine("sqlite://", sqlite_pragmas(tuned=True))
+
+    report = check_sqlite_pragmas(engine, sqlite_pragmas(tuned=True))
+
+    assert report["journal_mode"] == {"expected": "WAL", "actual": "memory", "ok": False}
+    assert report["synchronous"]["ok"]
+    assert sqlite_pragmas(tuned=False) == {"foreign_keys": "ON"}
+
+
+def test_write_benchmark_runs_concurrent_writers():
+    result = run_write_benchmark(sqlite_pragmas(tuned=True), workers=2, transactions=10)
+
+    assert result["committed"] + result["failed"] == 20
+    assert result["transactions_per_second"] > 0
+
+
+def test_heavy_reads_use_the_replica_and_fall_back_to_the_primary(client, tmp_path, monkeypatch):
+    headers = _auth_headers(client, "reader")
+    client.post("/api/books", headers=headers, json={
+        "title": "On The Primary",
+        "author": "Someone",
+        "description": "Written to the primary.",
+        "format": "PAPERBACK"
+    })
+
+    # A replica that has replicated a different state
+    replica_engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'replica.db'}", sqlite_pragmas())
+    Base.metadata.create_all(bind=replica_engine)
+    with sessionmaker(bind=replica_engine)() as db:
+        db.add(User(id=1, username="reader", email="reader@example.com", password_hash="x"))
+        db.add(Book(user_id=1, title="On The Replica", author="Someone", format=Format.PAPERBACK))
+        db.commit()
+    # The library listing is an async endpoint
+    async_replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}", poolclass=NullPool)
+    monkeypatch.setattr(database, "AsyncReplicaSessionLocal", async_sessionmaker(async_replica))
+    monkeypatch.setattr(database, "_replica_down_until", 0.0)
+
+    listed = client.get("/api/books", headers=headers).json()
+    assert [book["title"] for book in listed["items"]] == ["On The Replica"]
+    # Writes still go to the primary
+    assert client.get("/api/books/1", headers=headers).json()["title"] == "On The Primary"
+
+    unreachable = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'replica.db'}", poolclass=NullPool)
+    monkeypatch.setattr(database, "AsyncReplicaSessionLocal", async_sessionmaker(unreachable))
+    listed = client.get("/api/books", headers=headers).json()
+    assert [book["title"] for book in listed["items"]] == ["On The Primary"]
+    assert database._replica_down_until > 0
+    replica_engine.dispose()
+
+
+def test_replica_sessions_are_read_only(tmp_path, monkeypatch):
+    replica_engine = create_sqlite_engine(f"sqlite:///{tmp_path / 'replica.db'}", sqlite_pragmas())
+    Base.metadata.create_all(bind=replica_engine)
+    monkeypatch.setattr(database, "ReplicaSessionLocal", sessionmaker(bind=replica_engine))
+    monkeypatch.setattr(database, "_replica_down_until", 0.0)
+
+    db = database._replica_session()
+    db.add(User(username="writer", email="writer@example.com", password_hash="x"))
+    with pytest.raises(RuntimeError):
+        db.flush()
+    db.close()
+
+    async_replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}", poolclass=NullPool)
+    monkeypatch.setattr(database, "AsyncReplicaSessionLocal", async_sessionmaker(async_replica))
+
+    async def write_to_async_replica():
+        db = await database._async_replica_session()
+        db.add(User(username="writer", email="writer@example.com", password_hash="x"))
+        try:
+            await db.flush()
+        finally:
+            await db.close()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(write_to_async_replica())
+    replica_engine.dispose()
+
+
+def test_async_database_url_maps_to_async_drivers():
+    assert database.async_database_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert database.async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    with pytest.raises(ValueError):
+        database.async_database_url("mysql://u:p@db/app")
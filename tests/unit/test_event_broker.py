@@ -0,0 +1,121 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from app.services.event_broker import (
+    BrokerBackend,
+    EventBroker,
+    MemoryBackend,
+    SQLiteBackend,
+    COMMENT_CREATED,
+    REACTION_CHANGED,
+    read_channel,
+)
+
+
+def _publish_from_thread(broker, channel, event_type, data):
+    """Publish the way a sync request handler would: from a worker thread"""
+    thread = threading.Thread(target=broker.publish, args=(channel, event_type, data))
+    thread.start()
+    thread.join()
+
+
+def test_memory_broker_delivers_to_channel_subscribers():
+    broker = EventBroker(MemoryBackend())
+
+    async def scenario():
+        async with broker.subscribe(read_channel(1)) as subscription:
+            async with broker.subscribe(read_channel(2)) as other:
+                _publish_from_thread(broker, read_channel(1), COMMENT_CREATED, {"id": 7})
+                event = await asyncio.wait_for(subscription.get(), timeout=1)
+                assert event.type == COMMENT_CREATED
+                assert event.data == {"id": 7}
+                assert other.queue.empty()
+        assert broker.subscriber_count(read_channel(1)) == 0
+
+    asyncio.run(scenario())
+
+
+def test_event_formats_as_sse_frame():
+    broker = EventBroker(MemoryBackend())
+
+    async def scenario():
+        async with broker.subscribe(read_channel(1)) as subscription:
+            broker.publish(read_channel(1), REACTION_CHANGED, {"comment_id": 3})
+            event = await asyncio.wait_for(subscription.get(), timeout=1)
+            assert event.to_sse() == (
+                f"id: {event.id}\nevent: reaction-changed\ndata: {{\"comment_id\": 3}}\n\n"
+            )
+
+    asyncio.run(scenario())
+
+
+def test_incomplete_backend_fails_when_created():
+    class StartOnlyBackend(BrokerBackend):
+        def start(self, deliver):
+            pass
+
+    with pytest.raises(TypeError, match="publish"):
+        StartOnlyBackend()
+
+
+def test_sqlite_backend_fans_out_across_workers(tmp_path):
+    path = str(tmp_path / "events.db")
+    # Two brokers sharing one file stand in for two uvicorn workers
+    publisher = EventBroker(SQLiteBackend(path, poll_interval=0.01))
+    listener = EventBroker(SQLiteBackend(path, poll_interval=0.01))
+
+    async def scenario():
+        async with listener.subscribe(read_channel(5)) as subscription:
+            _publish_from_thread(publisher, read_channel(5), COMMENT_CREATED, {"id": 1})
+            event = await asyncio.wait_for(subscription.get(), timeout=2)
+            assert event.channel == read_channel(5)
+            assert event.data == {"id": 1}
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        publisher.stop()
+        listener.stop()
+
+
+class FlakySQLiteBackend(SQLiteBackend):
+    """Tail connections fail a few times, like a locked or unreachable file"""
+
+    def __init__(self, path, failures):
+        self.failures = failures
+        super().__init__(path, poll_interval=0.01)
+
+    def _connect(self):
+        if threading.current_thread().name == "event-broker-sqlite" and self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError("database is locked")
+        return super()._connect()
+
+
+def test_sqlite_tail_survives_errors_and_bad_rows(tmp_path):
+    path = str(tmp_path / "events.db")
+    publisher = EventBroker(SQLiteBackend(path, poll_interval=0.01))
+    listener = EventBroker(FlakySQLiteBackend(path, failures=3))
+
+    async def scenario():
+        async with listener.subscribe(read_channel(5)) as subscription:
+            conn = sqlite3.connect(path)
+            conn.execute(
+                "INSERT INTO broker_events (channel, event_type, data, created_at) VALUES (?, ?, ?, 0)",
+                (read_channel(5), COMMENT_CREATED, "{not json")
+            )
+            conn.commit()
+            conn.close()
+            _publish_from_thread(publisher, read_channel(5), COMMENT_CREATED, {"id": 2})
+            event = await asyncio.wait_for(subscription.get(), timeout=5)
+            assert event.data == {"id": 2}
+            assert listener.backend.failures == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        publisher.stop()
+        listener.stop()
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import io
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+from app.config import settings
+from app.services.file_upload import FileUploadService
+from app.services.image_derivatives import DerivativePipeline, derivative_pipeline
+from app.services.media_store import media_store
+
+
+def _upload(data: bytes, filename: str = "cover.jpg") -> UploadFile:
+    return UploadFile(
+        file=io.BytesIO(data),
+        filename=filename,
+        headers=Headers({"content-type": "image/jpeg"})
+    )
+
+
+def test_cover_upload_streams_to_content_address(tmp_path):
+    service = FileUploadService(base_media_path=str(tmp_path), derivatives=None)
+    service.CHUNK_SIZE = 4
+    data = b"not really a jpeg, but bytes all the same"
+    digest = hashlib.sha256(data).hexdigest()
+
+    url = asyncio.run(service.upload_cover_image(_upload(data), user_id=1, book_id=7))
+
+    assert url == f"/media/objects/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+    assert (tmp_path / url[len("/media/"):]).read_bytes() == data
+    assert list((tmp_path / "objects" / ".incoming").iterdir()) == []
+
+
+def test_identical_uploads_share_one_object(tmp_path):
+    service = FileUploadService(base_media_path=str(tmp_path), derivatives=None)
+    data = b"the same cover, uploaded by two friends"
+
+    first = asyncio.run(service.upload_cover_image(_upload(data), user_id=1, book_id=7))
+    second = asyncio.run(service.upload_cover_image(_upload(data), user_id=2, book_id=9))
+    other = asyncio.run(service.upload_read_vibe_photo(_upload(b"a different photo"), user_id=2, read_id=3))
+
+    assert first == second
+    assert other != first
+    assert len([p for p in (tmp_path / "objects").glob("*/*/*") if p.is_file()]) == 2
+
+
+def test_oversized_upload_is_rejected_without_leaving_files(tmp_path):
+    service = FileUploadService(base_media_path=str(tmp_path), derivatives=None)
+    service.MAX_FILE_SIZE = 10
+    service.CHUNK_SIZE = 4
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(service.upload_read_vibe_photo(_upload(b"x" * 11), user_id=1, read_id=3))
+
+    assert exc_info.value.status_code == 400
+    assert [p for p in (tmp_path / "objects").rglob("*") if p.is_file()] == []
+
+
+def test_cover_upload_renders_responsive_derivatives(tmp_path):
+    image = io.BytesIO()
+    Image.new("RGB", (800, 1200), "teal").save(image, format="JPEG")
+    pipeline = DerivativePipeline(str(tmp_path), widths=(160, 320, 1600), quality=80, workers=1)
+    service = FileUploadService(base_media_path=str(tmp_path), derivatives=pipeline)
+
+    try:
+        url = asyncio.run(service.upload_cover_image(_upload(image.getvalue()), user_id=1, book_id=7))
+    finally:
+        pipeline.shutdown()
+
+    directory, name = url.rsplit("/", 1)
+    stem = name.split(".")[0]
+    objects = tmp_path / directory[len("/media/"):]
+    assert sorted(p.name for p in objects.iterdir()) == [
+        f"{stem}.jpg", f"{stem}.manifest.json",
+        f"{stem}_160w.jpg", f"{stem}_160w.webp", f"{stem}_320w.jpg", f"{stem}_320w.webp"
+    ]
+    with Image.open(objects / f"{stem}_320w.webp") as variant:
+        assert variant.size == (320, 480)
+    assert pipeline.srcset_for(url) == f"{directory}/{stem}_160w.webp 160w, {directory}/{stem}_320w.webp 320w"
+    assert pipeline.srcset_for(url, "jpeg").endswith(f"{url} 800w")
+    assert pipeline.srcset_for("https://covers.openlibrary.org/b/id/1-L.jpg") is None
+
+    # Endpoints attach srcsets to the rows they return; object manifests stay cached
+    (objects / f"{stem}.manifest.json").unlink()
+    read = SimpleNamespace(read_vibe_photo_url=url)
+    book = SimpleNamespace(cover_image_url=url, reads=[read])
+    external = SimpleNamespace(cover_image_url="https://covers.openlibrary.org/b/id/1-L.jpg", reads=[])
+    pipeline.add_srcsets(books=[book, external])
+    assert book.cover_image_srcset == read.read_vibe_photo_srcset == f"{directory}/{stem}_160w.webp 160w, {directory}/{stem}_320w.webp 320w"
+    assert external.cover_image_srcset is None
+
+
+def test_manifest_cache_is_bounded(tmp_path):
+    pipeline = DerivativePipeline(str(tmp_path), widths=(160,), quality=80, workers=0, manifest_cache_size=2)
+    objects = tmp_path / "objects" / "aa"
+    objects.mkdir(parents=True)
+    urls = []
+    for i in range(3):
+        (objects / f"cover{i}.manifest.json").write_text(json.dumps(
+            {"source": f"cover{i}.jpg", "width": 100 + i, "height": 150, "variants": []}
+        ))
+        urls.append(f"/media/objects/aa/cover{i}.jpg")
+
+    for url in (urls[0], urls[1], urls[0], urls[2]):
+        assert pipeline.manifest_for(url)["source"] == url.rsplit("/", 1)[1]
+
+    # The least recently used manifest is evicted and re-read from disk on the next lookup
+    assert list(pipeline._manifests) == [urls[0], urls[2]]
+    assert pipeline.manifest_for(urls[1])["width"] == 101
+    assert list(pipeline._manifests) == [urls[2], urls[1]]
+
+
+def test_uploads_derivatives_and_serving_share_the_media_root():
+    media_root = Path(settings.MEDIA_ROOT)
+
+    assert media_root.is_absolute()
+    assert FileUploadService(derivatives=None).base_media_path == media_root
+    assert derivative_pipeline.media_root == media_root
+    assert media_store.media_root == media_root
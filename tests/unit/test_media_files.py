@@ -0,0 +1,136 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.media_files import IMMUTABLE_CACHE_CONTROL, MediaFiles, parse_range
+from app.services.media_store import MediaStore
+
+DATA = bytes(range(256)) * 4  # 1024 bytes
+
+
+def _client(media_root, **kwargs) -> TestClient:
+    app = FastAPI()
+    app.mount("/media", MediaFiles(directory=str(media_root), **kwargs), name="media")
+    return TestClient(app)
+
+
+@pytest.fixture
+def media(tmp_path):
+    _, url, _ = MediaStore(str(tmp_path)).store_bytes(DATA, ".jpg")
+    (tmp_path / "covers").mkdir()
+    (tmp_path / "covers" / "legacy.jpg").write_bytes(DATA)
+    return tmp_path, url
+
+
+def test_content_addressed_objects_are_immutable_with_strong_etag(media):
+    media_root, url = media
+    client = _client(media_root)
+
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.content == DATA
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["etag"] == f'"{url.rsplit("/", 1)[-1]}"'
+    assert response.headers["accept-ranges"] == "bytes"
+
+    revalidated = client.get(url, headers={"If-None-Match": f'"other", W/{response.headers["etag"]}'})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == response.headers["etag"]
+
+
+def test_other_media_revalidates_and_if_none_match_wins_over_date(media):
+    media_root, _ = media
+    client = _client(media_root)
+
+    response = client.get("/media/covers/legacy.jpg")
+    assert response.headers["cache-control"] == "no-cache"
+    assert not response.headers["etag"].startswith("W/")
+
+    last_modified = response.headers["last-modified"]
+    assert client.get("/media/covers/legacy.jpg", headers={"If-Modified-Since": last_modified}).status_code == 304
+    stale_etag = {"If-None-Match": '"stale"', "If-Modified-Since": last_modified}
+    assert client.get("/media/covers/legacy.jpg", headers=stale_etag).status_code == 200
+
+
+def test_byte_ranges(media):
+    media_root, url = media
+    client = _client(media_root)
+
+    partial = client.get(url, headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == DATA[10:20]
+    assert partial.headers["content-range"] == "bytes 10-19/1024"
+    assert partial.headers["content-type"] == "image/jpeg"
+
+    assert client.get(url, headers={"Range": "bytes=-4"}).content == DATA[-4:]
+    assert client.get(url, headers={"Range": "bytes=1000-"}).content == DATA[1000:]
+
+    unsatisfiable = client.get(url, headers={"Range": "bytes=5000-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == "bytes */1024"
+
+    # Several ranges are answered with the whole file
+    assert client.get(url, headers={"Range": "bytes=0-1,5-6"}).status_code == 200
+
+    etag = client.get(url).headers["etag"]
+    assert client.get(url, headers={"Range": "bytes=0-9", "If-Range": etag}).status_code == 206
+    assert client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"changed"'}).status_code == 200
+
+
+def test_parse_range_edge_cases():
+    assert parse_range("bytes=0-0", 10) == (0, 0)
+    assert parse_range("bytes=5-100", 10) == (5, 9)
+    assert parse_range("bytes=-100", 10) == (0, 9)
+    assert parse_range("items=0-5", 10) is None
+    assert parse_range("bytes=7-3", 10) is None
+    assert parse_range("bytes=abc", 10) is None
+
+
+def test_precompressed_sibling_is_served_when_accepted(tmp_path):
+    manifest = tmp_path / "objects" / "manifest.json"
+    manifest.parent.mkdir()
+    manifest.write_text('{"variants": []}')
+    (tmp_path / "objects" / "manifest.json.gz").write_bytes(gzip.compress(manifest.read_bytes()))
+    client = _client(tmp_path)
+
+    plain = client.get("/media/objects/manifest.json", headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/media/objects/manifest.json", headers={"Accept-Encoding": "gzip, br;q=0"})
+
+    assert plain.headers.get("content-encoding") is None
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json() == {"variants": []}
+    assert compressed.headers["content-type"] == "application/json"
+    assert compressed.headers["etag"] != plain.headers["etag"]
+    assert plain.headers["vary"] == compressed.headers["vary"] == "Accept-Encoding"
+
+
+def test_incoming_uploads_are_not_served(tmp_path):
+    incoming = MediaStore(str(tmp_path)).incoming_path()
+    incoming.write_bytes(b"partial")
+
+    response = _client(tmp_path).get(f"/media/objects/.incoming/{incoming.name}")
+
+    assert response.status_code == 404
+
+
+def test_offload_to_reverse_proxy(media):
+    media_root, url = media
+    relative = url[len("/media/"):]
+
+    accel = _client(media_root, offload="x-accel", accel_prefix="/protected-media").get(url)
+    assert accel.status_code == 200
+    assert accel.content == b""
+    assert accel.headers["x-accel-redirect"] == f"/protected-media/{relative}"
+    assert accel.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+    sendfile = _client(media_root, offload="x-sendfile").get(url)
+    assert sendfile.headers["x-sendfile"] == str(media_root / relative)
+
+    etag = accel.headers["etag"]
+    not_modified = _client(media_root, offload="x-accel").get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert "x-accel-redirect" not in not_modified.headers
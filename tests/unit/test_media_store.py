@@ -0,0 +1,98 @@
+import os
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.enums import Format
+from app.database import Base
+from app.models import *  # noqa: F401,F403 - register all models with the mapper
+from app.models.book import Book
+from app.models.read import Read
+from app.models.user import User
+from app.services.media_store import MediaStore, digest_from_url, reference_counts
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+DAY = 24 * 3600
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def test_reference_counts_span_all_media_columns(db, tmp_path):
+    store = MediaStore(str(tmp_path))
+    _, shared, _ = store.store_bytes(b"shared cover", ".jpg")
+    _, vibe, _ = store.store_bytes(b"vibe photo", ".png")
+
+    user = User(username="reader", email="reader@example.com", password_hash="x", profile_photo_url=shared)
+    db.add(user)
+    db.flush()
+    book = Book(user_id=user.id, title="Dune", author="Frank Herbert", format=Format.PAPERBACK, cover_image_url=shared)
+    db.add(book)
+    db.flush()
+    db.add(Read(user_id=user.id, book_id=book.id, read_vibe_photo_url=vibe))
+    db.add(Book(user_id=user.id, title="Emma", author="Jane Austen", format=Format.PAPERBACK, cover_image_url="https://example.com/emma.jpg"))
+    db.commit()
+
+    counts = reference_counts(db)
+
+    assert counts == {digest_from_url(shared): 2, digest_from_url(vibe): 1}
+
+
+def test_collect_garbage_removes_old_orphans_and_their_derivatives(db, tmp_path):
+    store = MediaStore(str(tmp_path))
+    kept_path, kept, _ = store.store_bytes(b"referenced", ".jpg")
+    orphan_path, _, _ = store.store_bytes(b"orphaned", ".jpg")
+    fresh_path, _, _ = store.store_bytes(b"just uploaded", ".jpg")
+    derivative = orphan_path.parent / f"{orphan_path.stem}_160w.webp"
+    derivative.write_bytes(b"variant")
+    abandoned = store.incoming_path()
+    abandoned.write_bytes(b"half an upload")
+    for path in (kept_path, orphan_path, derivative, abandoned):
+        _age(path, 2 * DAY)
+
+    user = User(username="reader", email="reader@example.com", password_hash="x")
+    db.add(user)
+    db.flush()
+    db.add(Book(user_id=user.id, title="Dune", author="Frank Herbert", format=Format.PAPERBACK, cover_image_url=kept))
+    db.commit()
+
+    preview = store.collect_garbage(db, grace_seconds=DAY, dry_run=True)
+    assert preview["objects_deleted"] == 1
+    assert orphan_path.exists()
+
+    result = store.collect_garbage(db, grace_seconds=DAY)
+
+    assert result["objects_scanned"] == 3
+    assert result["objects_referenced"] == 1
+    assert result["objects_deleted"] == 1
+    assert result["files_deleted"] == 3
+    assert kept_path.exists() and fresh_path.exists()
+    assert not orphan_path.exists() and not derivative.exists() and not abandoned.exists()
+
+
+def test_reuploading_an_orphan_protects_it_from_collection(db, tmp_path):
+    store = MediaStore(str(tmp_path))
+    path, url, created = store.store_bytes(b"cover", ".jpg")
+    _age(path, 2 * DAY)
+
+    _, again, created_again = store.store_bytes(b"cover", ".jpg")
+
+    assert (created, created_again) == (True, False)
+    assert again == url
+    assert store.collect_garbage(db, grace_seconds=DAY)["objects_deleted"] == 0
+    assert path.exists()
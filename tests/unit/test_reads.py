@@ -0,0 +1,136 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.main import app
+from app.database import Base, get_async_db, get_db
+from app.models.book import Book
+from app.models.author_canon import UserAuthorProgress
+from app.services.completionist_service import progress_updater
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# NullPool: TestClient runs each request on a fresh event loop
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    Base.metadata.create_all(bind=engine)
+    yield TestClient(app)
+    progress_updater.flush()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _auth_headers(client, username):
+    client.post("/api/auth/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "password123"
+    })
+    response = client.post("/api/auth/login", data={
+        "username": username,
+        "password": "password123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _add_book_with_read(client, headers, title, author):
+    book = client.post("/api/books", headers=headers, json={
+        "title": title,
+        "author": author,
+        "description": "A book.",
+        "format": "PAPERBACK"
+    }).json()
+    read = client.post(f"/api/reads?book_id={book['id']}", headers=headers, json={
+        "read_status": "READ"
+    }).json()
+    return book, read
+
+
+def test_community_reads_match_on_normalized_title_and_author(client):
+    alice = _auth_headers(client, "alice")
+    bob = _auth_headers(client, "bob")
+    book, alice_read = _add_book_with_read(client, alice, "Dune", "Frank Herbert")
+    _, bob_read = _add_book_with_read(client, bob, "  dune. ", "Frank  Herbert")
+    _add_book_with_read(client, bob, "Dune Messiah", "Frank Herbert")
+
+    response = client.get(f"/api/reads/book/{book['id']}/community", headers=alice)
+    assert response.status_code == 200
+    assert {r["id"] for r in response.json()} == {alice_read["id"], bob_read["id"]}
+    assert {r["user"]["username"] for r in response.json()} == {"alice", "bob"}
+
+
+def test_async_reads_endpoint_serves_concurrent_requests(client):
+    alice = _auth_headers(client, "alice")
+    book, read = _add_book_with_read(client, alice, "Dune", "Frank Herbert")
+    client.post(f"/api/reads?book_id={book['id']}", headers=alice, json={"read_status": "READING"})
+
+    async def fetch_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+            return await asyncio.gather(*(
+                async_client.get(f"/api/reads/book/{book['id']}", headers=alice) for _ in range(20)
+            ))
+
+    responses = asyncio.run(fetch_all())
+
+    assert {response.status_code for response in responses} == {200}
+    for response in responses:
+        reads = response.json()
+        assert len(reads) == 2 and read["id"] in {r["id"] for r in reads}
+        assert {r["user"]["username"] for r in reads} == {"alice"}
+    assert client.get("/api/reads/book/9999", headers=alice).status_code == 404
+
+
+def test_match_key_follows_title_updates(client):
+    alice = _auth_headers(client, "alice")
+    book, _ = _add_book_with_read(client, alice, "Dune", "Frank Herbert")
+    client.put(f"/api/books/{book['id']}", headers=alice, json={"title": "Children of Dune"})
+
+    db = TestingSessionLocal()
+    try:
+        assert db.get(Book, book["id"]).match_key == "children of dune|frank herbert"
+    finally:
+        db.close()
+
+
+def test_read_changes_update_completionist_progress(client):
+    alice = _auth_headers(client, "alice")
+    book, read = _add_book_with_read(client, alice, "Dune", "Frank Herbert")
+    _add_book_with_read(client, alice, "Dune Messiah", "Frank Herbert")
+    assert progress_updater.flush() >= 1
+
+    db = TestingSessionLocal()
+    try:
+        progress = db.query(UserAuthorProgress).one()
+        assert progress.books_read_count == 2
+
+        client.delete(f"/api/reads/{read['id']}", headers=alice)
+        progress_updater.flush()
+        db.expire_all()
+        assert progress.books_read_count == 1
+    finally:
+        db.close()
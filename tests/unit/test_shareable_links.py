@@ -0,0 +1,222 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select, update
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.database import Base, get_db
+from app.models.shareable_link import ShareableLink
+from app.services.completionist_service import progress_updater
+from app.services.link_sweeper import sweep_expired_links
+from app.services.share_cache import SharePayloadCache, share_cache
+from app.services.view_counter import view_counter
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db] = override_get_db
+    Base.metadata.create_all(bind=engine)
+    yield TestClient(app)
+    progress_updater.flush()
+    view_counter.flush()
+    share_cache.clear()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _auth_headers(client, username):
+    client.post("/api/auth/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "password123"
+    })
+    response = client.post("/api/auth/login", data={
+        "username": username,
+        "password": "password123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def shared_book(client):
+    """An owner's book with a shareable link: (headers, book, link)"""
+    headers = _auth_headers(client, "owner")
+    book = client.post("/api/books", headers=headers, json={
+        "title": "Dune",
+        "author": "Frank Herbert",
+        "description": "Spice.",
+        "format": "PAPERBACK"
+    }).json()
+    link = client.post("/api/shareable-links", headers=headers, json={"book_id": book["id"]}).json()
+    return headers, book, link
+
+
+def _stored_view_count(link_id):
+    db = TestingSessionLocal()
+    try:
+        return db.get(ShareableLink, link_id).view_count
+    finally:
+        db.close()
+
+
+def test_public_views_are_buffered_and_flushed_in_one_update(client, shared_book, monkeypatch):
+    headers, book, link = shared_book
+    monkeypatch.setattr(view_counter, "flush_seconds", 3600)
+
+    for _ in range(5):
+        response = client.get(f"/api/shareable-links/token/{link['token']}")
+        assert response.status_code == 200
+        assert response.json()["title"] == "Dune"
+
+    assert _stored_view_count(link["id"]) == 0
+    # Owners see buffered views before they are written
+    current = client.get(f"/api/shareable-links/book/{book['id']}", headers=headers).json()
+    assert current["view_count"] == 5
+
+    assert view_counter.flush() == 1
+    assert _stored_view_count(link["id"]) == 5
+    assert view_counter.pending(link["id"]) == 0
+
+
+def test_views_are_written_through_without_a_flush_interval(client, shared_book, monkeypatch):
+    _, _, link = shared_book
+    monkeypatch.setattr(view_counter, "flush_seconds", 0)
+
+    client.get(f"/api/shareable-links/token/{link['token']}")
+    client.get(f"/api/shareable-links/token/{link['token']}")
+
+    assert _stored_view_count(link["id"]) == 2
+
+
+def test_public_page_is_served_from_cache_with_etag(client, shared_book):
+    headers, book, link = shared_book
+    url = f"/api/shareable-links/token/{link['token']}"
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        cached = client.get(url)
+        not_modified = client.get(url, headers={"If-None-Match": etag})
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    # Only the link status lookup; the payload comes from the cache
+    assert len(statements) == 2
+    assert all("FROM shareable_links" in statement for statement in statements)
+    assert cached.json() == first.json()
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+    # Editing the book invalidates the cached payload
+    client.put(f"/api/books/{book['id']}", headers=headers, json={"title": "Dune Messiah"})
+    edited = client.get(url, headers={"If-None-Match": etag})
+    assert edited.status_code == 200
+    assert edited.json()["title"] == "Dune Messiah"
+    assert edited.headers["etag"] != etag
+
+
+def test_new_read_and_revocation_invalidate_cached_page(client, shared_book):
+    headers, book, link = shared_book
+    url = f"/api/shareable-links/token/{link['token']}"
+    assert client.get(url).json()["sharing_user_rating"] is None
+
+    client.post(f"/api/reads?book_id={book['id']}", headers=headers, json={
+        "read_status": "READ",
+        "date_finished": "2024-03-01",
+        "rating": 4.5
+    })
+    assert client.get(url).json()["sharing_user_rating"] == 4.5
+
+    client.delete(f"/api/shareable-links/{link['id']}", headers=headers)
+    assert client.get(url).status_code == 410
+
+
+def test_revocation_by_another_worker_applies_to_cached_pages(client, shared_book):
+    _, _, link = shared_book
+    url = f"/api/shareable-links/token/{link['token']}"
+    assert client.get(url).status_code == 200
+
+    # A bulk UPDATE fires no mapper events, like a revoke handled by another worker
+    db = TestingSessionLocal()
+    try:
+        db.execute(update(ShareableLink).where(ShareableLink.id == link["id"]).values(is_revoked=True))
+        db.commit()
+    finally:
+        db.close()
+
+    assert client.get(url).status_code == 410
+    assert share_cache.get(link["token"]) is None
+
+
+def test_cached_payload_never_outlives_its_link():
+    cache = SharePayloadCache(maxsize=10, ttl_seconds=300)
+    link = ShareableLink(id=1, book_id=2, user_id=3, token="t", expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+
+    cache.put("t", link, b"{}")
+    assert cache.get("t") is None
+
+    link.expires_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+    entry = cache.put("t", link, b"{}")
+    assert cache.get("t") is entry
+    cache.invalidate_user(3)
+    assert cache.get("t") is None
+
+
+def test_sweeper_revokes_expired_links_and_purges_old_ones(client, shared_book):
+    headers, book, link = shared_book
+    db = TestingSessionLocal()
+    now = datetime.now(timezone.utc)
+    db.add_all([
+        ShareableLink(book_id=book["id"], user_id=1, token="expired", expires_at=now - timedelta(hours=1)),
+        ShareableLink(
+            book_id=book["id"], user_id=1, token="long-revoked", expires_at=now - timedelta(days=60),
+            is_revoked=True, revoked_at=now - timedelta(days=40)
+        ),
+    ])
+    db.commit()
+
+    result = sweep_expired_links(db, purge_after_days=30, batch_size=1)
+
+    assert result == {"revoked": 1, "purged": 1}
+    remaining = {row.token: row.is_revoked for row in db.query(ShareableLink)}
+    assert remaining == {link["token"]: False, "expired": True}
+    assert sweep_expired_links(db) == {"revoked": 0, "purged": 0}
+    db.close()
+
+
+def test_active_link_lookups_use_partial_indexes(client):
+    db = TestingSessionLocal()
+    owner_lookup = select(ShareableLink).where(
+        ShareableLink.book_id == 1,
+        ShareableLink.user_id == 1,
+        ShareableLink.is_revoked == False
+    )
+    expired = select(ShareableLink.id).where(
+        ShareableLink.is_revoked == False,
+        ShareableLink.expires_at <= datetime.now(timezone.utc)
+    )
+
+    def plan(query):
+        compiled = query.compile(engine)
+        rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", tuple(compiled.params.values()))
+        return " ".join(row[-1] for row in rows)
+
+    assert "ix_shareable_links_active_owner" in plan(owner_lookup)
+    assert "ix_shareable_links_active_expires_at" in plan(expired)
+    db.close()
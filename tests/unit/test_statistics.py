@@ -0,0 +1,101 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.main import app
+from app.database import Base, get_async_db, get_db
+from app.models.user import User
+from app.services.statistics_service import StatisticsService
+from app.services.completionist_service import progress_updater
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# NullPool: TestClient runs each request on a fresh event loop
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture
+def client():
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    Base.metadata.create_all(bind=engine)
+    yield TestClient(app)
+    progress_updater.flush()
+    Base.metadata.drop_all(bind=engine)
+
+
+def _auth_headers(client, username):
+    client.post("/api/auth/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "password123"
+    })
+    response = client.post("/api/auth/login", data={
+        "username": username,
+        "password": "password123"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _add_read(client, headers, title, author, date_finished, review=None):
+    book = client.post("/api/books", headers=headers, json={
+        "title": title,
+        "author": author,
+        "description": "A book.",
+        "format": "PAPERBACK"
+    }).json()
+    client.post(f"/api/reads?book_id={book['id']}", headers=headers, json={
+        "read_status": "READ",
+        "date_finished": date_finished,
+        "review": review
+    })
+    return book
+
+
+def test_async_summary_matches_the_statistics_service(client):
+    headers = {name: _auth_headers(client, name) for name in ("alice", "bob", "cat")}
+    _add_read(client, headers["alice"], "Dune", "Frank Herbert", "2024-03-01", review="Spice.")
+    _add_read(client, headers["alice"], "Emma", "Jane Austen", "2024-01-15")
+    _add_read(client, headers["bob"], "dune.", "Frank  Herbert", "2024-03-04")
+    _add_read(client, headers["cat"], "Emma", "Jane Austen", "2024-02-01")
+    _add_read(client, headers["cat"], "Persuasion", "Jane Austen", "2024-02-20")
+
+    response = client.get("/api/statistics/summary", headers=headers["alice"])
+    assert response.status_code == 200
+    summary = response.json()
+
+    db = TestingSessionLocal()
+    try:
+        service = StatisticsService(db)
+        alice_id = db.query(User.id).filter(User.username == "alice").scalar()
+        assert summary["total_reads"] == summary["unique_books"] == 2
+        assert [(item["format"], item["count"]) for item in summary["format_breakdown"]] == [
+            (item["format"], item["count"]) for item in service.calculate_format_breakdown(alice_id)
+        ] == [("PAPERBACK", 2)]
+        assert summary["viewner_rate"] == service.calculate_viewner_rate(alice_id)[1] == 50.0
+        assert summary["commentu_rate"] == service.calculate_commentu_rate(alice_id)[1] == 0.0
+        # Dune (alice, bob) and Emma (alice, cat) are shared; Persuasion is not
+        assert summary["reads_in_common_count"] == len(service.calculate_community_reads_in_common(alice_id)) == 2
+        assert summary["conjugation_highlights_count"] == len(service.calculate_conjugation_highlights()) == 2
+    finally:
+        db.close()
+
+    empty = client.get("/api/statistics/summary", headers=_auth_headers(client, "dan")).json()
+    assert (empty["total_reads"], empty["reads_in_common_count"]) == (0, 0)